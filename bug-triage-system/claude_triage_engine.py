@@ -1,153 +1,243 @@
+import asyncio
 import json
 import logging
+import httpx
 import requests
-from typing import Optional
+from typing import List, Optional
 from config import Config
-from models import GitHubIssue, TriageResult, Priority, Component
+from http_client import get_async_client, get_session
+from metrics import time_stage, timed_stage
+from models import GitHubIssue, TriageResult, Component
+from prompt_compactor import estimate_tokens
+from rate_limiter import RETRYABLE_EXCEPTIONS, get_rate_limiter
+from streaming_json import parse_sse_data
+from triage_prompts import TRIAGE_TOOL_NAME, TriageStreamCollector, batch_result_schema, build_batch_issue_prompt, build_issue_prompt, build_system_prompt, build_triage_prompt, compact_issue_body, load_json_response, output_token_budget, parse_batch_response, parse_triage_data, split_batch, triage_result_schema
+from usage_tracker import UsageTracker
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ClaudeTriageEngine:
-    def __init__(self):
+    engine_name = "claude"
+    
+    def __init__(self, model: Optional[str] = None, timeout: Optional[float] = None):
         self.api_key = Config.CLAUDE_API_KEY
         self.api_url = Config.CLAUDE_API_URL
-        self.model = Config.CLAUDE_MODEL
+        self.model = model or Config.CLAUDE_MODEL
+        self.timeout = timeout
+        # With a timeout of its own (a cascade stage), a timed-out request fails over to the next stage instead of being retried
+        self.retry_on = RETRYABLE_EXCEPTIONS if timeout is None else ()
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
             "anthropic-version": "2023-06-01"
         }
+        self.session = get_session()
+        self.rate_limiter = get_rate_limiter("claude")
+        self.usage = UsageTracker(self.engine_name, self.model)
     
     def _build_triage_prompt(self, issue: GitHubIssue) -> str:
         """Build the prompt for AI triage analysis"""
+        return build_triage_prompt(issue)
+    
+    def _record_prompt(self, issues: List[GitHubIssue], system_prompt: str, user_prompt: str):
+        """Record the estimated prompt size and how much compaction trimmed from the issue bodies"""
+        bodies = [compact_issue_body(issue) for issue in issues]
+        self.usage.record_prompt(
+            estimate_tokens(system_prompt) + estimate_tokens(user_prompt),
+            bodies_compacted=sum(1 for body in bodies if body.trimmed_tokens),
+            tokens_trimmed=sum(body.trimmed_tokens for body in bodies)
+        )
+    
+    @timed_stage("prompt_build")
+    def _build_payload(self, issues: List[GitHubIssue], batch: bool = False) -> dict:
+        """Build the Claude messages API payload: cacheable system prefix plus a per-request message"""
+        system_prompt = build_system_prompt()
+        user_prompt = build_batch_issue_prompt(issues) if batch else build_issue_prompt(issues[0])
+        self._record_prompt(issues, system_prompt, user_prompt)
+        
+        system_block = {"type": "text", "text": system_prompt}
+        if Config.PROMPT_CACHE_ENABLED:
+            system_block["cache_control"] = {"type": "ephemeral"}
         
-        team_info = {
-            "frontend": Config.FRONTEND_TEAM,
-            "backend": Config.BACKEND_TEAM,
-            "infra": Config.INFRA_TEAM,
-            "all_members": Config.TEAM_MEMBERS
+        payload = {
+            "model": self.model,
+            "max_tokens": output_token_budget(self.model, len(issues)),
+            "temperature": 0.3,
+            "system": [system_block],
+            "messages": [
+                {
+                    "role": "user",
+                    "content": user_prompt
+                }
+            ]
         }
         
-        prompt = f"""
-You are an expert software engineering triage assistant. Analyze the following GitHub issue and provide a structured triage recommendation.
-
-ISSUE DETAILS:
-Title: {issue.title}
-Body: {issue.body or "No description provided"}
-Current Labels: {', '.join(issue.labels) if issue.labels else "None"}
-Current Assignee: {issue.assignee or "Unassigned"}
-
-TEAM INFORMATION:
-Frontend Team: {', '.join(team_info['frontend']) if team_info['frontend'] else "Not configured"}
-Backend Team: {', '.join(team_info['backend']) if team_info['backend'] else "Not configured"}
-Infrastructure Team: {', '.join(team_info['infra']) if team_info['infra'] else "Not configured"}
-All Team Members: {', '.join(team_info['all_members']) if team_info['all_members'] else "Not configured"}
-
-TRIAGE CRITERIA:
-Priority Levels:
-- P0 (Critical): Production down, security vulnerabilities, data loss
-- P1 (High): Major features broken, significant user impact
-- P2 (Medium): Minor feature issues, moderate user impact
-- P3 (Low): Enhancements, documentation, nice-to-have features
-
-Component Categories:
-- frontend: UI/UX issues, client-side bugs, styling problems
-- backend: API issues, server-side logic, database problems
-- infra: DevOps, deployment, infrastructure, CI/CD
-- docs: Documentation issues
-- testing: Test-related issues
-- unknown: Cannot determine from available information
-
-RESPONSE FORMAT:
-Provide your analysis as a valid JSON object with the following structure:
-{{
-    "priority": "P0|P1|P2|P3",
-    "component": "frontend|backend|infra|docs|testing|unknown",
-    "suggested_labels": ["label1", "label2"],
-    "suggested_assignee": "username or null",
-    "confidence_score": 0.0-1.0,
-    "reasoning": "Brief explanation of your analysis"
-}}
-
-IMPORTANT GUIDELINES:
-1. Be conservative with P0/P1 assignments - only for truly critical issues
-2. Suggest assignee only if you can clearly match the issue to a team member's expertise
-3. Include relevant labels like "bug", "enhancement", "security", "performance", etc.
-4. Confidence score should reflect how certain you are about the classification
-5. Keep reasoning concise but informative
-
-Analyze the issue and respond with only the JSON object:
-"""
-        return prompt
+        # Forcing a tool call makes Claude return input that matches the schema
+        if Config.STRUCTURED_OUTPUT:
+            payload["tools"] = [{
+                "name": TRIAGE_TOOL_NAME,
+                "description": "Record the triage recommendation for the GitHub issues" if batch else "Record the triage recommendation for the GitHub issue",
+                "input_schema": batch_result_schema() if batch else triage_result_schema()
+            }]
+            payload["tool_choice"] = {"type": "tool", "name": TRIAGE_TOOL_NAME}
+        return payload
+    
+    def _build_batch_payload(self, issues: List[GitHubIssue]) -> dict:
+        """Build one payload that triages several issues"""
+        return self._build_payload(issues, batch=True)
+    
+    def _record_parse(self, parsed: int = 0, repaired: int = 0, failed: int = 0):
+        """Count how this engine's results decoded, for the session summary"""
+        self.usage.record_parse(f"{self.engine_name}:{self.model}", parsed=parsed, repaired=repaired, failed=failed)
+    
+    def _record_usage(self, label: str, response_data: dict):
+        """Record token usage, counting cache reads and writes as part of the prompt"""
+        usage = response_data.get("usage") or {}
+        cached = usage.get("cache_read_input_tokens") or 0
+        cache_write = usage.get("cache_creation_input_tokens") or 0
+        
+        self.usage.record(
+            label,
+            input_tokens=(usage.get("input_tokens") or 0) + cached + cache_write,
+            output_tokens=usage.get("output_tokens") or 0,
+            cached_input_tokens=cached,
+            cache_write_tokens=cache_write
+        )
+    
+    def _extract_text(self, response_data: dict) -> Optional[str]:
+        """Extract the content from Claude's response (the tool input, if it called the triage tool)"""
+        blocks = response_data.get("content") or []
+        for block in blocks:
+            if block.get("type") == "tool_use":
+                return json.dumps(block.get("input"))
+        
+        for block in blocks:
+            if "text" in block:
+                return block["text"].strip()
+        
+        logger.error(f"Unexpected response format from Claude API: {response_data}")
+        return None
+    
+    @timed_stage("parse")
+    def _parse_response(self, issue: GitHubIssue, response_data: dict) -> Optional[TriageResult]:
+        """Turn a Claude messages API response into a TriageResult"""
+        self._record_usage(f"issue #{issue.number}", response_data)
+        response_text = self._extract_text(response_data)
+        if response_text is None:
+            self._record_parse(failed=1)
+            return None
+        
+        triage_data, repaired = load_json_response(response_text, f"issue #{issue.number}")
+        
+        try:
+            # Validate and create TriageResult
+            result = parse_triage_data(triage_data)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid triage data for issue #{issue.number}: {e}")
+            self._record_parse(failed=1)
+            return None
+        
+        self._record_parse(parsed=1, repaired=int(repaired))
+        logger.info(f"Successfully analyzed issue #{issue.number} - Priority: {result.priority}, Component: {result.component}")
+        return result
+    
+    def _read_stream_event(self, event: dict, collector: TriageStreamCollector, usage: dict) -> bool:
+        """Apply one server-sent event; returns True once the rest of the stream is not needed"""
+        event_type = event.get("type")
+        if event_type == "message_start":
+            usage.update(event.get("message", {}).get("usage") or {})
+        elif event_type == "message_delta":
+            usage.update(event.get("usage") or {})
+        elif event_type == "content_block_delta":
+            # Structured output streams the tool input as partial JSON
+            delta = event.get("delta", {})
+            if delta.get("type") == "text_delta":
+                return collector.feed(delta["text"])
+            if delta.get("type") == "input_json_delta":
+                return collector.feed(delta["partial_json"])
+        elif event_type == "error":
+            raise RuntimeError(f"Claude API stream error: {event.get('error')}")
+        return False
+    
+    @timed_stage("parse")
+    def _finish_stream(self, issue: GitHubIssue, collector: TriageStreamCollector, usage: dict) -> Optional[TriageResult]:
+        """Record usage for a streamed response and build its result"""
+        # A stream closed early never reports its final output token count
+        if collector.truncated:
+            usage["output_tokens"] = max(usage.get("output_tokens") or 0, estimate_tokens("".join(collector.text)))
+        self._record_usage(f"issue #{issue.number}", {"usage": usage})
+        
+        result = collector.result()
+        self._record_parse(parsed=int(result is not None), repaired=int(collector.repaired and result is not None), failed=int(result is None))
+        if result:
+            logger.info(f"Successfully analyzed issue #{issue.number} - Priority: {result.priority}, Component: {result.component}")
+        return result
+    
+    def _stream_issue(self, issue: GitHubIssue, payload: dict) -> Optional[TriageResult]:
+        """Stream the analysis of one issue, closing the connection once the rest is not needed"""
+        def request():
+            response = self.session.post(self.api_url, headers=self.headers, json={**payload, "stream": True}, timeout=self.timeout or 30, stream=True)
+            if response.status_code != 200:
+                response.content  # Read the error body so the connection can be reused
+            return response
+        
+        with time_stage("llm_call", self.engine_name, self.model):
+            response = self.rate_limiter.send(request, retry_on=self.retry_on)
+            with response:
+                if response.status_code != 200:
+                    logger.error(f"Claude API request failed with status {response.status_code}: {response.text}")
+                    return None
+                
+                # Some gateways ignore "stream" and answer with a regular message
+                if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                    return self._parse_response(issue, response.json())
+                
+                collector = TriageStreamCollector(f"issue #{issue.number}")
+                usage = {}
+                for line in response.iter_lines(decode_unicode=True):
+                    event = parse_sse_data(line)
+                    if event and self._read_stream_event(event, collector, usage):
+                        break
+        
+        return self._finish_stream(issue, collector, usage)
+    
+    @timed_stage("parse")
+    def _parse_batch_response(self, issues: List[GitHubIssue], response_data: dict) -> List[Optional[TriageResult]]:
+        """Turn a batch response into one result per issue (None for malformed items)"""
+        self._record_usage(f"batch of {len(issues)} issues", response_data)
+        response_text = self._extract_text(response_data)
+        if response_text is None:
+            self._record_parse(failed=len(issues))
+            return [None] * len(issues)
+        
+        results, repaired = parse_batch_response(response_text, len(issues))
+        parsed = sum(1 for result in results if result)
+        self._record_parse(parsed=parsed, repaired=parsed if repaired else 0, failed=len(issues) - parsed)
+        logger.info(f"Batch analyzed {sum(1 for result in results if result)}/{len(issues)} issues in one request")
+        return results
     
     def analyze_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
         """Analyze an issue using Claude and return triage recommendations"""
         try:
-            prompt = self._build_triage_prompt(issue)
-            
-            # Prepare the request payload for Claude API
-            payload = {
-                "model": self.model,
-                "max_tokens": 500,
-                "temperature": 0.3,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            }
+            payload = self._build_payload([issue])
+            if Config.STREAM_RESPONSES:
+                return self._stream_issue(issue, payload)
             
-            # Make the API request
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
+            # Make the API request over the shared keep-alive session, retrying 429/529s
+            with time_stage("llm_call", self.engine_name, self.model):
+                response = self.rate_limiter.send(lambda: self.session.post(
+                    self.api_url,
+                    headers=self.headers,
+                    json=payload,
+                    timeout=self.timeout or 30
+                ), retry_on=self.retry_on)
             
             if response.status_code != 200:
                 logger.error(f"Claude API request failed with status {response.status_code}: {response.text}")
                 return None
             
-            response_data = response.json()
-            
-            # Extract the content from Claude's response
-            if "content" in response_data and len(response_data["content"]) > 0:
-                response_text = response_data["content"][0]["text"].strip()
-            else:
-                logger.error(f"Unexpected response format from Claude API: {response_data}")
-                return None
-            
-            # Clean up the response to ensure it's valid JSON
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            
-            response_text = response_text.strip()
-            
-            # Parse the JSON response
-            triage_data = json.loads(response_text)
-            
-            # Validate and create TriageResult
-            result = TriageResult(
-                priority=Priority(triage_data["priority"]),
-                component=Component(triage_data["component"]),
-                suggested_labels=triage_data.get("suggested_labels", []),
-                suggested_assignee=triage_data.get("suggested_assignee"),
-                confidence_score=float(triage_data.get("confidence_score", 0.5)),
-                reasoning=triage_data.get("reasoning", "No reasoning provided")
-            )
-            
-            logger.info(f"Successfully analyzed issue #{issue.number} - Priority: {result.priority}, Component: {result.component}")
-            return result
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response for issue #{issue.number}: {e}")
-            logger.error(f"Raw response: {response_text}")
-            return None
+            return self._parse_response(issue, response.json())
             
         except requests.RequestException as e:
             logger.error(f"Network error when calling Claude API for issue #{issue.number}: {e}")
@@ -157,6 +247,42 @@ Analyze the issue and respond with only the JSON object:
             logger.error(f"Error analyzing issue #{issue.number}: {e}")
             return None
     
+    def analyze_issues(self, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Analyze several issues in one request, retrying malformed items one by one"""
+        if len(issues) <= 1:
+            return [self.analyze_issue(issue) for issue in issues]
+        
+        # Oversized batches would be rejected outright, so send them as several requests that fit the model
+        batches = split_batch(issues, self.model)
+        if len(batches) > 1:
+            logger.info(f"Splitting a batch of {len(issues)} issues into {len(batches)} requests to fit {self.model}'s token limits")
+            return [result for batch in batches for result in self.analyze_issues(batch)]
+        
+        results = [None] * len(issues)
+        try:
+            payload = self._build_batch_payload(issues)
+            with time_stage("llm_call", self.engine_name, self.model):
+                response = self.rate_limiter.send(lambda: self.session.post(
+                    self.api_url,
+                    headers=self.headers,
+                    json=payload,
+                    timeout=self.timeout or 30 + 10 * len(issues)
+                ), retry_on=self.retry_on)
+            
+            if response.status_code != 200:
+                logger.error(f"Claude API batch request failed with status {response.status_code}: {response.text}")
+            else:
+                results = self._parse_batch_response(issues, response.json())
+                
+        except requests.RequestException as e:
+            logger.error(f"Network error when calling Claude API for a batch of {len(issues)} issues: {e}")
+            
+        except Exception as e:
+            logger.error(f"Error analyzing a batch of {len(issues)} issues: {e}")
+        
+        # Fall back to single-issue calls for anything the batch did not cover
+        return [result or self.analyze_issue(issue) for issue, result in zip(issues, results)]
+    
     def _validate_assignee(self, assignee: str) -> bool:
         """Validate if the suggested assignee is in the team"""
         if not assignee:
@@ -181,3 +307,113 @@ Analyze the issue and respond with only the JSON object:
         
         team = team_mapping.get(component, Config.TEAM_MEMBERS)
         return team[0] if team else None
+
+
+class AsyncClaudeTriageEngine(ClaudeTriageEngine):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, model: Optional[str] = None):
+        super().__init__(model)
+        self.client = client or get_async_client()
+    
+    async def _stream_issue_async(self, issue: GitHubIssue, payload: dict) -> Optional[TriageResult]:
+        """Stream the analysis of one issue, closing the connection once the rest is not needed"""
+        async def request():
+            response = await self.client.send(
+                self.client.build_request("POST", self.api_url, headers=self.headers, json={**payload, "stream": True}, timeout=30),
+                stream=True
+            )
+            if response.status_code != 200:
+                await response.aread()
+            return response
+        
+        with time_stage("llm_call", self.engine_name, self.model):
+            response = await self.rate_limiter.send_async(request)
+            try:
+                if response.status_code != 200:
+                    logger.error(f"Claude API request failed with status {response.status_code}: {response.text}")
+                    return None
+                
+                # Some gateways ignore "stream" and answer with a regular message
+                if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                    await response.aread()
+                    return self._parse_response(issue, response.json())
+                
+                collector = TriageStreamCollector(f"issue #{issue.number}")
+                usage = {}
+                async for line in response.aiter_lines():
+                    event = parse_sse_data(line)
+                    if event and self._read_stream_event(event, collector, usage):
+                        break
+            finally:
+                await response.aclose()
+        
+        return self._finish_stream(issue, collector, usage)
+    
+    async def analyze_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Analyze an issue using Claude without blocking the event loop"""
+        try:
+            payload = self._build_payload([issue])
+            if Config.STREAM_RESPONSES:
+                return await self._stream_issue_async(issue, payload)
+            
+            with time_stage("llm_call", self.engine_name, self.model):
+                response = await self.rate_limiter.send_async(lambda: self.client.post(
+                    self.api_url,
+                    headers=self.headers,
+                    json=payload,
+                    timeout=30
+                ))
+            
+            if response.status_code != 200:
+                logger.error(f"Claude API request failed with status {response.status_code}: {response.text}")
+                return None
+            
+            return self._parse_response(issue, response.json())
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Network error when calling Claude API for issue #{issue.number}: {e}")
+            return None
+            
+        except Exception as e:
+            logger.error(f"Error analyzing issue #{issue.number}: {e}")
+            return None
+    
+    async def analyze_issues(self, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Analyze several issues in one request, retrying malformed items one by one"""
+        if len(issues) <= 1:
+            return [await self.analyze_issue(issue) for issue in issues]
+        
+        # Oversized batches would be rejected outright, so send them as several requests that fit the model
+        batches = split_batch(issues, self.model)
+        if len(batches) > 1:
+            logger.info(f"Splitting a batch of {len(issues)} issues into {len(batches)} requests to fit {self.model}'s token limits")
+            batch_results = await asyncio.gather(*(self.analyze_issues(batch) for batch in batches))
+            return [result for results in batch_results for result in results]
+        
+        results = [None] * len(issues)
+        try:
+            payload = self._build_batch_payload(issues)
+            with time_stage("llm_call", self.engine_name, self.model):
+                response = await self.rate_limiter.send_async(lambda: self.client.post(
+                    self.api_url,
+                    headers=self.headers,
+                    json=payload,
+                    timeout=30 + 10 * len(issues)
+                ))
+            
+            if response.status_code != 200:
+                logger.error(f"Claude API batch request failed with status {response.status_code}: {response.text}")
+            else:
+                results = self._parse_batch_response(issues, response.json())
+                
+        except httpx.HTTPError as e:
+            logger.error(f"Network error when calling Claude API for a batch of {len(issues)} issues: {e}")
+            
+        except Exception as e:
+            logger.error(f"Error analyzing a batch of {len(issues)} issues: {e}")
+        
+        # Fall back to single-issue calls for anything the batch did not cover
+        retried = await asyncio.gather(*(
+            self.analyze_issue(issue) for issue, result in zip(issues, results) if result is None
+        ))
+        retried = iter(retried)
+        return [result or next(retried) for result in results]
@@ -8,44 +8,136 @@ class Config:
     # GitHub Configuration
     GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
     GITHUB_REPO = os.getenv("GITHUB_REPO")
+    GITHUB_REPOS = os.getenv("GITHUB_REPOS", "")  # Comma-separated repos and owner globs, e.g. "acme/api,acme/web-*" (overrides GITHUB_REPO)
     GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
     
     # OpenAI Configuration
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # Alternative OpenAI-compatible endpoint; unset = api.openai.com
     
     # Claude Configuration
     CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
     CLAUDE_API_URL = os.getenv("CLAUDE_API_URL", "https://api.clients.geai.globant.com/v1/messages")
     CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-3-sonnet-20240229")
+    PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"  # Mark the static prompt prefix cacheable
+    STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "true").lower() == "true"  # Provider-enforced JSON schema (Claude tool use, OpenAI response_format)
+    STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"  # Stream single-issue completions and parse them incrementally
+    REASONING_MAX_TOKENS = int(os.getenv("REASONING_MAX_TOKENS", "150"))  # Stop streaming once the reasoning exceeds this; 0 = no cap
+    ISSUE_TOKEN_BUDGET = int(os.getenv("ISSUE_TOKEN_BUDGET", "2000"))  # Compact issue bodies estimated above this many tokens; 0 = send verbatim
+    MAX_OUTPUT_TOKENS = int(os.getenv("MAX_OUTPUT_TOKENS", "0"))  # Per-request output token cap; 0 = the model's known limit
     
     # AI Engine Selection
-    AI_ENGINE = os.getenv("AI_ENGINE", "claude")  # "openai" or "claude"
+    AI_ENGINE = os.getenv("AI_ENGINE", "claude")  # "openai", "claude" or "cascade"
+    ENGINE_CASCADE = os.getenv("ENGINE_CASCADE", "openai:gpt-3.5-turbo@15,claude@60")  # engine[:model][@timeout_seconds], cheapest first
+    CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.7"))  # Results below this escalate to the next engine
+    CASCADE_STAGE_TIMEOUT = float(os.getenv("CASCADE_STAGE_TIMEOUT", "30"))  # Default per-stage timeout in seconds
+    
+    # Request Hedging Configuration
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"  # Re-send LLM requests that are slower than usual
+    HEDGE_ENGINE = os.getenv("HEDGE_ENGINE", "")  # Engine that receives the duplicate request; empty = the same engine
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "90"))  # Observed latency percentile after which a request is hedged
+    HEDGE_BUDGET_RATIO = float(os.getenv("HEDGE_BUDGET_RATIO", "0.1"))  # Max share of requests that may be hedged
+    HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "1.0"))  # Never hedge sooner than this many seconds
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))  # Latencies observed before hedging starts
     
     # Triage Configuration
     MAX_ISSUES_PER_RUN = int(os.getenv("MAX_ISSUES_PER_RUN", "50"))
+    RUN_TOKEN_BUDGET = int(os.getenv("RUN_TOKEN_BUDGET", "0"))  # LLM tokens (input + output) one run may spend across all repos; 0 = unlimited
+    ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))  # Concurrent LLM calls per run
+    ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "1"))  # Issues packed into one LLM request
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))  # Keep-alive pool size per host
     DRY_RUN_MODE = os.getenv("DRY_RUN_MODE", "true").lower() == "true"
     AUTO_ASSIGN_ENABLED = os.getenv("AUTO_ASSIGN_ENABLED", "true").lower() == "true"
     AUTO_LABEL_ENABLED = os.getenv("AUTO_LABEL_ENABLED", "true").lower() == "true"
     
+    # Incremental Triage Configuration
+    INCREMENTAL_MODE = os.getenv("INCREMENTAL_MODE", "false").lower() == "true"
+    STATE_FILE = os.getenv("STATE_FILE", ".triage_state.json")  # Per-repo high-water marks
+    
+    # Triage Result Cache Configuration
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_PATH = os.getenv("CACHE_PATH", ".triage_cache.sqlite3")
+    CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "604800"))  # 7 days; 0 disables expiry
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))  # 0 disables size eviction
+    
+    # Session Journal Configuration
+    SESSION_STORE_ENABLED = os.getenv("SESSION_STORE_ENABLED", "true").lower() == "true"
+    SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", ".triage_sessions.sqlite3")  # Analyses and actions of every session, for --resume
+    
+    # Duplicate Detection Configuration
+    DUPLICATE_DETECTION_ENABLED = os.getenv("DUPLICATE_DETECTION_ENABLED", "false").lower() == "true"  # Opt-in: labels near-duplicates and skips the AI for them
+    DUPLICATE_INDEX_PATH = os.getenv("DUPLICATE_INDEX_PATH", ".triage_duplicates.npz")
+    DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.9"))  # Cosine similarity needed to reuse a result
+    DUPLICATE_INDEX_DIMENSIONS = int(os.getenv("DUPLICATE_INDEX_DIMENSIONS", "2048"))  # Hashed TF-IDF vector size
+    DUPLICATE_EMBEDDING_MODEL = os.getenv("DUPLICATE_EMBEDDING_MODEL", "")  # Optional sentence-transformers model name
+    
+    # Local Pre-Classifier Configuration
+    LOCAL_TRIAGE_ENABLED = os.getenv("LOCAL_TRIAGE_ENABLED", "false").lower() == "true"  # Opt-in: answer obvious issues without calling the AI
+    LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_CONFIDENCE_THRESHOLD", "0.85"))  # Calibrated (held-out) accuracy needed to skip the AI
+    LOCAL_MIN_TRAINING_EXAMPLES = int(os.getenv("LOCAL_MIN_TRAINING_EXAMPLES", "50"))  # Journaled AI results needed before the model is used
+    LOCAL_RETRAIN_MINUTES = int(os.getenv("LOCAL_RETRAIN_MINUTES", "15"))  # Retrain on new journaled results at the first session after this long
+    
+    # Rate Limiting Configuration
+    RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+    RATE_LIMIT_BASE_DELAY = float(os.getenv("RATE_LIMIT_BASE_DELAY", "1.0"))  # Seconds; doubled per retry with jitter
+    RATE_LIMIT_MAX_DELAY = float(os.getenv("RATE_LIMIT_MAX_DELAY", "60.0"))
+    GITHUB_MAX_REQUESTS_PER_SECOND = float(os.getenv("GITHUB_MAX_REQUESTS_PER_SECOND", "0"))  # 0 paces from response headers only
+    LLM_MAX_REQUESTS_PER_SECOND = float(os.getenv("LLM_MAX_REQUESTS_PER_SECOND", "0"))
+    
+    # Webhook Server Configuration
+    GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+    WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8000"))
+    WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))  # Pending issues before new events are rejected with 503
+    
+    # Daemon Configuration
+    DAEMON_INTERVAL_MINUTES = int(os.getenv("DAEMON_INTERVAL_MINUTES", "15"))  # Time between incremental runs in --daemon mode
+    
+    # Metrics Configuration
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # Record Prometheus metrics (needs prometheus_client)
+    METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")  # .prom file written after CLI runs, e.g. for node_exporter's textfile collector
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # Port for the /metrics endpoint in --daemon mode (0 disables); --serve exposes /metrics on its own port
+    
+    # Profiling Configuration (python main.py --profile)
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")  # Where --profile writes its pstats file and report
+    PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "25"))  # Allocation sites and functions listed in the report
+    
     # Team Configuration
     TEAM_MEMBERS = os.getenv("TEAM_MEMBERS", "").split(",") if os.getenv("TEAM_MEMBERS") else []
     FRONTEND_TEAM = os.getenv("FRONTEND_TEAM", "").split(",") if os.getenv("FRONTEND_TEAM") else []
     BACKEND_TEAM = os.getenv("BACKEND_TEAM", "").split(",") if os.getenv("BACKEND_TEAM") else []
     INFRA_TEAM = os.getenv("INFRA_TEAM", "").split(",") if os.getenv("INFRA_TEAM") else []
     
+    @classmethod
+    def github_repo_patterns(cls):
+        """Repositories (or owner/name globs) listed in GITHUB_REPOS, else GITHUB_REPO"""
+        if cls.GITHUB_REPOS:
+            return [repo.strip() for repo in cls.GITHUB_REPOS.split(",") if repo.strip()]
+        return [cls.GITHUB_REPO] if cls.GITHUB_REPO else []
+    
+    @classmethod
+    def cascade_engines(cls):
+        """Engine names listed in ENGINE_CASCADE"""
+        return [stage.split("@")[0].split(":")[0].strip() for stage in cls.ENGINE_CASCADE.split(",") if stage.strip()]
+    
     @classmethod
     def validate(cls):
         """Validate required configuration"""
-        required_vars = ["GITHUB_TOKEN", "GITHUB_REPO"]
+        required_vars = ["GITHUB_TOKEN"] if cls.GITHUB_REPOS else ["GITHUB_TOKEN", "GITHUB_REPO"]
         
-        # Check AI engine specific requirements
-        if cls.AI_ENGINE == "openai":
-            required_vars.append("OPENAI_API_KEY")
-        elif cls.AI_ENGINE == "claude":
-            required_vars.append("CLAUDE_API_KEY")
-        else:
-            raise ValueError(f"Invalid AI_ENGINE value: {cls.AI_ENGINE}. Must be 'openai' or 'claude'")
+        # Check AI engine specific requirements (every engine of a cascade, and the hedge engine, needs its key)
+        engines = cls.cascade_engines() if cls.AI_ENGINE == "cascade" else [cls.AI_ENGINE]
+        if cls.HEDGE_ENABLED and cls.HEDGE_ENGINE:
+            engines.append(cls.HEDGE_ENGINE)
+        for engine in engines:
+            if engine == "openai":
+                required_vars.append("OPENAI_API_KEY")
+            elif engine == "claude":
+                required_vars.append("CLAUDE_API_KEY")
+            else:
+                raise ValueError(f"Invalid AI engine: {engine}. Must be 'openai', 'claude' or 'cascade'")
+        required_vars = list(dict.fromkeys(required_vars))
         
         missing_vars = [var for var in required_vars if not getattr(cls, var)]
         
@@ -0,0 +1,230 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from config import Config
+from models import GitHubIssue, TriageResult
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# sentence-transformers is optional (pip install sentence-transformers); without it
+# the index falls back to hashed TF-IDF vectors, which need no model download
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+MAX_BODY_CHARS = 4000
+
+class DuplicateMatch(NamedTuple):
+    key: str
+    issue_number: int
+    score: float
+    result: TriageResult
+
+def issue_text(issue: GitHubIssue) -> str:
+    """Text used to compare issues; the title is repeated so it outweighs long bodies"""
+    body = (issue.body or "")[:MAX_BODY_CHARS]
+    return f"{issue.title}\n{issue.title}\n{body}"
+
+class HashedTfidfEmbedder:
+    name = "hashed-tfidf"
+    uses_idf = True
+    
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+    
+    def _bucket(self, term: str) -> int:
+        # Python's hash() is salted per process, so use a stable digest
+        digest = hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.dimensions
+    
+    def embed(self, text: str) -> np.ndarray:
+        """Sublinear term frequencies of unigrams and bigrams, hashed into a fixed-size vector"""
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        terms = Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+        
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for term, count in terms.items():
+            vector[self._bucket(term)] += 1.0 + math.log(count)
+        return vector
+
+class SentenceTransformerEmbedder:
+    uses_idf = False
+    
+    def __init__(self, model_name: str):
+        self.name = f"sentence-transformers:{model_name}"
+        self.model = SentenceTransformer(model_name)
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+    
+    def embed(self, text: str) -> np.ndarray:
+        """Dense embedding from a local sentence-transformers model"""
+        return np.asarray(self.model.encode(text), dtype=np.float32)
+
+def _create_embedder():
+    """Use the configured local embedding model if available, else hashed TF-IDF"""
+    if Config.DUPLICATE_EMBEDDING_MODEL:
+        if SENTENCE_TRANSFORMERS_AVAILABLE:
+            return SentenceTransformerEmbedder(Config.DUPLICATE_EMBEDDING_MODEL)
+        logger.warning("sentence-transformers is not installed, falling back to hashed TF-IDF duplicate detection")
+    return HashedTfidfEmbedder(Config.DUPLICATE_INDEX_DIMENSIONS)
+
+class DuplicateIndex:
+    def __init__(self, path: str = None, threshold: float = None, embedder=None):
+        self.path = path or Config.DUPLICATE_INDEX_PATH
+        self.threshold = threshold if threshold is not None else Config.DUPLICATE_THRESHOLD
+        self.embedder = embedder or _create_embedder()
+        self.matches = 0
+        
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._results: List[str] = []
+        self._vectors = np.zeros((0, self.embedder.dimensions), dtype=np.float32)
+        self._pending: List[np.ndarray] = []  # New rows, appended to _vectors in one copy when next needed
+        self._doc_freq = np.zeros(self.embedder.dimensions, dtype=np.float32)
+        self._normalized: Optional[np.ndarray] = None  # Search matrix, rebuilt lazily after updates
+        self._row_repos: Optional[np.ndarray] = None  # Lowercased repository of each row, rebuilt with the search matrix
+        self._idf: Optional[np.ndarray] = None
+        self._load()
+    
+    @staticmethod
+    def make_key(repo: str, issue_number: int) -> str:
+        """Identify an issue across repositories"""
+        return f"{repo}#{issue_number}"
+    
+    def _load(self):
+        """Load the persisted index, starting empty if it is missing, unreadable or from another embedder"""
+        if not os.path.exists(self.path):
+            return
+        
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["embedder"]) != self.embedder.name or data["vectors"].shape[1] != self.embedder.dimensions:
+                    logger.warning(f"Duplicate index {self.path} was built with a different embedder, rebuilding it")
+                    return
+                self._keys = [str(key) for key in data["keys"]]
+                self._rows = {key: row for row, key in enumerate(self._keys)}
+                self._results = [str(result) for result in data["results"]]
+                self._vectors = data["vectors"].astype(np.float32)
+                self._doc_freq = data["doc_freq"].astype(np.float32)
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable duplicate index {self.path}: {e}")
+            return
+        
+        logger.info(f"Loaded duplicate index with {len(self._keys)} issues")
+    
+    def _flush_pending(self):
+        """Append rows added since the last search or save"""
+        if self._pending:
+            self._vectors = np.vstack([self._vectors, *self._pending])
+            self._pending = []
+    
+    def save(self):
+        """Persist the index atomically if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            
+            self._flush_pending()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".triage_duplicates.", suffix=".npz")
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    embedder=np.array(self.embedder.name),
+                    keys=np.array(self._keys, dtype=str),
+                    results=np.array(self._results, dtype=str),
+                    vectors=self._vectors,
+                    doc_freq=self._doc_freq
+                )
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        
+        logger.info(f"Saved duplicate index with {len(self._keys)} issues")
+    
+    def add(self, repo: str, issue: GitHubIssue, result: TriageResult):
+        """Index a triaged issue, replacing any earlier version of it"""
+        key = self.make_key(repo, issue.number)
+        vector = self.embedder.embed(issue_text(issue))
+        
+        with self._lock:
+            if key in self._rows:
+                self._flush_pending()
+                row = self._rows[key]
+                self._doc_freq -= self._vectors[row] > 0
+                self._vectors[row] = vector
+                self._results[row] = result.model_dump_json()
+            else:
+                self._rows[key] = len(self._keys)
+                self._keys.append(key)
+                self._results.append(result.model_dump_json())
+                self._pending.append(vector[np.newaxis, :])
+            self._doc_freq += vector > 0
+            self._normalized = None
+            self._dirty = True
+    
+    def _search_matrix(self):
+        """Return the (idf-weighted) row-normalized vectors and the idf weights"""
+        if self._normalized is None:
+            self._flush_pending()
+            if self.embedder.uses_idf:
+                self._idf = np.log((1.0 + len(self._keys)) / (1.0 + self._doc_freq)) + 1.0
+                weighted = self._vectors * self._idf
+            else:
+                self._idf = None
+                weighted = self._vectors
+            norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+            self._normalized = weighted / np.maximum(norms, 1e-12)
+            self._row_repos = np.array([key.rsplit("#", 1)[0].lower() for key in self._keys])
+        return self._normalized, self._idf
+    
+    def find_duplicate(self, repo: str, issue: GitHubIssue) -> Optional[DuplicateMatch]:
+        """Return the most similar indexed issue of the same repository if it is at least `threshold` similar"""
+        key = self.make_key(repo, issue.number)
+        vector = self.embedder.embed(issue_text(issue))
+        
+        with self._lock:
+            if not self._keys:
+                return None
+            
+            matrix, idf = self._search_matrix()
+            if idf is not None:
+                vector = vector * idf
+            norm = np.linalg.norm(vector)
+            if norm == 0:
+                return None
+            
+            scores = matrix @ (vector / norm)
+            
+            # Issue numbers, and the comment linking the original, only make sense within one repository
+            scores[self._row_repos != repo.lower()] = -1.0
+            
+            # An issue is not a duplicate of its own earlier version
+            if key in self._rows:
+                scores[self._rows[key]] = -1.0
+            
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold:
+                return None
+            
+            self.matches += 1
+            match_key, result = self._keys[best], self._results[best]
+        
+        return DuplicateMatch(
+            key=match_key,
+            issue_number=int(match_key.rsplit("#", 1)[1]),
+            score=score,
+            result=TriageResult.model_validate_json(result)
+        )
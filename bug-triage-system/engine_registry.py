@@ -0,0 +1,196 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from config import Config
+from hedged_engine import AsyncHedgedTriageEngine, CombinedUsage, HedgedTriageEngine
+from models import GitHubIssue, TriageResult
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Engine name -> (module, sync class, async class). Modules are imported on first
+# use, so selecting one provider never imports the other's SDK
+ENGINE_REGISTRY: Dict[str, Tuple[str, str, str]] = {
+    "claude": ("claude_triage_engine", "ClaudeTriageEngine", "AsyncClaudeTriageEngine"),
+    "openai": ("openai_triage_engine", "OpenAITriageEngine", "AsyncOpenAITriageEngine"),
+}
+
+def register_engine(name: str, module: str, sync_class: str, async_class: str):
+    """Make an engine available to AI_ENGINE and ENGINE_CASCADE (sync classes used as cascade stages get a `timeout` keyword)"""
+    ENGINE_REGISTRY[name] = (module, sync_class, async_class)
+
+def _engine_class(name: str, async_mode: bool):
+    """Import and return a registered engine class"""
+    if name not in ENGINE_REGISTRY:
+        raise ValueError(f"Unsupported AI engine: {name}. Must be one of: {', '.join(sorted(ENGINE_REGISTRY))} or 'cascade'")
+    
+    module_name, sync_class, async_class = ENGINE_REGISTRY[name]
+    module = importlib.import_module(module_name)
+    return getattr(module, async_class if async_mode else sync_class)
+
+class CascadeStage(NamedTuple):
+    engine: str
+    model: Optional[str]
+    timeout: float
+
+def parse_cascade(spec: str) -> List[CascadeStage]:
+    """Parse ENGINE_CASCADE, e.g. "openai:gpt-3.5-turbo@10,claude@60" (engine[:model][@timeout_seconds])"""
+    stages = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        
+        engine, _, timeout = part.partition("@")
+        engine, _, model = engine.partition(":")
+        stages.append(CascadeStage(
+            engine=engine.strip(),
+            model=model.strip() or None,
+            timeout=float(timeout) if timeout else Config.CASCADE_STAGE_TIMEOUT
+        ))
+    
+    if not stages:
+        raise ValueError("ENGINE_CASCADE must list at least one engine when AI_ENGINE=cascade")
+    return stages
+
+def create_engine(name: str = None, model: Optional[str] = None, async_mode: bool = False, hedged: bool = None, timeout: Optional[float] = None):
+    """Create the engine registered under `name` (AI_ENGINE by default), hedged if HEDGE_ENABLED.
+    
+    A `timeout` is passed to sync engines as their HTTP timeout; async callers
+    enforce theirs by cancelling the call instead.
+    """
+    name = name or Config.AI_ENGINE
+    if name == "cascade":
+        cascade_class = AsyncCascadingTriageEngine if async_mode else CascadingTriageEngine
+        return cascade_class(parse_cascade(Config.ENGINE_CASCADE))
+    
+    options = {}
+    if model:
+        options["model"] = model
+    if timeout and not async_mode:
+        options["timeout"] = timeout
+    engine = _engine_class(name, async_mode)(**options)
+    
+    if hedged is None:
+        hedged = Config.HEDGE_ENABLED
+    if hedged:
+        hedge = create_engine(Config.HEDGE_ENGINE, async_mode=async_mode, hedged=False, timeout=timeout) if Config.HEDGE_ENGINE and Config.HEDGE_ENGINE != name else None
+        hedged_class = AsyncHedgedTriageEngine if async_mode else HedgedTriageEngine
+        return hedged_class(engine, hedge)
+    return engine
+
+def close_engine(engine):
+    """Release an engine's worker threads, for engines that keep any"""
+    close = getattr(engine, "close", None)
+    if close:
+        close()
+
+class CascadingTriageEngine:
+    engine_name = "cascade"
+    async_mode = False
+    
+    def __init__(self, stages: List[CascadeStage], min_confidence: float = None):
+        self.stages = stages
+        self.min_confidence = min_confidence if min_confidence is not None else Config.CASCADE_MIN_CONFIDENCE
+        self.engines = [create_engine(stage.engine, stage.model, async_mode=self.async_mode, timeout=stage.timeout) for stage in stages]
+        self.model = " > ".join(f"{stage.engine}:{engine.model}" for stage, engine in zip(stages, self.engines))
+        self.usage = CombinedUsage(self.engines)
+        self.stage_answers = [0] * len(stages)  # Issues each stage had the final say on
+        logger.info(f"Using cascading AI engine: {self.model}")
+    
+    def close(self):
+        """Release the worker threads of every stage's engine"""
+        for engine in self.engines:
+            close_engine(engine)
+    
+    def _build_triage_prompt(self, issue: GitHubIssue) -> str:
+        """Build the prompt for AI triage analysis (every stage sends the same prompt)"""
+        return self.engines[0]._build_triage_prompt(issue)
+    
+    def _accept(self, result: Optional[TriageResult], is_last: bool) -> bool:
+        """Whether a stage's result is good enough to stop escalating"""
+        return result is not None and (is_last or result.confidence_score >= self.min_confidence)
+    
+    def _merge(self, stage_index: int, pending: List[int], stage_results: List[Optional[TriageResult]], results: List[Optional[TriageResult]]) -> List[int]:
+        """Keep each stage result that is good enough; returns the indices to escalate"""
+        is_last = stage_index == len(self.stages) - 1
+        escalate = []
+        for index, result in zip(pending, stage_results):
+            # A low-confidence answer still beats no answer if every later stage fails
+            if result is not None and (results[index] is None or result.confidence_score > results[index].confidence_score):
+                results[index] = result
+            if self._accept(result, is_last):
+                self.stage_answers[stage_index] += 1
+            else:
+                escalate.append(index)
+        return escalate
+    
+    def _log_stage(self, stage: CascadeStage, issue_count: int, escalated: int, elapsed: float):
+        """Log how many issues a stage passed on to the next one"""
+        if escalated:
+            logger.info(f"Cascade stage {stage.engine} escalated {escalated}/{issue_count} issues after {elapsed:.1f}s")
+    
+    def _run_stage(self, engine, stage: CascadeStage, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Run one stage; its engine's HTTP timeout is the stage timeout, and a timed-out or failed stage yields no results"""
+        try:
+            return engine.analyze_issues(issues)
+        except Exception as e:
+            logger.error(f"Cascade stage {stage.engine} failed for {len(issues)} issues: {e}")
+        return [None] * len(issues)
+    
+    def analyze_issues(self, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Try each stage in turn, escalating only the issues a stage failed or was unsure about"""
+        results: List[Optional[TriageResult]] = [None] * len(issues)
+        pending = list(range(len(issues)))
+        
+        for stage_index, (stage, engine) in enumerate(zip(self.stages, self.engines)):
+            if not pending:
+                break
+            
+            started = time.monotonic()
+            stage_results = self._run_stage(engine, stage, [issues[index] for index in pending])
+            escalate = self._merge(stage_index, pending, stage_results, results)
+            self._log_stage(stage, len(pending), len(escalate), time.monotonic() - started)
+            pending = escalate
+        
+        return results
+    
+    def analyze_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Analyze a single issue through the cascade"""
+        return self.analyze_issues([issue])[0]
+
+class AsyncCascadingTriageEngine(CascadingTriageEngine):
+    async_mode = True
+    
+    async def _run_stage(self, engine, stage: CascadeStage, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Run one stage under its timeout, cancelling it if it runs over"""
+        try:
+            return await asyncio.wait_for(engine.analyze_issues(issues), timeout=stage.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Cascade stage {stage.engine} exceeded its {stage.timeout:g}s timeout for {len(issues)} issues, escalating")
+        except Exception as e:
+            logger.error(f"Cascade stage {stage.engine} failed for {len(issues)} issues: {e}")
+        return [None] * len(issues)
+    
+    async def analyze_issues(self, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Try each stage in turn, escalating only the issues a stage failed or was unsure about"""
+        results: List[Optional[TriageResult]] = [None] * len(issues)
+        pending = list(range(len(issues)))
+        
+        for stage_index, (stage, engine) in enumerate(zip(self.stages, self.engines)):
+            if not pending:
+                break
+            
+            started = time.monotonic()
+            stage_results = await self._run_stage(engine, stage, [issues[index] for index in pending])
+            escalate = self._merge(stage_index, pending, stage_results, results)
+            self._log_stage(stage, len(pending), len(escalate), time.monotonic() - started)
+            pending = escalate
+        
+        return results
+    
+    async def analyze_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Analyze a single issue through the cascade"""
+        return (await self.analyze_issues([issue]))[0]
@@ -1,13 +1,33 @@
+import fnmatch
+import httpx
 import requests
 import json
-from typing import List, Optional
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from config import Config
+from http_client import get_async_client, get_session
+from metrics import record_github_write, time_stage
 from models import GitHubIssue, TriageAction
+from rate_limiter import get_rate_limiter
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# GitHub caps page size for the issues listing at 100
+GITHUB_MAX_PER_PAGE = 100
+
+def matches_repo(repo: str, patterns: List[str]) -> bool:
+    """Check a full repository name against GITHUB_REPOS entries (exact names or owner/name globs)"""
+    return any(fnmatch.fnmatchcase(repo.lower(), pattern.lower()) for pattern in patterns)
+
+def _merge_labels(issue_data: dict, labels: List[str]) -> List[str]:
+    """An issue's current labels (from a fresh GET) followed by the new ones it lacks"""
+    current_labels = [label["name"] for label in issue_data.get("labels", [])]
+    return current_labels + [label for label in labels if label not in current_labels]
+
 class GitHubAdapter:
     def __init__(self):
         self.token = Config.GITHUB_TOKEN
@@ -18,61 +38,171 @@ class GitHubAdapter:
             "Accept": "application/vnd.github.v3+json",
             "Content-Type": "application/json"
         }
+        self.session = get_session()
+        self.rate_limiter = get_rate_limiter("github")
+        
+        # GitHub's time of the last write to each (repo, issue number), so incremental runs can tell our own updates apart
+        self.written_at: Dict[Tuple[str, int], str] = {}
+        self._written_lock = threading.Lock()
     
-    def get_open_issues(self, limit: int = None) -> List[GitHubIssue]:
-        """Fetch open issues from GitHub repository"""
+    def _record_write(self, repo: Optional[str], issue_number: int, response):
+        """Remember when GitHub applied a write, from the response's Date header"""
         try:
-            url = f"{self.api_url}/repos/{self.repo}/issues"
-            params = {
-                "state": "open",
-                "per_page": limit or Config.MAX_ISSUES_PER_RUN,
-                "sort": "created",
-                "direction": "desc"
-            }
-            
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            issues_data = response.json()
-            issues = []
+            written_at = parsedate_to_datetime(response.headers["Date"]).strftime("%Y-%m-%dT%H:%M:%SZ")
+        except (KeyError, TypeError, ValueError):
+            return
+        
+        key = (repo or self.repo, issue_number)
+        with self._written_lock:
+            self.written_at[key] = max(written_at, self.written_at.get(key, ""))
+    
+    def _open_issues_params(self, limit: int, since: Optional[str] = None) -> dict:
+        """Query parameters for the first page of the open issues listing"""
+        params = {
+            "state": "open",
+            "per_page": min(limit, GITHUB_MAX_PER_PAGE),
+            "sort": "created",
+            "direction": "desc"
+        }
+        
+        # Incremental runs walk forward from the cursor in update order, so a
+        # run cut short by the limit can resume exactly where it stopped
+        if since:
+            params.update({"since": since, "sort": "updated", "direction": "asc"})
+        
+        return params
+    
+    def _parse_issues(self, issues_data: list, repo: Optional[str] = None) -> List[GitHubIssue]:
+        """Convert a GitHub issues API payload into GitHubIssue models"""
+        issues = []
+        
+        for issue_data in issues_data:
+            # Skip pull requests (they appear as issues in GitHub API)
+            if "pull_request" in issue_data:
+                continue
             
-            for issue_data in issues_data:
-                # Skip pull requests (they appear as issues in GitHub API)
-                if "pull_request" in issue_data:
-                    continue
+            issue = GitHubIssue(
+                number=issue_data["number"],
+                title=issue_data["title"],
+                body=issue_data.get("body", ""),
+                state=issue_data["state"],
+                labels=[label["name"] for label in issue_data.get("labels", [])],
+                assignee=issue_data["assignee"]["login"] if issue_data.get("assignee") else None,
+                created_at=issue_data["created_at"],
+                updated_at=issue_data["updated_at"],
+                html_url=issue_data["html_url"],
+                repo=repo or self.repo
+            )
+            issues.append(issue)
+        
+        return issues
+    
+    def iter_open_issues(self, limit: int = None, since: Optional[str] = None, repo: Optional[str] = None) -> Iterator[GitHubIssue]:
+        """Yield open issues as each page arrives, following Link: rel="next" lazily"""
+        limit = limit or Config.MAX_ISSUES_PER_RUN
+        repo = repo or self.repo
+        url = f"{self.api_url}/repos/{repo}/issues"
+        params = self._open_issues_params(limit, since)
+        fetched = 0
+        
+        try:
+            while url and fetched < limit:
+                with time_stage("fetch"):
+                    response = self.rate_limiter.send(
+                        lambda: self.session.get(url, headers=self.headers, params=params)
+                    )
+                response.raise_for_status()
                 
-                issue = GitHubIssue(
-                    number=issue_data["number"],
-                    title=issue_data["title"],
-                    body=issue_data.get("body", ""),
-                    state=issue_data["state"],
-                    labels=[label["name"] for label in issue_data.get("labels", [])],
-                    assignee=issue_data["assignee"]["login"] if issue_data.get("assignee") else None,
-                    created_at=issue_data["created_at"],
-                    updated_at=issue_data["updated_at"],
-                    html_url=issue_data["html_url"]
-                )
-                issues.append(issue)
+                for issue in self._parse_issues(response.json(), repo):
+                    if fetched >= limit:
+                        break
+                    fetched += 1
+                    yield issue
+                
+                # The next link already carries the full query string
+                url = response.links.get("next", {}).get("url")
+                params = None
+                
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching issues from {repo}: {e}")
+        
+        logger.info(f"Fetched {fetched} open issues from {repo}")
+    
+    def get_open_issues(self, limit: int = None) -> List[GitHubIssue]:
+        """Fetch open issues from GitHub repository"""
+        return list(self.iter_open_issues(limit))
+    
+    def _list_owner_repos(self, owner: str) -> List[str]:
+        """List the full names of an organization's (or user's) active repositories that have issues enabled"""
+        # Organizations and users list their repositories under different endpoints
+        for listing_url in (f"{self.api_url}/orgs/{owner}/repos", f"{self.api_url}/users/{owner}/repos"):
+            url = listing_url
+            params = {"per_page": GITHUB_MAX_PER_PAGE, "type": "all"}
+            repos = []
             
-            logger.info(f"Fetched {len(issues)} open issues from {self.repo}")
-            return issues
+            try:
+                while url:
+                    response = self.rate_limiter.send(
+                        lambda: self.session.get(url, headers=self.headers, params=params)
+                    )
+                    if response.status_code == 404:
+                        break
+                    response.raise_for_status()
+                    
+                    repos.extend(
+                        repo["full_name"] for repo in response.json()
+                        if repo.get("has_issues", True) and not repo.get("archived") and not repo.get("disabled")
+                    )
+                    url = response.links.get("next", {}).get("url")
+                    params = None
+                    
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error listing repositories of {owner}: {e}")
+                return []
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching issues: {e}")
-            return []
+            # url is only left set when the endpoint answered 404
+            if url is None:
+                return repos
+        
+        logger.error(f"No GitHub organization or user named {owner}")
+        return []
     
-    def add_labels(self, issue_number: int, labels: List[str], dry_run: bool = True) -> bool:
+    def resolve_repos(self, patterns: List[str]) -> List[str]:
+        """Expand GITHUB_REPOS entries into repository names; owner/name globs are matched against the owner's repositories"""
+        repos = []
+        owner_repos = {}
+        
+        for pattern in patterns:
+            if not any(char in pattern for char in "*?["):
+                repos.append(pattern)
+                continue
+            
+            owner = pattern.split("/", 1)[0]
+            if owner not in owner_repos:
+                owner_repos[owner] = self._list_owner_repos(owner)
+            matched = [repo for repo in owner_repos[owner] if matches_repo(repo, [pattern])]
+            logger.info(f"Repository pattern {pattern} matched {len(matched)} repositories")
+            repos.extend(matched)
+        
+        # A repository listed explicitly and matched by a glob is triaged once (GitHub names are case-insensitive)
+        unique = {}
+        for repo in repos:
+            unique.setdefault(repo.lower(), repo)
+        return list(unique.values())
+    
+    def add_labels(self, issue_number: int, labels: List[str], dry_run: bool = True, repo: Optional[str] = None) -> bool:
         """Add labels to an issue"""
         if dry_run:
             logger.info(f"[DRY RUN] Would add labels {labels} to issue #{issue_number}")
             return True
         
         try:
-            url = f"{self.api_url}/repos/{self.repo}/issues/{issue_number}/labels"
+            url = f"{self.api_url}/repos/{repo or self.repo}/issues/{issue_number}/labels"
             data = {"labels": labels}
             
-            response = requests.post(url, headers=self.headers, json=data)
+            response = self.rate_limiter.send(lambda: self.session.post(url, headers=self.headers, json=data))
             response.raise_for_status()
+            self._record_write(repo, issue_number, response)
             
             logger.info(f"Added labels {labels} to issue #{issue_number}")
             return True
@@ -81,18 +211,19 @@ class GitHubAdapter:
             logger.error(f"Error adding labels to issue #{issue_number}: {e}")
             return False
     
-    def assign_issue(self, issue_number: int, assignee: str, dry_run: bool = True) -> bool:
+    def assign_issue(self, issue_number: int, assignee: str, dry_run: bool = True, repo: Optional[str] = None) -> bool:
         """Assign an issue to a user"""
         if dry_run:
             logger.info(f"[DRY RUN] Would assign issue #{issue_number} to {assignee}")
             return True
         
         try:
-            url = f"{self.api_url}/repos/{self.repo}/issues/{issue_number}"
+            url = f"{self.api_url}/repos/{repo or self.repo}/issues/{issue_number}"
             data = {"assignees": [assignee]}
             
-            response = requests.patch(url, headers=self.headers, json=data)
+            response = self.rate_limiter.send(lambda: self.session.patch(url, headers=self.headers, json=data))
             response.raise_for_status()
+            self._record_write(repo, issue_number, response)
             
             logger.info(f"Assigned issue #{issue_number} to {assignee}")
             return True
@@ -101,18 +232,50 @@ class GitHubAdapter:
             logger.error(f"Error assigning issue #{issue_number} to {assignee}: {e}")
             return False
     
-    def add_comment(self, issue_number: int, comment: str, dry_run: bool = True) -> bool:
+    def update_issue(self, issue_number: int, labels: List[str], assignees: List[str], dry_run: bool = True, repo: Optional[str] = None) -> bool:
+        """Add labels and set assignees in a single write.
+        
+        PATCH replaces the whole label list, so the current labels are re-read
+        just before it; labels added since the issue was fetched are kept.
+        """
+        if dry_run:
+            logger.info(f"[DRY RUN] Would update issue #{issue_number} with labels {labels} and assignees {assignees}")
+            return True
+        
+        try:
+            url = f"{self.api_url}/repos/{repo or self.repo}/issues/{issue_number}"
+            response = self.rate_limiter.send(lambda: self.session.get(url, headers=self.headers))
+            response.raise_for_status()
+            data = {"labels": _merge_labels(response.json(), labels), "assignees": assignees}
+            
+            response = self.rate_limiter.send(lambda: self.session.patch(url, headers=self.headers, json=data))
+            response.raise_for_status()
+            self._record_write(repo, issue_number, response)
+            
+            logger.info(f"Updated issue #{issue_number} with labels {labels} and assignees {assignees}")
+            return True
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error updating issue #{issue_number}: {e}")
+            return False
+    
+    def add_comment(self, issue_number: int, comment: str, dry_run: bool = True, repo: Optional[str] = None) -> bool:
         """Add a comment to an issue"""
         if dry_run:
             logger.info(f"[DRY RUN] Would add comment to issue #{issue_number}: {comment[:100]}...")
             return True
         
         try:
-            url = f"{self.api_url}/repos/{self.repo}/issues/{issue_number}/comments"
+            url = f"{self.api_url}/repos/{repo or self.repo}/issues/{issue_number}/comments"
             data = {"body": comment}
             
-            response = requests.post(url, headers=self.headers, json=data)
+            # Comments are not idempotent, so only retry responses that were rejected outright
+            response = self.rate_limiter.send(
+                lambda: self.session.post(url, headers=self.headers, json=data),
+                idempotent=False
+            )
             response.raise_for_status()
+            self._record_write(repo, issue_number, response)
             
             logger.info(f"Added comment to issue #{issue_number}")
             return True
@@ -122,25 +285,191 @@ class GitHubAdapter:
             return False
     
     def execute_action(self, action: TriageAction) -> bool:
+        """Execute a triage action, recording its latency and outcome"""
+        start = time.perf_counter()
+        success = self._apply_action(action)
+        record_github_write(action.action_type, success, time.perf_counter() - start, action.dry_run)
+        return success
+    
+    def _apply_action(self, action: TriageAction) -> bool:
         """Execute a triage action"""
         try:
             if action.action_type == "label":
                 return self.add_labels(
                     action.issue_number,
                     action.action_data["labels"],
-                    action.dry_run
+                    action.dry_run,
+                    repo=action.repo or None
                 )
             elif action.action_type == "assign":
                 return self.assign_issue(
                     action.issue_number,
                     action.action_data["assignee"],
-                    action.dry_run
+                    action.dry_run,
+                    repo=action.repo or None
+                )
+            elif action.action_type == "update":
+                return self.update_issue(
+                    action.issue_number,
+                    action.action_data["labels"],
+                    action.action_data["assignees"],
+                    action.dry_run,
+                    repo=action.repo or None
                 )
             elif action.action_type == "comment":
                 return self.add_comment(
                     action.issue_number,
                     action.action_data["comment"],
-                    action.dry_run
+                    action.dry_run,
+                    repo=action.repo or None
+                )
+            else:
+                logger.error(f"Unknown action type: {action.action_type}")
+                return False
+                
+        except Exception as e:
+            logger.error(f"Error executing action {action.action_type} for issue #{action.issue_number}: {e}")
+            return False
+
+
+class AsyncGitHubAdapter(GitHubAdapter):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        super().__init__()
+        self.client = client or get_async_client()
+    
+    async def iter_open_issues(self, limit: int = None, since: Optional[str] = None, repo: Optional[str] = None) -> AsyncIterator[GitHubIssue]:
+        """Yield open issues as each page arrives, following Link: rel="next" lazily"""
+        limit = limit or Config.MAX_ISSUES_PER_RUN
+        repo = repo or self.repo
+        url = f"{self.api_url}/repos/{repo}/issues"
+        params = self._open_issues_params(limit, since)
+        fetched = 0
+        
+        try:
+            while url and fetched < limit:
+                with time_stage("fetch"):
+                    response = await self.rate_limiter.send_async(
+                        lambda: self.client.get(url, headers=self.headers, params=params)
+                    )
+                response.raise_for_status()
+                
+                for issue in self._parse_issues(response.json(), repo):
+                    if fetched >= limit:
+                        break
+                    fetched += 1
+                    yield issue
+                
+                url = response.links.get("next", {}).get("url")
+                params = None
+                
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching issues from {repo}: {e}")
+        
+        logger.info(f"Fetched {fetched} open issues from {repo}")
+    
+    async def get_open_issues(self, limit: int = None) -> List[GitHubIssue]:
+        """Fetch open issues from GitHub repository"""
+        return [issue async for issue in self.iter_open_issues(limit)]
+    
+    async def _send(self, method: str, url: str, data: dict, description: str, repo: Optional[str], issue_number: int, idempotent: bool = True) -> bool:
+        """Send a write request to GitHub, logging failures"""
+        try:
+            response = await self.rate_limiter.send_async(
+                lambda: self.client.request(method, url, headers=self.headers, json=data),
+                idempotent=idempotent
+            )
+            response.raise_for_status()
+            self._record_write(repo, issue_number, response)
+            
+            logger.info(description)
+            return True
+            
+        except httpx.HTTPError as e:
+            logger.error(f"Error sending '{description}' request: {e}")
+            return False
+    
+    async def add_labels(self, issue_number: int, labels: List[str], dry_run: bool = True, repo: Optional[str] = None) -> bool:
+        """Add labels to an issue"""
+        if dry_run:
+            logger.info(f"[DRY RUN] Would add labels {labels} to issue #{issue_number}")
+            return True
+        
+        url = f"{self.api_url}/repos/{repo or self.repo}/issues/{issue_number}/labels"
+        return await self._send("POST", url, {"labels": labels}, f"Added labels {labels} to issue #{issue_number}", repo, issue_number)
+    
+    async def assign_issue(self, issue_number: int, assignee: str, dry_run: bool = True, repo: Optional[str] = None) -> bool:
+        """Assign an issue to a user"""
+        if dry_run:
+            logger.info(f"[DRY RUN] Would assign issue #{issue_number} to {assignee}")
+            return True
+        
+        url = f"{self.api_url}/repos/{repo or self.repo}/issues/{issue_number}"
+        return await self._send("PATCH", url, {"assignees": [assignee]}, f"Assigned issue #{issue_number} to {assignee}", repo, issue_number)
+    
+    async def update_issue(self, issue_number: int, labels: List[str], assignees: List[str], dry_run: bool = True, repo: Optional[str] = None) -> bool:
+        """Add labels and set assignees in a single write, re-reading the current labels just before the PATCH"""
+        if dry_run:
+            logger.info(f"[DRY RUN] Would update issue #{issue_number} with labels {labels} and assignees {assignees}")
+            return True
+        
+        url = f"{self.api_url}/repos/{repo or self.repo}/issues/{issue_number}"
+        try:
+            response = await self.rate_limiter.send_async(lambda: self.client.get(url, headers=self.headers))
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.error(f"Error reading the labels of issue #{issue_number}: {e}")
+            return False
+        
+        data = {"labels": _merge_labels(response.json(), labels), "assignees": assignees}
+        return await self._send("PATCH", url, data, f"Updated issue #{issue_number} with labels {labels} and assignees {assignees}", repo, issue_number)
+    
+    async def add_comment(self, issue_number: int, comment: str, dry_run: bool = True, repo: Optional[str] = None) -> bool:
+        """Add a comment to an issue"""
+        if dry_run:
+            logger.info(f"[DRY RUN] Would add comment to issue #{issue_number}: {comment[:100]}...")
+            return True
+        
+        url = f"{self.api_url}/repos/{repo or self.repo}/issues/{issue_number}/comments"
+        return await self._send("POST", url, {"body": comment}, f"Added comment to issue #{issue_number}", repo, issue_number, idempotent=False)
+    
+    async def execute_action(self, action: TriageAction) -> bool:
+        """Execute a triage action, recording its latency and outcome"""
+        start = time.perf_counter()
+        success = await self._apply_action(action)
+        record_github_write(action.action_type, success, time.perf_counter() - start, action.dry_run)
+        return success
+    
+    async def _apply_action(self, action: TriageAction) -> bool:
+        """Execute a triage action"""
+        try:
+            if action.action_type == "label":
+                return await self.add_labels(
+                    action.issue_number,
+                    action.action_data["labels"],
+                    action.dry_run,
+                    repo=action.repo or None
+                )
+            elif action.action_type == "assign":
+                return await self.assign_issue(
+                    action.issue_number,
+                    action.action_data["assignee"],
+                    action.dry_run,
+                    repo=action.repo or None
+                )
+            elif action.action_type == "update":
+                return await self.update_issue(
+                    action.issue_number,
+                    action.action_data["labels"],
+                    action.action_data["assignees"],
+                    action.dry_run,
+                    repo=action.repo or None
+                )
+            elif action.action_type == "comment":
+                return await self.add_comment(
+                    action.issue_number,
+                    action.action_data["comment"],
+                    action.dry_run,
+                    repo=action.repo or None
                 )
             else:
                 logger.error(f"Unknown action type: {action.action_type}")
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Deque, Dict, List, Optional
+from config import Config
+from models import GitHubIssue, TokenUsage, TriageResult
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Recent latencies kept per request size; fewer than HEDGE_MIN_SAMPLES means no hedging yet
+LATENCY_WINDOW = 200
+
+class CombinedUsage:
+    def __init__(self, engines: list):
+        # The same engine may appear twice (e.g. hedging to itself); count it once
+        self.engines = list({id(engine): engine for engine in engines}.values())
+    
+    def pop(self) -> TokenUsage:
+        """Return the usage of every engine combined and start counting from zero"""
+        total = TokenUsage()
+        for engine in self.engines:
+            usage = engine.usage.pop()
+            for field in TokenUsage.model_fields:
+                value = getattr(usage, field)
+                if isinstance(value, dict):
+                    counts = getattr(total, field)
+                    for key, count in value.items():
+                        counts[key] = counts.get(key, 0) + count
+                else:
+                    setattr(total, field, getattr(total, field) + value)
+        return total
+    
+    def total_tokens(self) -> int:
+        """Return the input and output tokens every engine has used so far"""
+        return sum(engine.usage.total_tokens() for engine in self.engines)
+
+class AnsweredResults(list):
+    def __init__(self, results: List[Optional[TriageResult]], engine):
+        super().__init__(results)
+        # The engine that produced these results, so they are cached under its key
+        self.engine = engine
+
+def _answered(results: List[Optional[TriageResult]]) -> int:
+    """Count the issues an attempt returned a result for"""
+    return sum(1 for result in results if result)
+
+class HedgedTriageEngine:
+    def __init__(self, primary, hedge=None):
+        self.primary = primary
+        self.hedge = hedge or primary
+        self.engine_name = primary.engine_name
+        self.model = primary.model
+        self.usage = CombinedUsage([self.primary, self.hedge])
+        self.answering_engines = self.usage.engines
+        
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.losers_in_flight = 0  # Beaten requests still running, and billing, in the background
+        self._latencies: Dict[int, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(4, Config.ANALYSIS_WORKERS * 2), thread_name_prefix="triage-hedge")
+    
+    def _build_triage_prompt(self, issue: GitHubIssue) -> str:
+        """Build the prompt for AI triage analysis"""
+        return self.primary._build_triage_prompt(issue)
+    
+    def _record_latency(self, issue_count: int, elapsed: float):
+        """Remember how long a request of this size took"""
+        with self._lock:
+            self._latencies.setdefault(issue_count, deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+    
+    def hedge_delay(self, issue_count: int) -> Optional[float]:
+        """Observed latency percentile for a request size, or None until there is enough history"""
+        with self._lock:
+            samples = sorted(self._latencies.get(issue_count, ()))
+        if len(samples) < Config.HEDGE_MIN_SAMPLES:
+            return None
+        
+        index = min(len(samples) - 1, int(len(samples) * Config.HEDGE_PERCENTILE / 100))
+        return max(Config.HEDGE_MIN_DELAY, samples[index])
+    
+    def _start_request(self, issue_count: int) -> Optional[float]:
+        """Count a request and return its hedge delay (None if it must not be hedged)"""
+        with self._lock:
+            self.requests += 1
+        return self.hedge_delay(issue_count)
+    
+    def _take_hedge_budget(self) -> bool:
+        """Reserve a hedge if fewer than HEDGE_BUDGET_RATIO of requests have been hedged, counting losers still running"""
+        with self._lock:
+            if self.hedges_sent + self.losers_in_flight + 1 > self.requests * Config.HEDGE_BUDGET_RATIO:
+                return False
+            self.hedges_sent += 1
+            return True
+    
+    def _abandon(self, loser):
+        """Cancel a beaten request, or count it against the hedge budget until it finishes if it already started"""
+        if loser.cancel():
+            return
+        with self._lock:
+            self.losers_in_flight += 1
+        loser.add_done_callback(self._loser_finished)
+    
+    def _loser_finished(self, loser):
+        """Release the hedge budget held by a beaten request"""
+        with self._lock:
+            self.losers_in_flight -= 1
+    
+    def close(self):
+        """Stop the hedging threads; requests already running finish in the background"""
+        self._executor.shutdown(wait=False)
+    
+    def _timed(self, engine, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Call an engine and record its latency"""
+        started = time.monotonic()
+        results = engine.analyze_issues(issues)
+        self._record_latency(len(issues), time.monotonic() - started)
+        return results
+    
+    def analyze_issues(self, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Analyze issues, sending a duplicate request if the first is slower than usual.
+        
+        The first attempt to answer every issue wins outright; results are never
+        mixed across engines. If neither attempt is complete, the one that
+        answered more issues is returned.
+        """
+        delay = self._start_request(len(issues))
+        primary = self._executor.submit(self._timed, self.primary, issues)
+        if delay is None:
+            return AnsweredResults(primary.result(), self.primary)
+        
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_hedge_budget():
+            return AnsweredResults(primary.result(), self.primary)
+        
+        logger.info(f"Request for {len(issues)} issues exceeded {delay:.1f}s, hedging to {self.hedge.engine_name}")
+        hedge = self._executor.submit(self._timed, self.hedge, issues)
+        engines = {primary: self.primary, hedge: self.hedge}
+        pending = {primary, hedge}
+        best = AnsweredResults([None] * len(issues), self.primary)
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    results = AnsweredResults(future.result(), engines[future])
+                except Exception as e:
+                    logger.error(f"Hedged request for {len(issues)} issues failed: {e}")
+                    continue
+                
+                if all(results):
+                    if future is hedge:
+                        with self._lock:
+                            self.hedges_won += 1
+                    # A request already on the wire cannot be interrupted; it keeps billing until it finishes
+                    for loser in pending:
+                        self._abandon(loser)
+                    return results
+                if _answered(results) > _answered(best):
+                    best = results
+        
+        return best
+    
+    def analyze_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Analyze a single issue with hedging"""
+        return self.analyze_issues([issue])[0]
+
+class AsyncHedgedTriageEngine(HedgedTriageEngine):
+    async def _timed(self, engine, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Call an engine and record its latency"""
+        started = time.monotonic()
+        results = await engine.analyze_issues(issues)
+        self._record_latency(len(issues), time.monotonic() - started)
+        return results
+    
+    async def analyze_issues(self, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Analyze issues, sending a duplicate request if the first is slower than usual"""
+        delay = self._start_request(len(issues))
+        primary = asyncio.ensure_future(self._timed(self.primary, issues))
+        if delay is None:
+            return AnsweredResults(await primary, self.primary)
+        
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if done or not self._take_hedge_budget():
+            return AnsweredResults(await primary, self.primary)
+        
+        logger.info(f"Request for {len(issues)} issues exceeded {delay:.1f}s, hedging to {self.hedge.engine_name}")
+        hedge = asyncio.ensure_future(self._timed(self.hedge, issues))
+        engines = {primary: self.primary, hedge: self.hedge}
+        pending = {primary, hedge}
+        best = AnsweredResults([None] * len(issues), self.primary)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        results = AnsweredResults(task.result(), engines[task])
+                    except Exception as e:
+                        logger.error(f"Hedged request for {len(issues)} issues failed: {e}")
+                        continue
+                    
+                    if all(results):
+                        if task is hedge:
+                            with self._lock:
+                                self.hedges_won += 1
+                        return results
+                    if _answered(results) > _answered(best):
+                        best = results
+        finally:
+            # Cancelling the slower request closes its connection
+            for task in pending:
+                task.cancel()
+        
+        return best
+    
+    async def analyze_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Analyze a single issue with hedging"""
+        return (await self.analyze_issues([issue]))[0]
@@ -0,0 +1,65 @@
+import logging
+import threading
+from typing import Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# HTTP/2 is only available when the optional "h2" package is installed (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide keep-alive session used by the synchronous adapters"""
+    global _session
+    
+    with _session_lock:
+        if _session is None:
+            adapter = HTTPAdapter(
+                pool_connections=Config.HTTP_MAX_CONNECTIONS,
+                pool_maxsize=Config.HTTP_MAX_CONNECTIONS
+            )
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the keep-alive connection pool shared by the async adapters and engines"""
+    global _async_client
+    
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=Config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.HTTP_MAX_CONNECTIONS
+            ),
+            timeout=httpx.Timeout(30.0)
+        )
+        logger.debug(f"Created async HTTP pool (http2={HTTP2_AVAILABLE}, max_connections={Config.HTTP_MAX_CONNECTIONS})")
+    return _async_client
+
+
+async def close_async_client():
+    """Close the shared async pool (it is bound to the event loop that created it)"""
+    global _async_client
+    
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
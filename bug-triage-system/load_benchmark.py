@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Offline load benchmark for the triage pipeline
+Drives TriageOrchestrator end to end against local GitHub and LLM stand-in servers
+"""
+
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Dict, List, Tuple
+from config import Config
+from rate_limiter import get_rate_limiter
+from stub_servers import FaultProfile, GitHubStubServer, LatencyProfile, LLMStubServer, generate_corpus
+from triage_orchestrator import TriageOrchestrator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BENCHMARK_REPO = "bench/movie-booking"
+
+# Pipeline stages reported per run, in pipeline order
+STAGES = ("fetch", "analyze", "llm", "write")
+
+# Set while an issue's actions are being written, so GitHub requests made then count as writes, not fetches
+_writing = contextvars.ContextVar("writing", default=False)
+
+def _percentile(samples: List[float], percent: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+class StageTimer:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+    
+    def record(self, stage: str, seconds: float):
+        """Add one latency sample to a stage"""
+        with self._lock:
+            self.samples[stage].append(seconds)
+    
+    def wrap(self, stage: str, func, writing: bool = False):
+        """Time every call of a synchronous function"""
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            token = _writing.set(True) if writing else None
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+                if token:
+                    _writing.reset(token)
+        return timed
+    
+    def wrap_async(self, stage: str, func, writing: bool = False):
+        """Time every call of a coroutine function"""
+        @functools.wraps(func)
+        async def timed(*args, **kwargs):
+            token = _writing.set(True) if writing else None
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+                if token:
+                    _writing.reset(token)
+        return timed
+    
+    def percentiles(self, stage: str) -> Tuple[int, float, float, float]:
+        """Sample count and p50/p95/p99 of a stage, in seconds"""
+        with self._lock:
+            samples = sorted(self.samples[stage])
+        return len(samples), _percentile(samples, 50), _percentile(samples, 95), _percentile(samples, 99)
+
+def _instrument(orchestrator, timer: StageTimer, use_async: bool):
+    """Time the orchestrator's stages: page fetches, analysis batches, LLM calls and per-issue writes.
+    
+    Returns a function that takes the shared GitHub limiter's timing back off.
+    """
+    github = get_rate_limiter("github")
+    send, send_async = github.send, github.send_async
+    timed_send, timed_send_async = timer.wrap("fetch", send), timer.wrap_async("fetch", send_async)
+    
+    def github_send(*args, **kwargs):
+        return (send if _writing.get() else timed_send)(*args, **kwargs)
+    
+    async def github_send_async(*args, **kwargs):
+        return await (send_async if _writing.get() else timed_send_async)(*args, **kwargs)
+    
+    def restore():
+        del github.send, github.send_async
+    
+    github.send, github.send_async = github_send, github_send_async
+    
+    if use_async:
+        create_async_engine = orchestrator._create_async_engine
+        
+        def create_timed_engine():
+            engine = create_async_engine()
+            engine.analyze_issues = timer.wrap_async("llm", engine.analyze_issues)
+            return engine
+        
+        orchestrator._create_async_engine = create_timed_engine
+        orchestrator._process_issues_async = timer.wrap_async("analyze", orchestrator._process_issues_async)
+        orchestrator._execute_actions_async = timer.wrap_async("write", orchestrator._execute_actions_async, writing=True)
+    else:
+        orchestrator.ai_engine.analyze_issues = timer.wrap("llm", orchestrator.ai_engine.analyze_issues)
+        orchestrator._process_issues = timer.wrap("analyze", orchestrator._process_issues)
+        orchestrator._execute_actions = timer.wrap("write", orchestrator._execute_actions, writing=True)
+    
+    return restore
+
+def _serve_stubs(args, connection):
+    """Run both stand-in servers in a child process, so they do not compete with the benchmark for the GIL"""
+    logging.getLogger().setLevel(logging.WARNING)
+    faults = FaultProfile(args.error_rate, args.throttle_rate, args.retry_after)
+    corpus = generate_corpus(args.issues, repo=BENCHMARK_REPO, seed=args.seed)
+    github = GitHubStubServer(corpus, LatencyProfile(args.github_latency, args.github_p99), faults).start()
+    llm = LLMStubServer(LatencyProfile(args.llm_latency, args.llm_p99), faults).start()
+    connection.send((github.url, llm.url))
+    
+    # Serve until the benchmark terminates this process
+    threading.Event().wait()
+
+def _stub_stats(url: str) -> dict:
+    """Request counters of a stand-in server"""
+    try:
+        with urllib.request.urlopen(f"{url}/_stub/stats", timeout=5) as response:
+            return json.loads(response.read())
+    except OSError as e:
+        logger.warning(f"Could not read stub stats from {url}: {e}")
+        return {}
+
+def _reset_stub(url: str):
+    """Undo the previous run's writes, so every level triages the same open issues"""
+    try:
+        request = urllib.request.Request(f"{url}/_stub/reset", data=b"{}", method="POST")
+        with urllib.request.urlopen(request, timeout=5):
+            pass
+    except OSError as e:
+        logger.warning(f"Could not reset stub at {url}: {e}")
+
+def _configure(args, github_url: str, llm_url: str, state_dir: str):
+    """Point the system at the stand-in servers and switch off everything that would skip work between runs"""
+    Config.GITHUB_TOKEN = "benchmark"
+    Config.GITHUB_REPO = BENCHMARK_REPO
+    Config.GITHUB_REPOS = ""
+    Config.GITHUB_API_URL = github_url
+    Config.CLAUDE_API_KEY = "benchmark"
+    Config.CLAUDE_API_URL = f"{llm_url}/v1/messages"
+    Config.OPENAI_API_KEY = "benchmark"
+    Config.OPENAI_BASE_URL = f"{llm_url}/v1"
+    Config.OPENAI_MODEL = "gpt-4o"
+    Config.AI_ENGINE = args.engine
+    Config.ANALYSIS_BATCH_SIZE = args.batch_size
+    Config.MAX_ISSUES_PER_RUN = args.issues
+    Config.DRY_RUN_MODE = args.dry_run
+    Config.STREAM_RESPONSES = not args.no_stream
+    
+    # Every run must do the same work: no cache hits, duplicates, local answers or journal reuse
+    Config.CACHE_ENABLED = False
+    Config.DUPLICATE_DETECTION_ENABLED = False
+    Config.LOCAL_TRIAGE_ENABLED = False
+    Config.SESSION_STORE_ENABLED = False
+    Config.STATE_FILE = os.path.join(state_dir, "state.json")
+    
+    # Retry quickly; the stubs' Retry-After still applies to throttled requests
+    Config.RATE_LIMIT_BASE_DELAY = args.retry_delay
+
+def run_level(args, workers: int, limiter_counts: Dict[str, Tuple[int, int]]) -> dict:
+    """Run one triage session with `workers` concurrent analyzers and writers and return its measurements"""
+    Config.ANALYSIS_WORKERS = workers
+    orchestrator = TriageOrchestrator()
+    timer = StageTimer()
+    restore = _instrument(orchestrator, timer, args.use_async)
+    
+    started = time.perf_counter()
+    try:
+        if args.use_async:
+            session = asyncio.run(orchestrator.run_triage_session_async(limit=args.issues))
+        else:
+            session = orchestrator.run_triage_session(limit=args.issues)
+    finally:
+        restore()
+    elapsed = time.perf_counter() - started
+    
+    # Limiters are process-wide, so report what changed during this run
+    retries = {}
+    for name in ("github", args.engine):
+        limiter = get_rate_limiter(name)
+        before = limiter_counts.get(name, (0, 0))
+        retries[name] = (limiter.retries - before[0], limiter.throttled - before[1])
+        limiter_counts[name] = (limiter.retries, limiter.throttled)
+    
+    return {
+        "workers": workers,
+        "issues": session.issues_processed,
+        "errors": len(session.errors),
+        "seconds": elapsed,
+        "rate": session.issues_processed / elapsed if elapsed else 0.0,
+        "stages": {stage: timer.percentiles(stage) for stage in STAGES},
+        "retries": retries,
+    }
+
+def print_report(results: List[dict]):
+    """Print throughput and stage latency per concurrency level, then how throughput scaled"""
+    print("\nThroughput")
+    print(f"{'workers':>8} {'issues':>8} {'errors':>7} {'seconds':>9} {'issues/s':>9}  retries (throttled)")
+    for result in results:
+        retries = ", ".join(f"{name} {count} ({throttled})" for name, (count, throttled) in result["retries"].items())
+        print(f"{result['workers']:>8} {result['issues']:>8} {result['errors']:>7} {result['seconds']:>9.2f} {result['rate']:>9.1f}  {retries}")
+    
+    print("\nStage latency in ms (p50 / p95 / p99)")
+    print(f"{'workers':>8}" + "".join(f" {stage:>24}" for stage in STAGES))
+    for result in results:
+        cells = []
+        for stage in STAGES:
+            count, p50, p95, p99 = result["stages"][stage]
+            cells.append(f"{p50 * 1000:.0f} / {p95 * 1000:.0f} / {p99 * 1000:.0f}" if count else "-")
+        print(f"{result['workers']:>8}" + "".join(f" {cell:>24}" for cell in cells))
+    
+    baseline = results[0]
+    print("\nScaling")
+    for result in results:
+        speedup = result["rate"] / baseline["rate"] if baseline["rate"] else 0.0
+        efficiency = speedup / (result["workers"] / baseline["workers"])
+        print(f"{result['workers']:>8} workers: {speedup:.2f}x the throughput of {baseline['workers']} ({efficiency:.0%} scaling efficiency)")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the triage pipeline against local GitHub and LLM stand-in servers",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python load_benchmark.py                                 # 10,000 issues at 1, 4, 16 and 64 workers
+  python load_benchmark.py --issues 2000 --concurrency 8,32 --async
+  python load_benchmark.py --llm-latency 0.8 --llm-p99 4 --throttle-rate 0.02 --error-rate 0.01
+  python load_benchmark.py --engine openai --batch-size 10
+        """
+    )
+    
+    parser.add_argument('--issues', type=int, default=10000, help='Size of the synthetic corpus, all triaged in each run (default: 10000)')
+    parser.add_argument('--concurrency', default="1,4,16,64", help='Comma-separated worker counts to sweep (default: 1,4,16,64)')
+    parser.add_argument('--engine', choices=["claude", "openai"], default="claude", help='AI engine to drive (default: claude)')
+    parser.add_argument('--batch-size', type=int, default=1, help='Issues per LLM request (default: 1)')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='Use the asyncio pipeline instead of threads')
+    parser.add_argument('--no-stream', action='store_true', help='Request whole completions instead of streaming them')
+    parser.add_argument('--dry-run', action='store_true', help='Skip GitHub writes (by default they go to the stub)')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='Median LLM response time in seconds (default: 0.5)')
+    parser.add_argument('--llm-p99', type=float, default=2.0, help='99th percentile LLM response time in seconds (default: 2.0)')
+    parser.add_argument('--github-latency', type=float, default=0.03, help='Median GitHub response time in seconds (default: 0.03)')
+    parser.add_argument('--github-p99', type=float, default=0.2, help='99th percentile GitHub response time in seconds (default: 0.2)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 502 (default: 0)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of requests answered with 429 (default: 0)')
+    parser.add_argument('--retry-after', type=float, default=0.5, help='Retry-After seconds sent with each 429 (default: 0.5)')
+    parser.add_argument('--retry-delay', type=float, default=0.1, help='Base backoff for retried 5xx responses (default: 0.1)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the corpus (default: 0)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Keep the per-issue INFO logs')
+    
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    
+    try:
+        levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    except ValueError:
+        logger.error(f"--concurrency must be a comma-separated list of worker counts, got {args.concurrency!r}")
+        return 1
+    if not levels or min(levels) < 1 or args.issues < 1 or args.batch_size < 1:
+        logger.error("--issues, --batch-size and every --concurrency level must be at least 1")
+        return 1
+    
+    connection, child_connection = multiprocessing.Pipe()
+    stubs = multiprocessing.Process(target=_serve_stubs, args=(args, child_connection), name="stub-servers", daemon=True)
+    stubs.start()
+    github_url, llm_url = connection.recv()
+    
+    print(f"Benchmarking {args.issues} issues with {args.engine}{' (async)' if args.use_async else ''}, batch size {args.batch_size}")
+    print(f"GitHub stub {github_url}, LLM stub {llm_url}")
+    
+    results = []
+    limiter_counts: Dict[str, Tuple[int, int]] = {}
+    try:
+        with tempfile.TemporaryDirectory() as state_dir:
+            _configure(args, github_url, llm_url, state_dir)
+            for workers in levels:
+                _reset_stub(github_url)
+                result = run_level(args, workers, limiter_counts)
+                results.append(result)
+                print(f"  {workers} workers: {result['issues']} issues in {result['seconds']:.1f}s ({result['rate']:.1f}/s)")
+    except KeyboardInterrupt:
+        print("\nInterrupted")
+    
+    if results:
+        print_report(results)
+        print(f"\nStub traffic: GitHub {_stub_stats(github_url)}, LLM {_stub_stats(llm_url)}")
+    
+    stubs.terminate()
+    stubs.join()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+import numpy as np
+from config import Config
+from duplicate_index import HashedTfidfEmbedder, issue_text
+from models import GitHubIssue, TriageResult, Priority, Component
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Words that describe a malfunction; a title using them is not a docs-only change
+BUG_PATTERN = re.compile(r"\b(bugs?|crash\w*|errors?|exceptions?|throws?|fail\w*|broken|\w+error)\b")
+
+# (title pattern, veto pattern or None, priority, component, labels, confidence, description)
+TITLE_RULES = [
+    (re.compile(r"^(bump|update|upgrade) \S+ (from|to) \S+|\bdependabot\b|^(chore|build)\(deps"), None, Priority.P3, Component.INFRA, ["dependencies"], 0.95, "dependency bump"),
+    (re.compile(r"^(docs?(\(.*\))?:|\[docs?\])|^(fix(es|ed)? )?typos?\b|\b(typo|spelling (mistake|error)) in\b|^(update|improve|clarify|add|fix)( the)? (readme|docs|documentation)\b|\b(missing|outdated|unclear) (docs|documentation)\b"), BUG_PATTERN, Priority.P3, Component.DOCS, ["documentation"], 0.9, "documentation change"),
+    (re.compile(r"^(\[?feature( request)?\]?:?|\[?enhancement\]?:|feat(\(.*\))?:)"), None, Priority.P3, Component.UNKNOWN, ["enhancement"], 0.9, "feature request"),
+    (re.compile(r"^(\[?question\]?:|how (do|can|to)\b)"), None, Priority.P3, Component.UNKNOWN, ["question"], 0.85, "question"),
+    (re.compile(r"\bflaky\b|\b(unit|integration|e2e) tests? (fail|broken)"), None, Priority.P2, Component.TESTING, ["testing"], 0.85, "test failure"),
+]
+
+# Keywords that must never be short-circuited to a low priority by the rules
+URGENT_PATTERN = re.compile(r"\b(security|vulnerab\w*|cve-\d+|crash\w*|data loss|outage|production|exploit)\b")
+
+# Folds used to score the model on examples it was not trained on
+CALIBRATION_FOLDS = 5
+
+class NaiveBayesClassifier:
+    def __init__(self, classes: List[str], alpha: float = 1.0):
+        self.classes = classes
+        self.alpha = alpha
+        self.log_prior: Optional[np.ndarray] = None
+        self.log_likelihood: Optional[np.ndarray] = None
+    
+    def fit(self, features: np.ndarray, labels: List[str]):
+        """Fit multinomial naive Bayes on non-negative feature rows"""
+        label_index = np.array([self.classes.index(label) for label in labels])
+        class_counts = np.bincount(label_index, minlength=len(self.classes)).astype(np.float64)
+        feature_counts = np.zeros((len(self.classes), features.shape[1]), dtype=np.float64)
+        np.add.at(feature_counts, label_index, features)
+        
+        self.log_prior = np.log((class_counts + self.alpha) / (class_counts.sum() + self.alpha * len(self.classes)))
+        smoothed = feature_counts + self.alpha
+        self.log_likelihood = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+    
+    def predict(self, features: np.ndarray) -> Tuple[str, float]:
+        """Return the most likely class and its posterior probability"""
+        scores = self.log_prior + self.log_likelihood @ features
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        best = int(np.argmax(probabilities))
+        return self.classes[best], float(probabilities[best])
+
+class IsotonicCalibrator:
+    def __init__(self):
+        self.upper_scores: Optional[np.ndarray] = None
+        self.accuracies: Optional[np.ndarray] = None
+    
+    def fit(self, scores: np.ndarray, correct: np.ndarray):
+        """Fit a non-decreasing map from raw model confidence to held-out accuracy (pool adjacent violators)"""
+        order = np.argsort(scores, kind="stable")
+        blocks = []  # [correct count, example count, highest raw score]
+        for score, hit in zip(scores[order], correct[order]):
+            blocks.append([float(hit), 1, float(score)])
+            while len(blocks) > 1 and blocks[-2][0] / blocks[-2][1] >= blocks[-1][0] / blocks[-1][1]:
+                hits, count, upper = blocks.pop()
+                blocks[-1][0] += hits
+                blocks[-1][1] += count
+                blocks[-1][2] = upper
+        
+        self.upper_scores = np.array([upper for _, _, upper in blocks])
+        # Laplace smoothing keeps a handful of lucky examples from reading as certainty
+        self.accuracies = np.maximum.accumulate(np.array([(hits + 1) / (count + 2) for hits, count, _ in blocks]))
+    
+    def predict(self, score: float) -> float:
+        """Expected accuracy of a prediction made with this raw confidence"""
+        index = min(int(np.searchsorted(self.upper_scores, score)), len(self.accuracies) - 1)
+        return float(self.accuracies[index])
+
+class LocalTriageEngine:
+    engine_name = "local"
+    model = "rules+naive-bayes"
+    
+    def __init__(self, journal=None, confidence_threshold: float = None):
+        self.journal = journal
+        self.confidence_threshold = confidence_threshold if confidence_threshold is not None else Config.LOCAL_CONFIDENCE_THRESHOLD
+        self.embedder = HashedTfidfEmbedder(Config.DUPLICATE_INDEX_DIMENSIONS)
+        self.priority_model: Optional[NaiveBayesClassifier] = None
+        self.component_model: Optional[NaiveBayesClassifier] = None
+        self.calibrator: Optional[IsotonicCalibrator] = None
+        self.component_labels = {}
+        self.training_examples = 0
+        self.trained_at = 0.0
+        
+        # Counters for the session summary
+        self.attempts = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        
+        self.train()
+    
+    def retrain_if_due(self):
+        """Retrain on the journal's latest AI results if LOCAL_RETRAIN_MINUTES have passed since the last training"""
+        if time.monotonic() - self.trained_at >= Config.LOCAL_RETRAIN_MINUTES * 60:
+            self.train()
+    
+    def _use_model(self, priority_model=None, component_model=None, calibrator=None, component_labels=None, training_examples: int = 0):
+        """Swap in a newly trained model (or none) as one unit, so concurrent classifications never mix two trainings"""
+        with self._lock:
+            self.priority_model = priority_model
+            self.component_model = component_model
+            self.calibrator = calibrator
+            self.component_labels = component_labels or {}
+            self.training_examples = training_examples
+    
+    def train(self):
+        """Fit the linear models on past LLM results from the session journal"""
+        self.trained_at = time.monotonic()
+        if not self.journal:
+            return
+        
+        # Never learn from our own predictions
+        examples = self.journal.load_training_examples(exclude_engines=[self.engine_name])
+        if len(examples) < Config.LOCAL_MIN_TRAINING_EXAMPLES:
+            logger.info(f"Local classifier has {len(examples)} training examples (needs {Config.LOCAL_MIN_TRAINING_EXAMPLES}), using rules only")
+            self._use_model()
+            return
+        
+        features = np.vstack([
+            self.embedder.embed(issue_text(GitHubIssue(
+                number=0, title=title, body=body, state="open", labels=[], assignee=None,
+                created_at="", updated_at="", html_url=""
+            )))
+            for title, body, _ in examples
+        ])
+        results = [result for _, _, result in examples]
+        priorities = [result.priority.value for result in results]
+        components = [result.component.value for result in results]
+        
+        # Naive Bayes posteriors are overconfident, so the threshold applies to accuracy measured on held-out folds
+        calibrator = self._calibrate(features, priorities, components)
+        if calibrator is None:
+            self._use_model()
+            return
+        
+        priority_model = NaiveBayesClassifier([priority.value for priority in Priority])
+        priority_model.fit(features, priorities)
+        component_model = NaiveBayesClassifier([component.value for component in Component])
+        component_model.fit(features, components)
+        
+        # Labels the LLM suggested for most issues of a component are suggested for it too
+        by_component = {}
+        for result in results:
+            by_component.setdefault(result.component.value, []).append(result)
+        component_labels = {
+            component: [
+                label for label, count in Counter(label for result in group for label in result.suggested_labels).items()
+                if count * 2 >= len(group)
+            ]
+            for component, group in by_component.items()
+        }
+        
+        self._use_model(priority_model, component_model, calibrator, component_labels, len(examples))
+        logger.info(f"Trained local classifier on {len(examples)} past triage results")
+    
+    def _calibrate(self, features: np.ndarray, priorities: List[str], components: List[str]) -> Optional[IsotonicCalibrator]:
+        """Cross-validate the models and calibrate their confidence; None if no prediction would clear the threshold"""
+        folds = np.arange(len(priorities)) % CALIBRATION_FOLDS
+        scores = np.zeros(len(priorities))
+        correct = np.zeros(len(priorities), dtype=bool)
+        
+        for fold in range(CALIBRATION_FOLDS):
+            train, held_out = np.flatnonzero(folds != fold), np.flatnonzero(folds == fold)
+            priority_model = NaiveBayesClassifier([priority.value for priority in Priority])
+            priority_model.fit(features[train], [priorities[index] for index in train])
+            component_model = NaiveBayesClassifier([component.value for component in Component])
+            component_model.fit(features[train], [components[index] for index in train])
+            
+            for index in held_out:
+                priority, priority_confidence = priority_model.predict(features[index])
+                component, component_confidence = component_model.predict(features[index])
+                scores[index] = min(priority_confidence, component_confidence)
+                correct[index] = priority == priorities[index] and component == components[index]
+        
+        calibrator = IsotonicCalibrator()
+        calibrator.fit(scores, correct)
+        answered = np.array([calibrator.predict(score) >= self.confidence_threshold for score in scores])
+        logger.info(f"Local classifier held-out accuracy {correct.mean():.2f}; {answered.sum()}/{len(scores)} held-out issues clear the {self.confidence_threshold:.2f} threshold")
+        
+        if not answered.any():
+            logger.info("Local classifier is not accurate enough on held-out issues to skip the AI, using rules only")
+            return None
+        return calibrator
+    
+    def _apply_rules(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Classify issues whose title matches an unambiguous pattern"""
+        title = issue.title.lower()
+        if URGENT_PATTERN.search(f"{title}\n{(issue.body or '').lower()}"):
+            return None
+        
+        for pattern, veto, priority, component, labels, confidence, description in TITLE_RULES:
+            if confidence < self.confidence_threshold or (veto and veto.search(title)):
+                continue
+            if pattern.search(title):
+                return TriageResult(
+                    priority=priority,
+                    component=component,
+                    suggested_labels=labels,
+                    suggested_assignee=None,
+                    confidence_score=confidence,
+                    reasoning=f"Local classifier: title matches the {description} rule"
+                )
+        return None
+    
+    def _apply_model(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Classify with the naive Bayes models when both are confident"""
+        with self._lock:
+            priority_model, component_model, calibrator = self.priority_model, self.component_model, self.calibrator
+            component_labels, training_examples = self.component_labels, self.training_examples
+        if not priority_model:
+            return None
+        
+        features = self.embedder.embed(issue_text(issue))
+        priority, priority_confidence = priority_model.predict(features)
+        component, component_confidence = component_model.predict(features)
+        confidence = calibrator.predict(min(priority_confidence, component_confidence))
+        
+        # Critical issues always get a full LLM review
+        if confidence < self.confidence_threshold or priority in (Priority.P0.value, Priority.P1.value):
+            return None
+        
+        return TriageResult(
+            priority=Priority(priority),
+            component=Component(component),
+            suggested_labels=component_labels.get(component, []),
+            suggested_assignee=None,
+            confidence_score=confidence,
+            reasoning=f"Local classifier: similar to {training_examples} past triage results (priority p={priority_confidence:.2f}, component p={component_confidence:.2f}, calibrated accuracy {confidence:.2f})"
+        )
+    
+    def analyze_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Return a triage result if the issue is obvious, or None to defer to the LLM"""
+        result = self._apply_rules(issue) or self._apply_model(issue)
+        
+        with self._lock:
+            self.attempts += 1
+            if result:
+                self.hits += 1
+        
+        if result:
+            logger.info(f"Local classifier triaged issue #{issue.number} - Priority: {result.priority}, Component: {result.component}")
+        return result
+    
+    def analyze_issues(self, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Classify several issues; None entries should go to the LLM"""
+        return [self.analyze_issue(issue) for issue in issues]
@@ -8,7 +8,6 @@ import argparse
 import sys
 import logging
 from config import Config
-from triage_orchestrator import TriageOrchestrator
 
 def setup_logging(verbose: bool = False):
     """Setup logging configuration"""
@@ -30,6 +29,16 @@ Examples:
   python main.py --limit 10                   # Process only 10 issues
   python main.py --execute --limit 5          # Execute actions on 5 issues
   python main.py --verbose                    # Enable verbose logging
+  python main.py --workers 8                  # Analyze up to 8 issues concurrently
+  python main.py --batch-size 10              # Triage 10 issues per LLM request
+  python main.py --async --workers 200        # Keep 200 requests in flight on one event loop
+  python main.py --execute --incremental      # Only fetch issues updated since the last run
+  python main.py --no-cache                   # Re-analyze every issue, ignoring cached results
+  python main.py --serve --execute --port 8080  # Triage issues in real time from GitHub webhooks
+  python main.py --daemon --execute --interval 10  # Stay running and triage new updates every 10 minutes
+  python main.py --execute --resume <session_id>  # Finish a session that was interrupted
+  python main.py --profile --limit 50         # Report CPU, wall time and allocations per pipeline stage
+  python main.py --repos "acme/web,acme/api"  # Triage several repositories, taking issues from each in turn
         """
     )
     
@@ -51,6 +60,86 @@ Examples:
         help='Limit the number of issues to process'
     )
     
+    parser.add_argument(
+        '--repos',
+        help='Comma-separated repositories to triage in turn, overriding GITHUB_REPOS (owner/* matches all of an owner\'s repositories)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help=f'Number of issues to analyze concurrently (default: {Config.ANALYSIS_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        help=f'Number of issues to triage in a single LLM request (default: {Config.ANALYSIS_BATCH_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        default=Config.INCREMENTAL_MODE,
+        help='Only fetch issues updated since the last successful run (cursor kept in STATE_FILE)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or write the on-disk triage result cache'
+    )
+    
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help='Run the session on an asyncio event loop with the async engines and adapter'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        metavar='SESSION_ID',
+        help='Resume an interrupted session, reusing its journaled analyses and skipping actions it already applied'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Run a webhook server that triages issues as GitHub reports them (requires GITHUB_WEBHOOK_SECRET)'
+    )
+    
+    parser.add_argument(
+        '--host',
+        default=Config.WEBHOOK_HOST,
+        help=f'Address for --serve to listen on (default: {Config.WEBHOOK_HOST})'
+    )
+    
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=Config.WEBHOOK_PORT,
+        help=f'Port for --serve to listen on (default: {Config.WEBHOOK_PORT})'
+    )
+    
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Stay running and triage incrementally on a fixed interval, keeping connections and caches warm'
+    )
+    
+    parser.add_argument(
+        '--interval',
+        type=int,
+        help=f'Minutes between runs in --daemon mode (default: {Config.DAEMON_INTERVAL_MINUTES})'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help=f'Profile the run with cProfile and tracemalloc, writing a pstats file and report to {Config.PROFILE_DIR}'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -70,6 +159,9 @@ Examples:
     logger = logging.getLogger(__name__)
     
     try:
+        if args.repos is not None:
+            Config.GITHUB_REPOS = args.repos
+        
         # Configuration check
         if args.config_check:
             logger.info("Checking configuration...")
@@ -78,9 +170,11 @@ Examples:
             
             # Display configuration summary
             print("\nConfiguration Summary:")
-            print(f"GitHub Repo: {Config.GITHUB_REPO}")
+            print(f"GitHub Repos: {', '.join(Config.github_repo_patterns())}")
             print(f"OpenAI Model: {Config.OPENAI_MODEL}")
             print(f"Max Issues Per Run: {Config.MAX_ISSUES_PER_RUN}")
+            print(f"Analysis Workers: {Config.ANALYSIS_WORKERS}")
+            print(f"Analysis Batch Size: {Config.ANALYSIS_BATCH_SIZE}")
             print(f"Auto Label Enabled: {Config.AUTO_LABEL_ENABLED}")
             print(f"Auto Assign Enabled: {Config.AUTO_ASSIGN_ENABLED}")
             print(f"Team Members: {len(Config.TEAM_MEMBERS)}")
@@ -105,23 +199,90 @@ Examples:
             Config.DRY_RUN_MODE = True
             logger.info("Running in DRY-RUN mode - no changes will be made to GitHub")
         
-        # Create orchestrator and run triage
-        orchestrator = TriageOrchestrator()
+        if args.workers is not None:
+            if args.workers < 1:
+                logger.error("--workers must be at least 1")
+                return 1
+            Config.ANALYSIS_WORKERS = args.workers
         
-        logger.info("Starting AI-powered bug triage...")
-        session = orchestrator.run_triage_session(limit=args.limit)
+        if args.batch_size is not None:
+            if args.batch_size < 1:
+                logger.error("--batch-size must be at least 1")
+                return 1
+            Config.ANALYSIS_BATCH_SIZE = args.batch_size
         
-        # Display results
-        summary = orchestrator.get_session_summary(session)
-        print(summary)
+        if args.no_cache:
+            Config.CACHE_ENABLED = False
         
-        # Return appropriate exit code
-        if session.errors:
-            logger.warning(f"Triage completed with {len(session.errors)} errors")
+        if args.interval is not None and args.interval < 1:
+            logger.error("--interval must be at least 1")
             return 1
-        else:
-            logger.info("Triage completed successfully")
-            return 0
+        
+        if args.serve and args.daemon:
+            logger.error("Cannot specify both --serve and --daemon")
+            return 1
+        
+        if args.profile and (args.serve or args.daemon):
+            logger.error("--profile profiles a single run and cannot be combined with --serve or --daemon")
+            return 1
+        
+        # Imported here so --config-check never loads asyncio, the HTTP clients, LLM SDKs or numpy
+        import asyncio
+        import metrics
+        from triage_orchestrator import TriageOrchestrator
+        
+        # Create orchestrator and run triage
+        orchestrator = TriageOrchestrator()
+        try:
+            if args.serve:
+                # Imported here so batch runs don't pay for loading the web stack
+                import uvicorn
+                from webhook_server import create_app
+                
+                logger.info(f"Serving GitHub webhooks on {args.host}:{args.port}")
+                uvicorn.run(create_app(orchestrator), host=args.host, port=args.port)
+                return 0
+            
+            if args.daemon:
+                from scheduler_daemon import TriageDaemon
+                
+                metrics.start_server()
+                TriageDaemon(orchestrator, interval_minutes=args.interval, limit=args.limit).run_forever()
+                return 0
+            
+            logger.info("Starting AI-powered bug triage...")
+            if args.use_async:
+                run = lambda: asyncio.run(orchestrator.run_triage_session_async(limit=args.limit, incremental=args.incremental, resume_session_id=args.resume))
+            else:
+                run = lambda: orchestrator.run_triage_session(limit=args.limit, incremental=args.incremental, resume_session_id=args.resume)
+            
+            profiler = None
+            if args.profile:
+                from profiling import RunProfiler
+                
+                profiler = RunProfiler()
+                profiler.instrument(orchestrator, use_async=args.use_async)
+                session = profiler.run(run)
+            else:
+                session = run()
+            
+            # Display results
+            summary = orchestrator.get_session_summary(session)
+            print(summary)
+            if profiler:
+                print(profiler.write_reports(session.session_id))
+            metrics.write_textfile()
+            
+            # Return appropriate exit code
+            if session.errors:
+                logger.warning(f"Triage completed with {len(session.errors)} errors")
+                return 1
+            else:
+                logger.info("Triage completed successfully")
+                return 0
+        finally:
+            # Stop the engines' worker threads (hedging, cascade stages)
+            orchestrator.close()
             
     except ValueError as e:
         logger.error(f"Configuration error: {e}")
@@ -0,0 +1,194 @@
+import functools
+import inspect
+import logging
+import os
+import time
+from contextlib import contextmanager
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, start_http_server, write_to_textfile
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets spanning a cache-speed prompt build up to a slow, retried LLM batch
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Stages that run per LLM request and are labelled by engine and model
+LLM_STAGES = ("prompt_build", "llm_call", "parse")
+
+ENABLED = PROMETHEUS_AVAILABLE and Config.METRICS_ENABLED
+
+if ENABLED:
+    REGISTRY = CollectorRegistry()
+    
+    STAGE_SECONDS = Histogram(
+        "triage_stage_duration_seconds", "Time spent in an engine-independent pipeline stage",
+        ["stage"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+    )
+    LLM_STAGE_SECONDS = Histogram(
+        "triage_llm_stage_duration_seconds", "Time spent building prompts, calling the LLM and parsing its response",
+        ["stage", "engine", "model"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+    )
+    GITHUB_WRITE_SECONDS = Histogram(
+        "triage_github_write_duration_seconds", "Time spent applying one GitHub write, by action type",
+        ["action_type"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+    )
+    GITHUB_WRITES = Counter(
+        "triage_github_writes", "GitHub writes attempted, by action type and result (success, failure, dry_run)",
+        ["action_type", "result"], registry=REGISTRY
+    )
+    LLM_REQUESTS = Counter(
+        "triage_llm_requests", "LLM requests that reported token usage",
+        ["engine", "model"], registry=REGISTRY
+    )
+    TOKENS = Counter(
+        "triage_tokens", "Tokens reported by the LLM provider, by kind (input, output, cached_input, cache_write)",
+        ["engine", "model", "kind"], registry=REGISTRY
+    )
+    PARSE_RESULTS = Counter(
+        "triage_parse_results", "Issue results decoded from LLM responses, by result (parsed, repaired, failed)",
+        ["engine", "model", "result"], registry=REGISTRY
+    )
+    HTTP_RETRIES = Counter(
+        "triage_http_retries", "Requests retried by a service's rate limiter",
+        ["service"], registry=REGISTRY
+    )
+    HTTP_THROTTLED = Counter(
+        "triage_http_throttled", "Throttled (429, 529 or GitHub rate-limited 403) responses, by service",
+        ["service"], registry=REGISTRY
+    )
+    ISSUES_PROCESSED = Counter(
+        "triage_issues_processed", "Issues processed by triage sessions",
+        registry=REGISTRY
+    )
+    SESSION_ERRORS = Counter(
+        "triage_session_errors", "Errors recorded by triage sessions",
+        registry=REGISTRY
+    )
+else:
+    REGISTRY = None
+
+def observe_stage(stage: str, seconds: float, engine: str = None, model: str = None):
+    """Record how long one pass through a pipeline stage took"""
+    if not ENABLED:
+        return
+    if stage in LLM_STAGES:
+        LLM_STAGE_SECONDS.labels(stage=stage, engine=engine or "", model=model or "").observe(seconds)
+    else:
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+@contextmanager
+def time_stage(stage: str, engine: str = None, model: str = None):
+    """Time the enclosed block as one pass through a pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start, engine, model)
+
+def timed_stage(stage: str):
+    """Decorate an engine method (sync or async) so each call is timed under its engine and model"""
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                with time_stage(stage, self.engine_name, self.model):
+                    return await method(self, *args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with time_stage(stage, self.engine_name, self.model):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_github_write(action_type: str, success: bool, seconds: float, dry_run: bool = False):
+    """Record the latency and outcome of one GitHub write; dry runs are counted but not timed"""
+    if not ENABLED:
+        return
+    if dry_run:
+        GITHUB_WRITES.labels(action_type=action_type, result="dry_run").inc()
+        return
+    GITHUB_WRITE_SECONDS.labels(action_type=action_type).observe(seconds)
+    GITHUB_WRITES.labels(action_type=action_type, result="success" if success else "failure").inc()
+
+def record_tokens(engine: str, model: str, input_tokens: int, output_tokens: int, cached_input_tokens: int = 0, cache_write_tokens: int = 0):
+    """Count one LLM request and the tokens it used"""
+    if not ENABLED:
+        return
+    LLM_REQUESTS.labels(engine=engine, model=model).inc()
+    for kind, value in (("input", input_tokens), ("output", output_tokens), ("cached_input", cached_input_tokens), ("cache_write", cache_write_tokens)):
+        if value:
+            TOKENS.labels(engine=engine, model=model, kind=kind).inc(value)
+
+def record_parse(engine: str, model: str, parsed: int = 0, repaired: int = 0, failed: int = 0):
+    """Count decoded, repaired and undecodable issue results"""
+    if not ENABLED:
+        return
+    for result, value in (("parsed", parsed), ("repaired", repaired), ("failed", failed)):
+        if value:
+            PARSE_RESULTS.labels(engine=engine, model=model, result=result).inc(value)
+
+def record_retry(service: str):
+    """Count a request retried by a rate limiter"""
+    if ENABLED:
+        HTTP_RETRIES.labels(service=service).inc()
+
+def record_throttled(service: str):
+    """Count a throttled response"""
+    if ENABLED:
+        HTTP_THROTTLED.labels(service=service).inc()
+
+def record_session(issues_processed: int, errors: int):
+    """Count a finished session's issues and errors"""
+    if not ENABLED:
+        return
+    ISSUES_PROCESSED.inc(issues_processed)
+    SESSION_ERRORS.inc(errors)
+
+def render() -> bytes:
+    """Current metrics in the Prometheus text exposition format"""
+    if not ENABLED:
+        return b""
+    return generate_latest(REGISTRY)
+
+def write_textfile(path: str = None) -> bool:
+    """Write the metrics for node_exporter's textfile collector (atomically, via a temp file)"""
+    path = path or Config.METRICS_TEXTFILE
+    if not path or not ENABLED:
+        return False
+    
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_to_textfile(path, REGISTRY)
+        logger.info(f"Wrote metrics to {path}")
+        return True
+    except OSError as e:
+        logger.error(f"Error writing metrics to {path}: {e}")
+        return False
+
+def start_server(port: int = None) -> bool:
+    """Serve /metrics over HTTP on a background thread, for long-running modes"""
+    port = port if port is not None else Config.METRICS_PORT
+    if not port:
+        return False
+    if not ENABLED:
+        logger.warning("METRICS_PORT is set but metrics are disabled or prometheus_client is not installed")
+        return False
+    
+    try:
+        start_http_server(port, registry=REGISTRY)
+        logger.info(f"Serving metrics on :{port}/metrics")
+        return True
+    except OSError as e:
+        logger.error(f"Error starting metrics server on port {port}: {e}")
+        return False
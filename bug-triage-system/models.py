@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from enum import Enum
 
 class Priority(str, Enum):
@@ -26,6 +26,7 @@ class GitHubIssue(BaseModel):
     created_at: str
     updated_at: str
     html_url: str
+    repo: str = ""  # owner/name of the repository the issue belongs to
 
 class TriageResult(BaseModel):
     priority: Priority
@@ -34,15 +35,31 @@ class TriageResult(BaseModel):
     suggested_assignee: Optional[str]
     confidence_score: float
     reasoning: str
+    duplicate_of: Optional[int] = None  # Issue number this was matched to by the duplicate index
 
 class TriageAction(BaseModel):
     issue_number: int
-    action_type: str  # "label", "assign", "comment"
+    repo: str = ""  # owner/name of the issue's repository; the adapter's GITHUB_REPO when empty
+    action_type: str  # "label", "assign", "comment", or "update" (label + assign coalesced into one write)
     action_data: dict
     dry_run: bool = True
     executed: bool = False
     execution_result: Optional[str] = None
 
+class TokenUsage(BaseModel):
+    requests: int = 0
+    input_tokens: int = 0  # All prompt tokens, including those served from the prompt cache
+    output_tokens: int = 0
+    cached_input_tokens: int = 0  # Prompt tokens read from the provider's prompt cache
+    cache_write_tokens: int = 0  # Prompt tokens written to the prompt cache (Claude only)
+    cache_hit_requests: int = 0  # Requests where at least part of the prompt was cached
+    estimated_input_tokens: int = 0  # Prompt size estimated before sending, to compare against input_tokens
+    bodies_compacted: int = 0  # Issue bodies sent compacted to fit ISSUE_TOKEN_BUDGET (counted per request)
+    body_tokens_trimmed: int = 0  # Estimated tokens compaction removed from those bodies
+    results_parsed: Dict[str, int] = Field(default_factory=dict)  # Per engine: issue results decoded from responses
+    results_repaired: Dict[str, int] = Field(default_factory=dict)  # Per engine: results that needed repair_json
+    parse_failures: Dict[str, int] = Field(default_factory=dict)  # Per engine: results that could not be decoded at all
+
 class TriageSession(BaseModel):
     session_id: str
     timestamp: str
@@ -50,3 +67,9 @@ class TriageSession(BaseModel):
     actions_taken: List[TriageAction]
     errors: List[str]
     dry_run: bool
+    cache_hits: int = 0
+    duplicates_found: int = 0
+    local_hits: int = 0  # Issues answered by the local pre-classifier without an AI call
+    local_attempts: int = 0
+    token_usage: TokenUsage = Field(default_factory=TokenUsage)
+    issues_by_repo: Dict[str, int] = Field(default_factory=dict)  # Issues processed per repository
@@ -1,137 +1,271 @@
 import openai
-import json
+import asyncio
+import httpx
 import logging
-from typing import Optional
+from types import SimpleNamespace
+from typing import List, Optional
 from config import Config
-from models import GitHubIssue, TriageResult, Priority, Component
+from http_client import get_async_client
+from metrics import time_stage, timed_stage
+from models import GitHubIssue, TriageResult, Component
+from prompt_compactor import estimate_tokens
+from rate_limiter import RETRYABLE_EXCEPTIONS, get_rate_limiter
+from triage_prompts import TriageStreamCollector, batch_result_schema, build_batch_issue_prompt, build_issue_prompt, build_system_prompt, build_triage_prompt, compact_issue_body, load_json_response, output_token_budget, parse_batch_response, parse_triage_data, split_batch, triage_result_schema
+from usage_tracker import UsageTracker
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class OpenAITriageEngine:
-    def __init__(self):
+    engine_name = "openai"
+    
+    def __init__(self, model: Optional[str] = None, timeout: Optional[float] = None):
         openai.api_key = Config.OPENAI_API_KEY
-        self.model = Config.OPENAI_MODEL
-        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.model = model or Config.OPENAI_MODEL
+        # Retries are scheduled by the shared rate limiter rather than the SDK
+        client_options = {"timeout": timeout} if timeout else {}
+        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL, max_retries=0, **client_options)
+        # With a timeout of its own (a cascade stage), a timed-out request fails over to the next stage instead of being retried
+        self.retry_on = RETRYABLE_EXCEPTIONS + (openai.APIConnectionError,) if timeout is None else ()
+        self.rate_limiter = get_rate_limiter("openai")
+        self.usage = UsageTracker(self.engine_name, self.model)
+        self.structured_output = Config.STRUCTURED_OUTPUT
     
     def _build_triage_prompt(self, issue: GitHubIssue) -> str:
         """Build the prompt for AI triage analysis"""
+        return build_triage_prompt(issue)
+    
+    def _record_prompt(self, issues: List[GitHubIssue], system_prompt: str, user_prompt: str):
+        """Record the estimated prompt size and how much compaction trimmed from the issue bodies"""
+        bodies = [compact_issue_body(issue) for issue in issues]
+        self.usage.record_prompt(
+            estimate_tokens(system_prompt) + estimate_tokens(user_prompt),
+            bodies_compacted=sum(1 for body in bodies if body.trimmed_tokens),
+            tokens_trimmed=sum(body.trimmed_tokens for body in bodies)
+        )
+    
+    @timed_stage("prompt_build")
+    def _build_messages(self, issues: List[GitHubIssue], batch: bool = False) -> list:
+        """Build the chat completion messages; the static system prompt leads so OpenAI's automatic prefix caching applies"""
+        system_prompt = build_system_prompt()
+        user_prompt = build_batch_issue_prompt(issues) if batch else build_issue_prompt(issues[0])
+        self._record_prompt(issues, system_prompt, user_prompt)
         
-        team_info = {
-            "frontend": Config.FRONTEND_TEAM,
-            "backend": Config.BACKEND_TEAM,
-            "infra": Config.INFRA_TEAM,
-            "all_members": Config.TEAM_MEMBERS
-        }
+        return [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": user_prompt
+            }
+        ]
+    
+    def _record_usage(self, label: str, response):
+        """Record token usage, including prompt tokens served from the prefix cache"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
         
-        prompt = f"""
-You are an expert software engineering triage assistant. Analyze the following GitHub issue and provide a structured triage recommendation.
-
-ISSUE DETAILS:
-Title: {issue.title}
-Body: {issue.body or "No description provided"}
-Current Labels: {', '.join(issue.labels) if issue.labels else "None"}
-Current Assignee: {issue.assignee or "Unassigned"}
-
-TEAM INFORMATION:
-Frontend Team: {', '.join(team_info['frontend']) if team_info['frontend'] else "Not configured"}
-Backend Team: {', '.join(team_info['backend']) if team_info['backend'] else "Not configured"}
-Infrastructure Team: {', '.join(team_info['infra']) if team_info['infra'] else "Not configured"}
-All Team Members: {', '.join(team_info['all_members']) if team_info['all_members'] else "Not configured"}
-
-TRIAGE CRITERIA:
-Priority Levels:
-- P0 (Critical): Production down, security vulnerabilities, data loss
-- P1 (High): Major features broken, significant user impact
-- P2 (Medium): Minor feature issues, moderate user impact
-- P3 (Low): Enhancements, documentation, nice-to-have features
-
-Component Categories:
-- frontend: UI/UX issues, client-side bugs, styling problems
-- backend: API issues, server-side logic, database problems
-- infra: DevOps, deployment, infrastructure, CI/CD
-- docs: Documentation issues
-- testing: Test-related issues
-- unknown: Cannot determine from available information
-
-RESPONSE FORMAT:
-Provide your analysis as a valid JSON object with the following structure:
-{{
-    "priority": "P0|P1|P2|P3",
-    "component": "frontend|backend|infra|docs|testing|unknown",
-    "suggested_labels": ["label1", "label2"],
-    "suggested_assignee": "username or null",
-    "confidence_score": 0.0-1.0,
-    "reasoning": "Brief explanation of your analysis"
-}}
-
-IMPORTANT GUIDELINES:
-1. Be conservative with P0/P1 assignments - only for truly critical issues
-2. Suggest assignee only if you can clearly match the issue to a team member's expertise
-3. Include relevant labels like "bug", "enhancement", "security", "performance", etc.
-4. Confidence score should reflect how certain you are about the classification
-5. Keep reasoning concise but informative
-
-Analyze the issue and respond with only the JSON object:
-"""
-        return prompt
+        # prompt_tokens_details is newer than the pinned SDK, so it may arrive as a plain dict
+        details = getattr(usage, "prompt_tokens_details", None) or {}
+        cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+        
+        self.usage.record(
+            label,
+            input_tokens=usage.prompt_tokens or 0,
+            output_tokens=usage.completion_tokens or 0,
+            cached_input_tokens=cached or 0
+        )
+    
+    def _response_format(self, batch: bool = False) -> dict:
+        """response_format argument that makes OpenAI enforce the triage schema (empty if disabled)"""
+        if not self.structured_output:
+            return {}
+        
+        return {"response_format": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "triage_results" if batch else "triage_result",
+                "strict": True,
+                "schema": batch_result_schema() if batch else triage_result_schema()
+            }
+        }}
+    
+    def _schema_rejected(self, response, kwargs: dict) -> bool:
+        """Turn structured output off if the model rejected it; returns True if the request should be resent"""
+        if response.status_code != 400 or "response_format" not in kwargs:
+            return False
+        
+        logger.warning(f"OpenAI model {self.model} does not accept a JSON schema response_format, falling back to plain JSON: {response.text}")
+        self.structured_output = False
+        del kwargs["response_format"]
+        return True
+    
+    def _record_parse(self, parsed: int = 0, repaired: int = 0, failed: int = 0):
+        """Count how this engine's results decoded, for the session summary"""
+        self.usage.record_parse(f"{self.engine_name}:{self.model}", parsed=parsed, repaired=repaired, failed=failed)
+    
+    def _check_response(self, response):
+        """Return the parsed completion, raising if retries did not produce a success"""
+        if response.status_code != 200:
+            raise RuntimeError(f"OpenAI API request failed with status {response.status_code}: {response.text}")
+        return response.parse()
+    
+    @timed_stage("llm_call")
+    def _create_completion(self, **kwargs):
+        """Create a chat completion, timed as one LLM call"""
+        return self._request_completion(**kwargs)
+    
+    def _request_completion(self, **kwargs):
+        """Create a chat completion under the rate limiter, honoring its rate-limit headers"""
+        def request():
+            try:
+                return self.client.chat.completions.with_raw_response.create(**kwargs)
+            except openai.APIStatusError as e:
+                # Hand the error response to the limiter so it can read the headers and retry
+                return e.response
+        
+        response = self.rate_limiter.send(request, retry_on=self.retry_on)
+        if self._schema_rejected(response, kwargs):
+            response = self.rate_limiter.send(request, retry_on=self.retry_on)
+        return self._check_response(response)
+    
+    @timed_stage("parse")
+    def _parse_response(self, issue: GitHubIssue, response) -> Optional[TriageResult]:
+        """Turn a chat completion into a TriageResult"""
+        self._record_usage(f"issue #{issue.number}", response)
+        
+        # Extract the JSON response
+        triage_data, repaired = load_json_response(response.choices[0].message.content or "", f"issue #{issue.number}")
+        
+        try:
+            # Validate and create TriageResult
+            result = parse_triage_data(triage_data)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid triage data for issue #{issue.number}: {e}")
+            self._record_parse(failed=1)
+            return None
+        
+        self._record_parse(parsed=1, repaired=int(repaired))
+        logger.info(f"Successfully analyzed issue #{issue.number} - Priority: {result.priority}, Component: {result.component}")
+        return result
+    
+    def _stream_arguments(self, issue: GitHubIssue) -> dict:
+        """Completion arguments for a streamed single-issue request"""
+        return dict(
+            model=self.model,
+            messages=self._build_messages([issue]),
+            temperature=0.3,
+            max_tokens=500,
+            stream=True,
+            **self._response_format(),
+            # The pinned SDK predates stream_options, so request the final usage chunk directly
+            extra_body={"stream_options": {"include_usage": True}}
+        )
+    
+    def _read_stream_chunk(self, chunk, collector: TriageStreamCollector, usage: list) -> bool:
+        """Apply one streamed chunk; returns True once the rest of the stream is not needed"""
+        chunk_usage = getattr(chunk, "usage", None)
+        if chunk_usage:
+            usage.append(openai.types.CompletionUsage.model_validate(chunk_usage) if isinstance(chunk_usage, dict) else chunk_usage)
+        
+        if chunk.choices and chunk.choices[0].delta.content:
+            return collector.feed(chunk.choices[0].delta.content)
+        return False
+    
+    @timed_stage("parse")
+    def _finish_stream(self, issue: GitHubIssue, collector: TriageStreamCollector, usage: list) -> Optional[TriageResult]:
+        """Record usage for a streamed response and build its result"""
+        if usage:
+            self._record_usage(f"issue #{issue.number}", SimpleNamespace(usage=usage[-1]))
+        else:
+            # A stream closed early never reports usage; estimate it from the prompt and the generated text
+            input_tokens = estimate_tokens(build_system_prompt()) + estimate_tokens(build_issue_prompt(issue))
+            self.usage.record(f"issue #{issue.number}", input_tokens=input_tokens, output_tokens=estimate_tokens("".join(collector.text)))
+        
+        result = collector.result()
+        self._record_parse(parsed=int(result is not None), repaired=int(collector.repaired and result is not None), failed=int(result is None))
+        if result:
+            logger.info(f"Successfully analyzed issue #{issue.number} - Priority: {result.priority}, Component: {result.component}")
+        return result
+    
+    def _stream_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Stream the analysis of one issue, closing the connection once the rest is not needed"""
+        arguments = self._stream_arguments(issue)
+        collector = TriageStreamCollector(f"issue #{issue.number}")
+        usage = []
+        # The call lasts until the decision is in, not just until the response headers arrive
+        with time_stage("llm_call", self.engine_name, self.model):
+            stream = self._request_completion(**arguments)
+            try:
+                for chunk in stream:
+                    if self._read_stream_chunk(chunk, collector, usage):
+                        break
+            finally:
+                stream.response.close()
+        
+        return self._finish_stream(issue, collector, usage)
+    
+    @timed_stage("parse")
+    def _parse_batch_response(self, issues: List[GitHubIssue], response) -> List[Optional[TriageResult]]:
+        """Turn a batch completion into one result per issue (None for malformed items)"""
+        self._record_usage(f"batch of {len(issues)} issues", response)
+        results, repaired = parse_batch_response(response.choices[0].message.content or "", len(issues))
+        parsed = sum(1 for result in results if result)
+        self._record_parse(parsed=parsed, repaired=parsed if repaired else 0, failed=len(issues) - parsed)
+        logger.info(f"Batch analyzed {sum(1 for result in results if result)}/{len(issues)} issues in one request")
+        return results
     
     def analyze_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
         """Analyze an issue using OpenAI and return triage recommendations"""
         try:
-            prompt = self._build_triage_prompt(issue)
+            if Config.STREAM_RESPONSES:
+                return self._stream_issue(issue)
             
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert software engineering triage assistant. Always respond with valid JSON only."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                messages=self._build_messages([issue]),
                 temperature=0.3,
-                max_tokens=500
+                max_tokens=500,
+                **self._response_format()
             )
             
-            # Extract the JSON response
-            response_text = response.choices[0].message.content.strip()
-            
-            # Clean up the response to ensure it's valid JSON
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            
-            response_text = response_text.strip()
+            return self._parse_response(issue, response)
             
-            # Parse the JSON response
-            triage_data = json.loads(response_text)
-            
-            # Validate and create TriageResult
-            result = TriageResult(
-                priority=Priority(triage_data["priority"]),
-                component=Component(triage_data["component"]),
-                suggested_labels=triage_data.get("suggested_labels", []),
-                suggested_assignee=triage_data.get("suggested_assignee"),
-                confidence_score=float(triage_data.get("confidence_score", 0.5)),
-                reasoning=triage_data.get("reasoning", "No reasoning provided")
+        except Exception as e:
+            logger.error(f"Error analyzing issue #{issue.number}: {e}")
+            return None
+    
+    def analyze_issues(self, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Analyze several issues in one request, retrying malformed items one by one"""
+        if len(issues) <= 1:
+            return [self.analyze_issue(issue) for issue in issues]
+        
+        # Oversized batches would be rejected outright, so send them as several requests that fit the model
+        batches = split_batch(issues, self.model)
+        if len(batches) > 1:
+            logger.info(f"Splitting a batch of {len(issues)} issues into {len(batches)} requests to fit {self.model}'s token limits")
+            return [result for batch in batches for result in self.analyze_issues(batch)]
+        
+        results = [None] * len(issues)
+        try:
+            response = self._create_completion(
+                model=self.model,
+                messages=self._build_messages(issues, batch=True),
+                temperature=0.3,
+                max_tokens=output_token_budget(self.model, len(issues)),
+                **self._response_format(batch=True)
             )
             
-            logger.info(f"Successfully analyzed issue #{issue.number} - Priority: {result.priority}, Component: {result.component}")
-            return result
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response for issue #{issue.number}: {e}")
-            logger.error(f"Raw response: {response_text}")
-            return None
+            results = self._parse_batch_response(issues, response)
             
         except Exception as e:
-            logger.error(f"Error analyzing issue #{issue.number}: {e}")
-            return None
+            logger.error(f"Error analyzing a batch of {len(issues)} issues: {e}")
+        
+        # Fall back to single-issue calls for anything the batch did not cover
+        return [result or self.analyze_issue(issue) for issue, result in zip(issues, results)]
     
     def _validate_assignee(self, assignee: str) -> bool:
         """Validate if the suggested assignee is in the team"""
@@ -157,3 +291,105 @@ Analyze the issue and respond with only the JSON object:
         
         team = team_mapping.get(component, Config.TEAM_MEMBERS)
         return team[0] if team else None
+
+
+class AsyncOpenAITriageEngine(OpenAITriageEngine):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None, model: Optional[str] = None):
+        self.model = model or Config.OPENAI_MODEL
+        self.client = openai.AsyncOpenAI(
+            api_key=Config.OPENAI_API_KEY,
+            base_url=Config.OPENAI_BASE_URL,
+            http_client=http_client or get_async_client(),
+            max_retries=0
+        )
+        self.rate_limiter = get_rate_limiter("openai")
+        self.usage = UsageTracker(self.engine_name, self.model)
+        self.structured_output = Config.STRUCTURED_OUTPUT
+    
+    @timed_stage("llm_call")
+    async def _create_completion(self, **kwargs):
+        """Create a chat completion, timed as one LLM call"""
+        return await self._request_completion(**kwargs)
+    
+    async def _request_completion(self, **kwargs):
+        """Create a chat completion under the rate limiter without blocking the event loop"""
+        async def request():
+            try:
+                return await self.client.chat.completions.with_raw_response.create(**kwargs)
+            except openai.APIStatusError as e:
+                return e.response
+        
+        response = await self.rate_limiter.send_async(request, retry_on=RETRYABLE_EXCEPTIONS + (openai.APIConnectionError,))
+        if self._schema_rejected(response, kwargs):
+            response = await self.rate_limiter.send_async(request, retry_on=RETRYABLE_EXCEPTIONS + (openai.APIConnectionError,))
+        return self._check_response(response)
+    
+    async def _stream_issue_async(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Stream the analysis of one issue, closing the connection once the rest is not needed"""
+        arguments = self._stream_arguments(issue)
+        collector = TriageStreamCollector(f"issue #{issue.number}")
+        usage = []
+        with time_stage("llm_call", self.engine_name, self.model):
+            stream = await self._request_completion(**arguments)
+            try:
+                async for chunk in stream:
+                    if self._read_stream_chunk(chunk, collector, usage):
+                        break
+            finally:
+                await stream.response.aclose()
+        
+        return self._finish_stream(issue, collector, usage)
+    
+    async def analyze_issue(self, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Analyze an issue using OpenAI without blocking the event loop"""
+        try:
+            if Config.STREAM_RESPONSES:
+                return await self._stream_issue_async(issue)
+            
+            response = await self._create_completion(
+                model=self.model,
+                messages=self._build_messages([issue]),
+                temperature=0.3,
+                max_tokens=500,
+                **self._response_format()
+            )
+            
+            return self._parse_response(issue, response)
+            
+        except Exception as e:
+            logger.error(f"Error analyzing issue #{issue.number}: {e}")
+            return None
+    
+    async def analyze_issues(self, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Analyze several issues in one request, retrying malformed items one by one"""
+        if len(issues) <= 1:
+            return [await self.analyze_issue(issue) for issue in issues]
+        
+        # Oversized batches would be rejected outright, so send them as several requests that fit the model
+        batches = split_batch(issues, self.model)
+        if len(batches) > 1:
+            logger.info(f"Splitting a batch of {len(issues)} issues into {len(batches)} requests to fit {self.model}'s token limits")
+            batch_results = await asyncio.gather(*(self.analyze_issues(batch) for batch in batches))
+            return [result for results in batch_results for result in results]
+        
+        results = [None] * len(issues)
+        try:
+            response = await self._create_completion(
+                model=self.model,
+                messages=self._build_messages(issues, batch=True),
+                temperature=0.3,
+                max_tokens=output_token_budget(self.model, len(issues)),
+                **self._response_format(batch=True)
+            )
+            
+            results = self._parse_batch_response(issues, response)
+            
+        except Exception as e:
+            logger.error(f"Error analyzing a batch of {len(issues)} issues: {e}")
+        
+        # Fall back to single-issue calls for anything the batch did not cover
+        retried = await asyncio.gather(*(
+            self.analyze_issue(issue) for issue, result in zip(issues, results) if result is None
+        ))
+        retried = iter(retried)
+        return [result or next(retried) for result in results]
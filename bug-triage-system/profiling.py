@@ -0,0 +1,195 @@
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Orchestrator stages timed in --profile runs, in pipeline order
+STAGES = ("_process_issues", "analyze_issues", "_execute_actions")
+
+# Frames tracemalloc keeps per allocation; enough to see past logging and pydantic internals
+TRACEMALLOC_FRAMES = 5
+
+# From 3.12 cProfile runs on sys.monitoring, which sees every thread but allows only one active profiler
+PROFILER_COVERS_ALL_THREADS = sys.version_info >= (3, 12)
+
+class StageStats:
+    def __init__(self):
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds: Optional[float] = 0.0
+
+class RunProfiler:
+    def __init__(self, top_n: int = None):
+        self.top_n = top_n or Config.PROFILE_TOP_N
+        self.stages: Dict[str, StageStats] = {stage: StageStats() for stage in STAGES}
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_memory = 0
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self._profiler = cProfile.Profile()
+        self._thread_profilers: List[Tuple[threading.Thread, cProfile.Profile]] = []
+        self._lock = threading.Lock()
+    
+    def _record(self, stage: str, wall: float, cpu: Optional[float]):
+        """Add one call's wall and CPU time to a stage"""
+        with self._lock:
+            stats = self.stages[stage]
+            stats.calls += 1
+            stats.wall_seconds += wall
+            if cpu is None:
+                stats.cpu_seconds = None
+            elif stats.cpu_seconds is not None:
+                stats.cpu_seconds += cpu
+    
+    def _wrap(self, stage: str, func):
+        """Time every call of a function with the wall clock and its thread's CPU clock"""
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._record(stage, time.perf_counter() - wall, time.thread_time() - cpu)
+        return timed
+    
+    def _wrap_async(self, stage: str, func):
+        """Time every call of a coroutine function; its CPU time can't be told apart from the coroutines it interleaves with"""
+        @functools.wraps(func)
+        async def timed(*args, **kwargs):
+            wall = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self._record(stage, time.perf_counter() - wall, None)
+        return timed
+    
+    def instrument(self, orchestrator, use_async: bool = False):
+        """Time the orchestrator's analysis batches, AI engine calls and per-issue writes"""
+        if use_async:
+            create_async_engine = orchestrator._create_async_engine
+            
+            def create_timed_engine():
+                engine = create_async_engine()
+                engine.analyze_issues = self._wrap_async("analyze_issues", engine.analyze_issues)
+                return engine
+            
+            orchestrator._create_async_engine = create_timed_engine
+            orchestrator._process_issues_async = self._wrap_async("_process_issues", orchestrator._process_issues_async)
+            orchestrator._execute_actions_async = self._wrap_async("_execute_actions", orchestrator._execute_actions_async)
+        else:
+            orchestrator.ai_engine.analyze_issues = self._wrap("analyze_issues", orchestrator.ai_engine.analyze_issues)
+            orchestrator._process_issues = self._wrap("_process_issues", orchestrator._process_issues)
+            orchestrator._execute_actions = self._wrap("_execute_actions", orchestrator._execute_actions)
+    
+    def _start_thread_profiler(self, frame, event, arg):
+        """threading.setprofile hook: replace itself with a cProfile profiler for the new thread"""
+        sys.setprofile(None)
+        thread_profiler = cProfile.Profile()
+        with self._lock:
+            self._thread_profilers.append((threading.current_thread(), thread_profiler))
+        thread_profiler.enable()
+    
+    def run(self, func: Callable[[], object]):
+        """Call func under cProfile (on every thread it starts) and tracemalloc, returning its result"""
+        # Before 3.12 cProfile only sees the thread that enabled it, so each thread started during the run gets its own
+        if not PROFILER_COVERS_ALL_THREADS:
+            threading.setprofile(self._start_thread_profiler)
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        wall, cpu = time.perf_counter(), time.process_time()
+        self._profiler.enable()
+        try:
+            return func()
+        finally:
+            self._profiler.disable()
+            self.wall_seconds = time.perf_counter() - wall
+            self.cpu_seconds = time.process_time() - cpu
+            self.snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            ))
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            if not PROFILER_COVERS_ALL_THREADS:
+                threading.setprofile(None)
+    
+    def merged_stats(self) -> pstats.Stats:
+        """cProfile stats of the main thread and every finished worker thread, merged"""
+        stats = pstats.Stats(self._profiler)
+        for thread, thread_profiler in self._thread_profilers:
+            if thread.is_alive():
+                logger.warning(f"Thread {thread.name} was still running, leaving it out of the profile")
+            else:
+                stats.add(thread_profiler)
+        return stats
+    
+    def stage_report(self) -> str:
+        """Wall vs CPU time per stage; a wide gap means the stage mostly waited on the network or on locks"""
+        lines = [
+            "Stage Time (wall vs CPU):",
+            f"{'stage':<18} {'calls':>7} {'wall s':>10} {'cpu s':>10} {'cpu %':>7}",
+        ]
+        for stage, stats in self.stages.items():
+            if stats.cpu_seconds is None:
+                cpu, share = "-", "-"
+            else:
+                cpu = f"{stats.cpu_seconds:.3f}"
+                share = f"{stats.cpu_seconds / stats.wall_seconds:.0%}" if stats.wall_seconds else "-"
+            lines.append(f"{stage:<18} {stats.calls:>7} {stats.wall_seconds:>10.3f} {cpu:>10} {share:>7}")
+        
+        share = f"{self.cpu_seconds / self.wall_seconds:.0%}" if self.wall_seconds else "-"
+        lines.append(f"{'whole run':<18} {1:>7} {self.wall_seconds:>10.3f} {self.cpu_seconds:>10.3f} {share:>7}")
+        lines.append("Stages run concurrently, so their times can add up to more than the whole run.")
+        if any(stats.cpu_seconds is None for stats in self.stages.values()):
+            lines.append("Per-stage CPU time is not measured in --async mode, where stages interleave on one thread.")
+        return "\n".join(lines)
+    
+    def allocation_report(self) -> str:
+        """The source lines that allocated the most memory still live at the end of the run"""
+        lines = [f"Top {self.top_n} Allocations (peak traced memory {self.peak_memory / 1024 / 1024:.1f} MiB):"]
+        if self.snapshot is None:
+            return "\n".join(lines + ["  (not profiled)"])
+        
+        for index, stat in enumerate(self.snapshot.statistics("lineno")[:self.top_n], 1):
+            frame = stat.traceback[0]
+            lines.append(f"{index:>3}. {frame.filename}:{frame.lineno}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        return "\n".join(lines)
+    
+    def function_report(self, stats: pstats.Stats) -> str:
+        """The functions with the highest own time across all threads"""
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+        return stream.getvalue().strip()
+    
+    def write_reports(self, session_id: str, directory: str = None) -> str:
+        """Write the merged pstats file and a text report for a session, returning the text report"""
+        directory = directory or Config.PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        stats_path = os.path.join(directory, f"triage_{session_id}.pstats")
+        report_path = os.path.join(directory, f"triage_{session_id}_profile.txt")
+        
+        stats = self.merged_stats()
+        stats.dump_stats(stats_path)
+        
+        report = "\n\n".join([
+            self.stage_report(),
+            self.allocation_report(),
+            f"CPU profile written to {stats_path} (open with `python -m pstats {stats_path}`)",
+        ])
+        with open(report_path, "w", encoding="utf-8") as report_file:
+            report_file.write(report + "\n\n" + self.function_report(stats) + "\n")
+        
+        logger.info(f"Wrote profile for session {session_id} to {report_path}")
+        return report + f"\nFull report with the top functions by own time: {report_path}"
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Tuple
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rough size of a token; close enough for budgeting without a provider tokenizer
+CHARS_PER_TOKEN = 4
+
+# Share of the budget given to the start of an over-long body; the rest goes to its end
+HEAD_SHARE = 0.6
+
+# Longest run of lines (e.g. a multi-line log record) recognised as a repeating block
+MAX_REPEATED_BLOCK = 8
+
+# Timestamps, counters, addresses and ids that vary between otherwise identical log lines
+VOLATILE_PATTERN = re.compile(r"0x[0-9a-fA-F]+|\b[0-9a-fA-F]{8,}\b|\d+")
+
+# Stack frame lines: Python ("File "app.py", line 3, in f"), Java/JavaScript ("at pkg.run(App.java:10)") and gdb/Rust/Go ("#3 0x7f...")
+STACK_FRAME_PATTERN = re.compile(r'^\s*(?:File ".+", line \d+|at \S.*:\d+\)?$|#\d+\s+0x[0-9a-fA-F]+)')
+
+# Compacted bodies remembered for the prompt builder's repeat calls; keyed by a digest, so raw bodies are never retained
+COMPACTION_CACHE_SIZE = 64
+
+class CompactedText(NamedTuple):
+    text: str
+    original_tokens: int
+    tokens: int
+    
+    @property
+    def trimmed_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+_compacted: "OrderedDict[Tuple[bytes, int], CompactedText]" = OrderedDict()
+_compacted_lock = threading.Lock()
+
+def estimate_tokens(text: str) -> int:
+    """Estimate how many tokens a text costs, before it is sent"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _dedupe_stack_frames(lines: List[str]) -> List[str]:
+    """Drop stack frames already seen earlier in the text (recursion, the same traceback logged repeatedly)"""
+    output = []
+    seen = set()
+    omitted = 0
+    dropped_indent = None
+    
+    for line in lines:
+        indent = len(line) - len(line.lstrip())
+        is_frame = STACK_FRAME_PATTERN.match(line) is not None
+        
+        # A Python frame's source and caret lines are indented under it and go with it
+        if dropped_indent is not None and indent > dropped_indent and not is_frame:
+            continue
+        dropped_indent = None
+        
+        if is_frame:
+            frame = line.strip()
+            if frame in seen:
+                omitted += 1
+                dropped_indent = indent
+                continue
+            seen.add(frame)
+        
+        if omitted:
+            output.append(f"[... {omitted} duplicate stack frames omitted]")
+            omitted = 0
+        output.append(line)
+    
+    if omitted:
+        output.append(f"[... {omitted} duplicate stack frames omitted]")
+    return output
+
+def _collapse_repeated_lines(lines: List[str]) -> List[str]:
+    """Keep the first of consecutive lines or blocks that differ only in numbers and ids, noting how often they repeat"""
+    keys = [VOLATILE_PATTERN.sub("#", line.strip()) for line in lines]
+    output = []
+    index = 0
+    
+    while index < len(lines):
+        best_period, best_repeats = 1, 0
+        for period in range(1, MAX_REPEATED_BLOCK + 1):
+            block = keys[index:index + period]
+            if len(block) < period:
+                break
+            if not any(block):
+                continue
+            
+            repeats = 0
+            start = index + period
+            while keys[start:start + period] == block:
+                repeats += 1
+                start += period
+            if repeats * period > best_repeats * best_period:
+                best_period, best_repeats = period, repeats
+        
+        output.extend(lines[index:index + best_period])
+        # A single repeated line is not worth a marker line
+        if best_repeats * best_period >= 2:
+            what = "line" if best_period == 1 else f"{best_period} lines"
+            output.append(f"[... previous {what} repeated {best_repeats} more times]")
+            index += best_period * (best_repeats + 1)
+        else:
+            index += best_period
+    
+    return output
+
+def _keep_head_and_tail(text: str, max_chars: int) -> str:
+    """Cut the middle out of a text, keeping whole lines at its start and end where possible"""
+    head = text[:int(max_chars * HEAD_SHARE)]
+    tail = text[len(text) - (max_chars - len(head)):]
+    if "\n" in head:
+        head = head[:head.rfind("\n")]
+    if "\n" in tail:
+        tail = tail[tail.find("\n") + 1:]
+    
+    omitted = text[len(head):len(text) - len(tail)]
+    omitted_lines = omitted.count("\n") + 1
+    return f"{head}\n[... {omitted_lines} lines (~{estimate_tokens(omitted)} tokens) omitted ...]\n{tail}"
+
+def compact_text(text: str, token_budget: int = None) -> CompactedText:
+    """Shrink a text to roughly `token_budget` tokens (ISSUE_TOKEN_BUDGET by default; 0 disables).
+    
+    Text within the budget is returned unchanged. Otherwise duplicate stack
+    frames are dropped and repeated log lines collapsed, and if that is not
+    enough the middle is cut, keeping the head and tail.
+    """
+    if token_budget is None:
+        token_budget = Config.ISSUE_TOKEN_BUDGET
+    
+    original_tokens = estimate_tokens(text)
+    if not token_budget or original_tokens <= token_budget:
+        return CompactedText(text, original_tokens, original_tokens)
+    
+    key = (hashlib.sha256(text.encode("utf-8", "surrogatepass")).digest(), token_budget)
+    with _compacted_lock:
+        if key in _compacted:
+            _compacted.move_to_end(key)
+            return _compacted[key]
+    
+    lines = _collapse_repeated_lines(_dedupe_stack_frames(text.splitlines()))
+    compacted = "\n".join(lines)
+    if estimate_tokens(compacted) > token_budget:
+        compacted = _keep_head_and_tail(compacted, token_budget * CHARS_PER_TOKEN)
+    
+    result = CompactedText(compacted, original_tokens, estimate_tokens(compacted))
+    logger.info(f"Compacted text from ~{result.original_tokens} to ~{result.tokens} tokens")
+    
+    with _compacted_lock:
+        _compacted[key] = result
+        while len(_compacted) > COMPACTION_CACHE_SIZE:
+            _compacted.popitem(last=False)
+    return result
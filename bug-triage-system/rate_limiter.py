@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import httpx
+import requests
+from config import Config
+import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 529 is Anthropic's "overloaded" status
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+# Statuses that guarantee the request was rejected before it had any effect
+THROTTLED_STATUS_CODES = {429, 529}
+RETRYABLE_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, httpx.TransportError)
+
+# Header names for the request quota, in the order GitHub, Anthropic, OpenAI
+LIMIT_HEADERS = ("x-ratelimit-limit", "anthropic-ratelimit-requests-limit", "x-ratelimit-limit-requests")
+REMAINING_HEADERS = ("x-ratelimit-remaining", "anthropic-ratelimit-requests-remaining", "x-ratelimit-remaining-requests")
+RESET_HEADERS = ("x-ratelimit-reset", "anthropic-ratelimit-requests-reset", "x-ratelimit-reset-requests")
+
+# Start pacing once less than this share of the window's quota is left, and
+# then only use this share of what remains so we stay just under the limit
+PACING_THRESHOLD = 0.1
+PACING_HEADROOM = 0.9
+
+
+def _first_header(headers, names: Tuple[str, ...]) -> Optional[str]:
+    """Return the first of several header names present in a response"""
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse OpenAI-style durations such as "20ms", "1s" or "6m0.5s" into seconds"""
+    total = 0.0
+    number = ""
+    index = 0
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    
+    while index < len(value):
+        char = value[index]
+        if char.isdigit() or char == ".":
+            number += char
+            index += 1
+            continue
+        
+        unit = "ms" if value.startswith("ms", index) else char
+        if unit not in units or not number:
+            return None
+        total += float(number) * units[unit]
+        number = ""
+        index += len(unit)
+    
+    return total if not number else None
+
+
+def _seconds_until(value: str) -> Optional[float]:
+    """Interpret a reset/retry header as seconds from now.
+    
+    Accepts delta seconds, epoch seconds (GitHub), RFC 3339 (Anthropic),
+    HTTP dates (Retry-After) and Go-style durations (OpenAI).
+    """
+    value = value.strip()
+    now = time.time()
+    
+    try:
+        number = float(value)
+        # Anything this large is an epoch timestamp rather than a delay
+        return max(0.0, number - now) if number > 1e9 else max(0.0, number)
+    except ValueError:
+        pass
+    
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return max(0.0, moment.timestamp() - now)
+    except ValueError:
+        pass
+    
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        pass
+    
+    return _parse_duration(value)
+
+
+class RateLimiter:
+    def __init__(self, name: str, requests_per_second: float = 0.0, burst: int = 10):
+        self.name = name
+        self.base_rate = requests_per_second  # 0 means unlimited until the provider says otherwise
+        self.burst = burst
+        self.max_retries = Config.RATE_LIMIT_MAX_RETRIES
+        self.base_delay = Config.RATE_LIMIT_BASE_DELAY
+        self.max_delay = Config.RATE_LIMIT_MAX_DELAY
+        
+        self.rate = requests_per_second
+        self.rate_expires_at = 0.0
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        
+        # Counters for reporting
+        self.retries = 0
+        self.throttled = 0
+        
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Take a token from the bucket and return how long the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            
+            # Header-derived pacing only lasts until the provider's window resets
+            if self.rate_expires_at and now >= self.rate_expires_at:
+                self.rate = self.base_rate
+                self.rate_expires_at = 0.0
+            
+            if self.rate > 0:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+            self.updated_at = now
+            
+            return wait
+    
+    def acquire(self):
+        """Block until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            logger.debug(f"[{self.name}] Pacing request for {wait:.2f}s")
+            time.sleep(wait)
+    
+    async def acquire_async(self):
+        """Wait on the event loop until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            logger.debug(f"[{self.name}] Pacing request for {wait:.2f}s")
+            await asyncio.sleep(wait)
+    
+    def update_from_headers(self, headers):
+        """Adapt the pace to the quota the provider reports"""
+        remaining = _first_header(headers, REMAINING_HEADERS)
+        reset = _first_header(headers, RESET_HEADERS)
+        if remaining is None or reset is None:
+            return
+        
+        try:
+            remaining = int(float(remaining))
+        except ValueError:
+            return
+        reset_in = _seconds_until(reset)
+        if reset_in is None:
+            return
+        
+        limit = _first_header(headers, LIMIT_HEADERS)
+        try:
+            limit = int(float(limit)) if limit is not None else None
+        except ValueError:
+            limit = None
+        
+        with self._lock:
+            now = time.monotonic()
+            if remaining <= 0:
+                self.blocked_until = max(self.blocked_until, now + reset_in)
+                logger.warning(f"[{self.name}] Rate limit exhausted, pausing for {reset_in:.1f}s")
+            elif reset_in > 0 and (limit is None or remaining <= limit * PACING_THRESHOLD):
+                self.rate = remaining / reset_in * PACING_HEADROOM
+                self.rate_expires_at = now + reset_in
+                logger.debug(f"[{self.name}] {remaining} requests left for {reset_in:.1f}s, pacing at {self.rate:.2f}/s")
+    
+    def _is_rate_limited_403(self, response) -> bool:
+        """GitHub signals primary exhaustion and secondary rate limits with 403"""
+        if response.status_code != 403:
+            return False
+        if response.headers.get("retry-after") or response.headers.get("x-ratelimit-remaining") == "0":
+            return True
+        try:
+            return "rate limit" in response.text.lower()
+        except Exception:
+            return False
+    
+    def _should_retry(self, response, idempotent: bool) -> bool:
+        """Decide whether a response is a transient failure worth retrying"""
+        if response.status_code in THROTTLED_STATUS_CODES or self._is_rate_limited_403(response):
+            with self._lock:
+                self.throttled += 1
+            metrics.record_throttled(self.name)
+            return True
+        # Other 5xx may have been applied server-side, so only repeat safe requests
+        return idempotent and response.status_code in RETRYABLE_STATUS_CODES
+    
+    def _backoff_delay(self, attempt: int, response=None) -> float:
+        """Retry-After if the provider sent one, else jittered exponential backoff"""
+        if response is not None:
+            retry_after_ms = response.headers.get("retry-after-ms")  # OpenAI's millisecond variant
+            if retry_after_ms:
+                try:
+                    return min(float(retry_after_ms) / 1000, self.max_delay)
+                except ValueError:
+                    pass
+            
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                delay = _seconds_until(retry_after)
+                if delay is not None:
+                    return min(delay, self.max_delay)
+        
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(ceiling / 2, ceiling)
+    
+    def _handle_retry(self, attempt: int, reason: str, response=None) -> float:
+        """Log a retry, block the bucket for its delay, and return the delay"""
+        delay = self._backoff_delay(attempt, response)
+        
+        with self._lock:
+            self.retries += 1
+            # Everyone sharing this limiter backs off, not just the caller that was throttled
+            if response is not None and response.status_code != 500:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        metrics.record_retry(self.name)
+        
+        logger.warning(f"[{self.name}] {reason}; retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+    
+    def send(self, request: Callable[[], object], idempotent: bool = True, retry_on: Tuple[type, ...] = RETRYABLE_EXCEPTIONS):
+        """Send a request under the limiter, retrying throttled and transient failures.
+        
+        `request` must return an object with `status_code` and `headers`. The
+        last response is returned even if it still failed, and the last
+        exception is re-raised once retries are exhausted.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            
+            try:
+                response = request()
+            except retry_on as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                time.sleep(self._handle_retry(attempt, f"Request error: {e}"))
+                continue
+            
+            self.update_from_headers(response.headers)
+            if attempt >= self.max_retries or not self._should_retry(response, idempotent):
+                return response
+            
+            time.sleep(self._handle_retry(attempt, f"HTTP {response.status_code}", response))
+    
+    async def send_async(self, request: Callable[[], Awaitable[object]], idempotent: bool = True, retry_on: Tuple[type, ...] = RETRYABLE_EXCEPTIONS):
+        """Async counterpart of send"""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async()
+            
+            try:
+                response = await request()
+            except retry_on as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._handle_retry(attempt, f"Request error: {e}"))
+                continue
+            
+            self.update_from_headers(response.headers)
+            if attempt >= self.max_retries or not self._should_retry(response, idempotent):
+                return response
+            
+            await asyncio.sleep(self._handle_retry(attempt, f"HTTP {response.status_code}", response))
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Return the process-wide limiter for a provider ("github", "claude", "openai")"""
+    with _limiters_lock:
+        if name not in _limiters:
+            rate = {
+                "github": Config.GITHUB_MAX_REQUESTS_PER_SECOND,
+            }.get(name, Config.LLM_MAX_REQUESTS_PER_SECOND)
+            _limiters[name] = RateLimiter(name, requests_per_second=rate)
+        return _limiters[name]
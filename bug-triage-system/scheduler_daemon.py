@@ -0,0 +1,72 @@
+import logging
+import signal
+import threading
+from typing import Optional
+import schedule
+from config import Config
+from models import TriageSession
+from triage_orchestrator import TriageOrchestrator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TriageDaemon:
+    def __init__(self, orchestrator: TriageOrchestrator, interval_minutes: int = None, limit: Optional[int] = None):
+        # One orchestrator for the daemon's lifetime keeps HTTP pools, the result
+        # cache and the engine's imports warm between runs
+        self.orchestrator = orchestrator
+        self.interval_minutes = interval_minutes or Config.DAEMON_INTERVAL_MINUTES
+        self.limit = limit
+        self.scheduler = schedule.Scheduler()
+        self.runs_completed = 0
+        self.runs_skipped = 0
+        self._run_lock = threading.Lock()
+        self._stop_event = threading.Event()
+    
+    def run_once(self) -> Optional[TriageSession]:
+        """Run one incremental session unless the previous one is still going"""
+        if not self._run_lock.acquire(blocking=False):
+            self.runs_skipped += 1
+            logger.warning("Previous triage run is still in progress, skipping this interval")
+            return None
+        
+        try:
+            session = self.orchestrator.run_triage_session(limit=self.limit, incremental=True)
+            self.runs_completed += 1
+            logger.info(f"Scheduled session {session.session_id} processed {session.issues_processed} issues, {len(session.actions_taken)} actions, {len(session.errors)} errors")
+            return session
+            
+        except Exception as e:
+            logger.error(f"Scheduled triage run failed: {e}")
+            return None
+            
+        finally:
+            self._run_lock.release()
+    
+    def _start_run(self):
+        """Start a run on its own thread so the scheduling loop keeps ticking"""
+        threading.Thread(target=self.run_once, name="triage-scheduled-run", daemon=True).start()
+    
+    def stop(self):
+        """Ask the scheduling loop to exit"""
+        self._stop_event.set()
+    
+    def run_forever(self):
+        """Run a session now and then every interval until stopped"""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        
+        self.scheduler.every(self.interval_minutes).minutes.do(self._start_run)
+        logger.info(f"Triage daemon started, running every {self.interval_minutes} minutes")
+        self._start_run()
+        
+        try:
+            while not self._stop_event.is_set():
+                self.scheduler.run_pending()
+                idle_seconds = self.scheduler.idle_seconds
+                self._stop_event.wait(timeout=max(1.0, min(idle_seconds or 1.0, 60.0)))
+        finally:
+            # Let an in-flight run finish so its actions and cursor are not cut off
+            with self._run_lock:
+                self.scheduler.clear()
+            logger.info(f"Triage daemon stopped after {self.runs_completed} runs ({self.runs_skipped} skipped)")
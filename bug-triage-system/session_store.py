@@ -0,0 +1,165 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from config import Config
+from models import GitHubIssue, TriageAction, TriageResult, TriageSession
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SessionStore:
+    def __init__(self, path: str = None):
+        self.path = path or Config.SESSION_STORE_PATH
+        
+        # One connection shared by the pipeline workers, serialized by the lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                repo TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                finished_at TEXT,
+                dry_run INTEGER NOT NULL,
+                issues_processed INTEGER NOT NULL DEFAULT 0,
+                errors TEXT NOT NULL DEFAULT '[]'
+            );
+            CREATE TABLE IF NOT EXISTS analyses (
+                session_id TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                issue_number INTEGER NOT NULL,
+                issue_title TEXT NOT NULL,
+                issue_body TEXT,
+                issue_labels TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                result TEXT,
+                analyzed_at TEXT NOT NULL,
+                PRIMARY KEY (session_id, repo, issue_number)
+            );
+            CREATE TABLE IF NOT EXISTS actions (
+                session_id TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                issue_number INTEGER NOT NULL,
+                action_type TEXT NOT NULL,
+                action_data TEXT NOT NULL,
+                dry_run INTEGER NOT NULL,
+                executed INTEGER NOT NULL,
+                execution_result TEXT,
+                recorded_at TEXT NOT NULL,
+                PRIMARY KEY (session_id, repo, issue_number, action_type)
+            );
+        """)
+    
+    def start_session(self, session: TriageSession, repo: str):
+        """Record a new session and the repositories (GITHUB_REPOS) it covers; a resumed session keeps its original row"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, repo, started_at, dry_run) VALUES (?, ?, ?, ?)",
+                (session.session_id, repo, session.timestamp, int(session.dry_run))
+            )
+    
+    def finish_session(self, session: TriageSession):
+        """Record the final counters of a session"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE sessions SET finished_at = ?, issues_processed = ?, errors = ? WHERE session_id = ?",
+                (datetime.now().isoformat(), session.issues_processed, json.dumps(session.errors), session.session_id)
+            )
+    
+    def get_session(self, session_id: str) -> Optional[dict]:
+        """Return a journaled session's metadata, or None if it is unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT repo, started_at, finished_at, dry_run FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        return {"repo": row[0], "started_at": row[1], "finished_at": row[2], "dry_run": bool(row[3])}
+    
+    def record_analysis(self, session_id: str, repo: str, issue: GitHubIssue, engine: str, result: Optional[TriageResult]):
+        """Journal an analyzed issue (result is None when the analysis failed)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO analyses
+                   (session_id, repo, issue_number, issue_title, issue_body, issue_labels, engine, result, analyzed_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    session_id, repo, issue.number, issue.title, issue.body, json.dumps(issue.labels), engine,
+                    result.model_dump_json() if result else None, datetime.now().isoformat()
+                )
+            )
+    
+    def record_action(self, session_id: str, repo: str, action: TriageAction):
+        """Journal the outcome of a planned action"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO actions
+                   (session_id, repo, issue_number, action_type, action_data, dry_run, executed, execution_result, recorded_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    session_id, repo, action.issue_number, action.action_type, json.dumps(action.action_data),
+                    int(action.dry_run), int(action.executed), action.execution_result, datetime.now().isoformat()
+                )
+            )
+    
+    def load_results(self, session_id: str) -> Dict[Tuple[str, int], TriageResult]:
+        """Return the successful analyses journaled for a session, by (repo, issue number)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT repo, issue_number, result FROM analyses WHERE session_id = ? AND result IS NOT NULL",
+                (session_id,)
+            ).fetchall()
+        
+        results = {}
+        for repo, issue_number, result in rows:
+            try:
+                results[(repo, issue_number)] = TriageResult.model_validate_json(result)
+            except ValueError as e:
+                logger.warning(f"Ignoring unreadable journaled result for {repo}#{issue_number}: {e}")
+        return results
+    
+    def load_executed_actions(self, session_id: str, dry_run: bool) -> Set[Tuple[str, int, str]]:
+        """Return (repo, issue_number, action_type) for every action a session applied successfully.
+        
+        Only actions run in the same mode count, so a dry run resumed with
+        --execute still performs every write.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT repo, issue_number, action_type FROM actions WHERE session_id = ? AND executed = 1 AND dry_run = ?",
+                (session_id, int(dry_run))
+            ).fetchall()
+        return {(repo, issue_number, action_type) for repo, issue_number, action_type in rows}
+    
+    def load_training_examples(self, exclude_engines: Iterable[str] = ()) -> List[Tuple[str, Optional[str], TriageResult]]:
+        """Return (title, body, result) for the latest successful analysis of each journaled issue"""
+        exclude_engines = list(exclude_engines)
+        query = "SELECT repo, issue_number, issue_title, issue_body, result FROM analyses WHERE result IS NOT NULL"
+        if exclude_engines:
+            query += f" AND engine NOT IN ({', '.join('?' for _ in exclude_engines)})"
+        query += " ORDER BY analyzed_at"
+        
+        with self._lock:
+            rows = self._conn.execute(query, exclude_engines).fetchall()
+        
+        # Later analyses of the same issue overwrite earlier ones
+        latest = {}
+        for repo, issue_number, title, body, result in rows:
+            latest[(repo, issue_number)] = (title, body, result)
+        
+        examples = []
+        for title, body, result in latest.values():
+            try:
+                examples.append((title, body, TriageResult.model_validate_json(result)))
+            except ValueError:
+                continue
+        return examples
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
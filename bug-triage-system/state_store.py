@@ -0,0 +1,66 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TriageStateStore:
+    def __init__(self, path: str = None):
+        self.path = path or Config.STATE_FILE
+        self._lock = threading.Lock()
+    
+    def _load(self) -> dict:
+        """Load the state file, treating a missing or corrupt file as empty"""
+        if not os.path.exists(self.path):
+            return {}
+        
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable state file {self.path}: {e}")
+            return {}
+    
+    def _save(self, state: dict):
+        """Write the state file atomically so a crash never leaves it half-written"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".triage_state.")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+    
+    def get_cursor(self, repo: str) -> Optional[str]:
+        """Return the last processed updated_at timestamp for a repository"""
+        with self._lock:
+            return self._load().get(repo, {}).get("updated_at_cursor")
+    
+    def set_cursor(self, repo: str, updated_at: str):
+        """Persist the high-water mark for a repository"""
+        with self._lock:
+            state = self._load()
+            state.setdefault(repo, {})["updated_at_cursor"] = updated_at
+            self._save(state)
+        
+        logger.info(f"Saved incremental cursor for {repo}: {updated_at}")
+    
+    def get_own_updates(self, repo: str) -> Dict[int, str]:
+        """Return the updated_at each issue had once this bot last handled it, by issue number"""
+        with self._lock:
+            own_updates = self._load().get(repo, {}).get("own_updates", {})
+        return {int(number): updated_at for number, updated_at in own_updates.items()}
+    
+    def add_own_updates(self, repo: str, own_updates: Dict[int, str]):
+        """Record issues this bot just handled, dropping entries the cursor has already moved past"""
+        with self._lock:
+            state = self._load()
+            entry = state.setdefault(repo, {})
+            cursor = entry.get("updated_at_cursor", "")
+            merged = {**entry.get("own_updates", {}), **{str(number): updated_at for number, updated_at in own_updates.items()}}
+            # `since` never returns an issue last updated before the cursor, so older entries can go
+            entry["own_updates"] = {number: updated_at for number, updated_at in merged.items() if updated_at >= cursor}
+            self._save(state)
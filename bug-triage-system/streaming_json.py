@@ -0,0 +1,143 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class IncrementalObjectParser:
+    """Parse a JSON object as it streams in, completing each top-level field as soon as its value ends.
+    
+    Text before the opening brace (such as a ```json fence) is skipped, and
+    anything after the closing brace is ignored.
+    """
+    
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._state = "start"  # start -> key -> colon -> value -> (next key | done)
+        self._key: List[str] = []
+        self._value: List[str] = []
+        self._current_key: Optional[str] = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, text: str) -> List[str]:
+        """Consume the next chunk of text; returns the fields it completed"""
+        completed = []
+        for char in text:
+            if self.done:
+                break
+            
+            if self._state == "start":
+                if char == "{":
+                    self._state = "before_key"
+                    
+            elif self._state == "before_key":
+                if char == '"':
+                    self._key = []
+                    self._state = "key"
+                elif char == "}":
+                    self.done = True
+                    
+            elif self._state == "key":
+                if self._escaped:
+                    self._key.append(char)
+                    self._escaped = False
+                elif char == "\\":
+                    self._key.append(char)
+                    self._escaped = True
+                elif char == '"':
+                    self._current_key = json.loads('"' + "".join(self._key) + '"')
+                    self._state = "colon"
+                else:
+                    self._key.append(char)
+                    
+            elif self._state == "colon":
+                if char == ":":
+                    self._value = []
+                    self._depth = 0
+                    self._state = "value"
+                    
+            elif self._feed_value(char):
+                completed.append(self._current_key)
+        
+        return completed
+    
+    def _feed_value(self, char: str) -> bool:
+        """Advance through a field value; returns True when the value is complete"""
+        if not self._value and char.isspace():
+            return False
+        
+        if self._in_string:
+            self._value.append(char)
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+                # A string or container at the top level ends with its closing character
+                if self._depth == 0:
+                    return self._complete_value()
+            return False
+        
+        if char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]" and self._depth > 0:
+            self._depth -= 1
+            self._value.append(char)
+            return self._depth == 0 and self._complete_value()
+        elif self._depth == 0 and char in ",}":
+            # Numbers, booleans and null only end at the next delimiter
+            if char == "}":
+                self.done = True
+            if self._value:
+                return self._complete_value()
+            self._state = "before_key"
+            return False
+        
+        self._value.append(char)
+        return False
+    
+    def _complete_value(self) -> bool:
+        """Decode the buffered value and store it under the current key"""
+        raw = "".join(self._value).strip()
+        self._value = []
+        self._state = "before_key"
+        
+        try:
+            self.fields[self._current_key] = json.loads(raw)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Ignoring malformed streamed value for '{self._current_key}': {e}")
+            return False
+        return True
+    
+    def partial_string(self, key: str) -> Optional[str]:
+        """Best-effort text of a string field that is still being generated"""
+        if self._state != "value" or self._current_key != key or not self._value or self._value[0] != '"':
+            return None
+        
+        raw = "".join(self._value[1:])
+        try:
+            return json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            # The chunk ended inside an escape sequence
+            raw = raw[:raw.rfind("\\")]
+        try:
+            return json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            return raw
+
+def parse_sse_data(line: str) -> Optional[dict]:
+    """Decode the JSON payload of a server-sent event "data:" line (None for other lines)"""
+    if not line or not line.startswith("data:"):
+        return None
+    
+    data = line[len("data:"):].strip()
+    if not data or data == "[DONE]":
+        return None
+    return json.loads(data)
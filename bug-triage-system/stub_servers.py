@@ -0,0 +1,415 @@
+import copy
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# z-score of the 99th percentile, to turn a (median, p99) pair into a lognormal sigma
+P99_Z_SCORE = 2.326
+
+# Corpus vocabulary: (component, title templates, body templates)
+ISSUE_TEMPLATES = [
+    ("frontend",
+     ["Button on {page} page is misaligned", "Dark mode breaks {page} layout", "{page} form does not validate email"],
+     ["The {page} page renders incorrectly in {browser}.\n\nSteps to reproduce:\n1. Open {page}\n2. Resize the window\n\nExpected: layout adapts\nActual: elements overlap"]),
+    ("backend",
+     ["API returns 500 on /{page}", "Database timeout when saving {page}", "Slow query in {page} endpoint"],
+     ["Calling the {page} endpoint fails intermittently.\n\n```\nTraceback (most recent call last):\n  File \"api/{page}.py\", line 42, in handler\n    return service.load(id)\n  File \"services/{page}.py\", line 17, in load\n    raise TimeoutError(\"db\")\nTimeoutError: db\n```"]),
+    ("infra",
+     ["Deploy pipeline fails on {page} stage", "Docker image for {page} is too large", "CI flaky on {page} job"],
+     ["The CI job for {page} fails about one run in five.\n\nLogs:\n```\nstep {page}: exit code 137\n```"]),
+    ("docs",
+     ["Typo in {page} guide", "Missing docs for {page} settings", "README link to {page} is broken"],
+     ["The documentation for {page} is out of date and links to a removed page."]),
+    ("testing",
+     ["Flaky test in {page} suite", "Add tests for {page}", "Test fixtures for {page} are outdated"],
+     ["test_{page} fails randomly on CI with an assertion error on ordering."]),
+]
+PAGES = ["login", "checkout", "profile", "search", "settings", "dashboard", "booking", "payments", "seats", "reviews"]
+BROWSERS = ["Firefox", "Chrome", "Safari", "Edge"]
+
+# Priority keywords the LLM stand-in reacts to, strongest first
+PRIORITY_KEYWORDS = [("P1", ("500", "timeout", "fails", "breaks")), ("P3", ("typo", "docs", "readme", "add tests"))]
+COMPONENT_KEYWORDS = [
+    ("frontend", ("button", "layout", "form", "dark mode")),
+    ("backend", ("api", "database", "query", "endpoint")),
+    ("infra", ("deploy", "docker", "ci ")),
+    ("docs", ("typo", "docs", "readme")),
+    ("testing", ("test",)),
+]
+
+class LatencyProfile:
+    """Lognormal response time described by its median and 99th percentile (equal values give a fixed delay)"""
+    
+    def __init__(self, median: float, p99: Optional[float] = None):
+        self.median = max(0.0, median)
+        self.p99 = max(self.median, p99 if p99 is not None else self.median)
+        self.sigma = math.log(self.p99 / self.median) / P99_Z_SCORE if self.median > 0 and self.p99 > self.median else 0.0
+    
+    def sample(self) -> float:
+        """Draw one response time in seconds"""
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(random.gauss(0.0, self.sigma)) if self.sigma else self.median
+
+class FaultProfile:
+    """Share of requests answered with a server error or a 429, and the Retry-After sent with the 429"""
+    
+    def __init__(self, error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 1.0):
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+    
+    def draw(self) -> Optional[int]:
+        """Status code of an injected fault, or None to serve the request normally"""
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 502
+        return None
+
+def generate_corpus(count: int, repo: str = "bench/movie-booking", seed: int = 0, large_body_ratio: float = 0.02) -> List[dict]:
+    """Synthetic open issues in GitHub API format, newest first; a few carry very long pasted logs"""
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    issues = []
+    
+    for number in range(count, 0, -1):
+        component, titles, bodies = ISSUE_TEMPLATES[rng.randrange(len(ISSUE_TEMPLATES))]
+        words = {"page": rng.choice(PAGES), "browser": rng.choice(BROWSERS)}
+        body = rng.choice(bodies).format(**words)
+        if rng.random() < large_body_ratio:
+            body += "\n\n```\n" + "".join(f"2024-01-01T00:{index // 60 % 60:02d}:{index % 60:02d} ERROR worker-{index % 8} connection reset\n" for index in range(5000)) + "```"
+        
+        created = (started + timedelta(minutes=number)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        issues.append({
+            "number": number,
+            "title": f"{rng.choice(titles).format(**words)} ({component}-{number})",
+            "body": body,
+            "state": "open",
+            "labels": [],
+            "assignee": None,
+            "created_at": created,
+            "updated_at": created,
+            "html_url": f"https://github.com/{repo}/issues/{number}"
+        })
+    
+    return issues
+
+def triage_for_title(title: str) -> dict:
+    """The deterministic triage result the LLM stand-in gives an issue title"""
+    lowered = title.lower()
+    priority = next((level for level, keywords in PRIORITY_KEYWORDS if any(word in lowered for word in keywords)), "P2")
+    component = next((name for name, keywords in COMPONENT_KEYWORDS if any(word in lowered for word in keywords)), "unknown")
+    
+    return {
+        "priority": priority,
+        "component": component,
+        "suggested_labels": ["bug"] if priority != "P3" else ["enhancement"],
+        "suggested_assignee": None,
+        "confidence_score": 0.8,
+        "reasoning": f"The title points to the {component} component. " + "The description matches similar reports triaged before. " * 6
+    }
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes; don't let them wait on delayed ACKs
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _read_json(self) -> dict:
+        """Decode the request body"""
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+    
+    def _send_json(self, status: int, data, headers: Optional[Dict[str, str]] = None):
+        """Send a JSON response"""
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_events(self, events: List[dict], duration: float):
+        """Stream server-sent events evenly over `duration` seconds"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        
+        delay = duration / max(1, len(events))
+        try:
+            for event in events:
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading once it had what it needed
+            pass
+    
+    def _send_stats(self) -> bool:
+        """Answer GET /_stub/stats with the server's request counters"""
+        if self.path != "/_stub/stats":
+            return False
+        self._send_json(200, self.server.counters)
+        return True
+    
+    def _inject_fault(self) -> bool:
+        """Delay the response, then answer with an injected fault if one is drawn"""
+        server = self.server
+        server.count("requests")
+        self._latency = server.latency.sample()
+        time.sleep(self._latency * (server.first_chunk_share if self._wants_stream() else 1.0))
+        
+        status = server.faults.draw()
+        if status is None:
+            return False
+        
+        server.count("throttled" if status == 429 else "errors")
+        headers = {"Retry-After": f"{server.faults.retry_after:g}"} if status == 429 else {}
+        self._send_json(status, {"message": "injected by stub server"}, headers)
+        return True
+    
+    def _wants_stream(self) -> bool:
+        return False
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # Deep enough for every benchmark worker to connect at once
+    first_chunk_share = 1.0
+    
+    def __init__(self, handler, latency: LatencyProfile, faults: FaultProfile, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), handler)
+        self.latency = latency
+        self.faults = faults
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def count(self, name: str, amount: int = 1):
+        """Increment one of the server's request counters"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def start(self) -> "StubServer":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name=f"stub-{self.server_address[1]}", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+
+class _GitHubHandler(_StubHandler):
+    def do_GET(self):
+        if self._send_stats() or self._inject_fault():
+            return
+        
+        url = urlparse(self.path)
+        match = re.fullmatch(r"/repos/[^/]+/[^/]+/issues/(\d+)", url.path)
+        if match:
+            issue = next((issue for issue in self.server.issues if issue["number"] == int(match.group(1))), None)
+            self.server.count("issue_reads")
+            return self._send_json(200, issue) if issue else self._send_json(404, {"message": "Not Found"})
+        if not re.fullmatch(r"/repos/[^/]+/[^/]+/issues", url.path):
+            return self._send_json(404, {"message": "Not Found"})
+        
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        per_page = min(100, int(query.get("per_page", 30)))
+        page = int(query.get("page", 1))
+        issues = self.server.issues
+        if query.get("since"):
+            issues = [issue for issue in issues if issue["updated_at"] >= query["since"]]
+        if query.get("sort") == "updated":
+            issues = sorted(issues, key=lambda issue: issue["updated_at"], reverse=query.get("direction") != "asc")
+        
+        headers = {}
+        if page * per_page < len(issues):
+            query["page"] = str(page + 1)
+            next_query = "&".join(f"{key}={value}" for key, value in query.items())
+            headers["Link"] = f'<{self.server.url}{url.path}?{next_query}>; rel="next"'
+        
+        self.server.count("pages")
+        self._send_json(200, issues[(page - 1) * per_page:page * per_page], headers)
+    
+    def do_POST(self):
+        data = self._read_json()
+        if self.path == "/_stub/reset":
+            self.server.reset()
+            return self._send_json(200, {"issues": len(self.server.issues)})
+        if self._inject_fault():
+            return
+        
+        if self.path.endswith("/labels"):
+            self.server.count("labels")
+            issue = self.server.update_issue(self.path, add_labels=data.get("labels", []))
+            return self._send_json(200, issue["labels"] if issue else [{"name": label} for label in data.get("labels", [])])
+        if self.path.endswith("/comments"):
+            self.server.count("comments")
+            self.server.update_issue(self.path)
+            return self._send_json(201, {"id": 1, "body": data.get("body", "")})
+        self._send_json(404, {"message": "Not Found"})
+    
+    def do_PATCH(self):
+        data = self._read_json()
+        if self._inject_fault():
+            return
+        
+        self.server.count("updates")
+        issue = self.server.update_issue(self.path, set_labels=data.get("labels"), assignees=data.get("assignees"))
+        self._send_json(200, issue or {})
+
+class GitHubStubServer(StubServer):
+    """Stand-in for the GitHub issues API: paginated listing, labels, assignment and comments"""
+    
+    def __init__(self, issues: List[dict], latency: LatencyProfile, faults: FaultProfile = None, **kwargs):
+        super().__init__(_GitHubHandler, latency, faults or FaultProfile(), **kwargs)
+        self.issues = issues
+        self._corpus = copy.deepcopy(issues)
+    
+    def reset(self):
+        """Undo every write, so the next session sees the corpus as generated"""
+        with self._lock:
+            self.issues[:] = copy.deepcopy(self._corpus)
+    
+    def update_issue(self, path: str, add_labels: List[str] = (), set_labels: Optional[List[str]] = None, assignees: Optional[List[str]] = None) -> Optional[dict]:
+        """Apply a write to the issue named in a request path and bump its updated_at, as GitHub does"""
+        match = re.match(r"/repos/[^/]+/[^/]+/issues/(\d+)", path)
+        if not match:
+            return None
+        
+        with self._lock:
+            issue = next((issue for issue in self.issues if issue["number"] == int(match.group(1))), None)
+            if issue is None:
+                return None
+            
+            names = [label["name"] for label in issue["labels"]] if set_labels is None else list(set_labels)
+            names += [label for label in add_labels if label not in names]
+            issue["labels"] = [{"name": name} for name in names]
+            if assignees is not None:
+                issue["assignee"] = {"login": assignees[0]} if assignees else None
+            issue["updated_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            return dict(issue)
+
+class _LLMHandler(_StubHandler):
+    def _wants_stream(self) -> bool:
+        return bool(getattr(self, "_body", {}).get("stream"))
+    
+    def do_GET(self):
+        if not self._send_stats():
+            self._send_json(404, {"error": {"message": "Not Found"}})
+    
+    def _issue_titles(self, prompt: str) -> Tuple[List[str], bool]:
+        """Titles of the issues in a triage prompt, and whether it is a batch prompt"""
+        titles = re.findall(r"^Title: (.*)$", prompt, re.MULTILINE)
+        return titles, bool(re.search(r"^ISSUE \d+:", prompt, re.MULTILINE))
+    
+    def _results(self, prompt: str) -> Tuple[object, bool]:
+        """Triage results for a prompt: one object, or a list carrying issue_index for a batch"""
+        titles, batch = self._issue_titles(prompt)
+        if not batch:
+            return triage_for_title(titles[0] if titles else ""), False
+        return [dict(triage_for_title(title), issue_index=index) for index, title in enumerate(titles, start=1)], True
+    
+    def _stream_duration(self) -> float:
+        """Time left to stream once the first chunk has gone out"""
+        return self._latency * (1 - self.server.first_chunk_share)
+    
+    def do_POST(self):
+        self._body = self._read_json()
+        if self._inject_fault():
+            return
+        
+        if self.path.endswith("/messages"):
+            self._claude_response()
+        elif self.path.endswith("/chat/completions"):
+            self._openai_response()
+        else:
+            self._send_json(404, {"error": {"message": "Not Found"}})
+    
+    def _claude_response(self):
+        """Answer a Claude messages request, as a tool call when tools are offered"""
+        body = self._body
+        prompt = body["messages"][-1]["content"]
+        results, batch = self._results(prompt)
+        tool_input = {"results": results} if batch else results
+        text = json.dumps(results)
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4}
+        self.server.count("completions")
+        
+        if not body.get("stream"):
+            content = {"type": "tool_use", "id": "toolu_stub", "name": body["tools"][0]["name"], "input": tool_input} if body.get("tools") else {"type": "text", "text": text}
+            return self._send_json(200, {"type": "message", "role": "assistant", "content": [content], "usage": usage})
+        
+        if body.get("tools"):
+            block = {"type": "tool_use", "id": "toolu_stub", "name": body["tools"][0]["name"], "input": {}}
+            text = json.dumps(tool_input)
+            delta_type, delta_field = "input_json_delta", "partial_json"
+        else:
+            block = {"type": "text", "text": ""}
+            delta_type, delta_field = "text_delta", "text"
+        
+        events = [
+            {"type": "message_start", "message": {"usage": {"input_tokens": usage["input_tokens"], "output_tokens": 1}}},
+            {"type": "content_block_start", "index": 0, "content_block": block},
+            *({"type": "content_block_delta", "index": 0, "delta": {"type": delta_type, delta_field: text[start:start + 16]}} for start in range(0, len(text), 16)),
+            {"type": "content_block_stop", "index": 0},
+            {"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": usage["output_tokens"]}},
+            {"type": "message_stop"},
+        ]
+        self._send_events(events, self._stream_duration())
+    
+    def _openai_response(self):
+        """Answer an OpenAI chat completion request"""
+        body = self._body
+        prompt = body["messages"][-1]["content"]
+        results, batch = self._results(prompt)
+        # A json_schema response format wraps a batch in an object, as the schema requires
+        text = json.dumps({"results": results} if batch and body.get("response_format") else results)
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4, "total_tokens": (len(prompt) + len(text)) // 4}
+        chunk = {"id": "chatcmpl-stub", "created": int(time.time()), "model": body.get("model", "stub")}
+        self.server.count("completions")
+        
+        if not body.get("stream"):
+            return self._send_json(200, dict(chunk, object="chat.completion", usage=usage, choices=[
+                {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}
+            ]))
+        
+        events = [
+            dict(chunk, object="chat.completion.chunk", choices=[{"index": 0, "finish_reason": None, "delta": {"content": text[start:start + 16]}}])
+            for start in range(0, len(text), 16)
+        ]
+        if body.get("stream_options", {}).get("include_usage"):
+            events.append(dict(chunk, object="chat.completion.chunk", choices=[], usage=usage))
+        self._send_events(events, self._stream_duration())
+
+class LLMStubServer(StubServer):
+    """Stand-in for the Claude /v1/messages and OpenAI /v1/chat/completions endpoints, streamed or not"""
+    first_chunk_share = 0.3  # Share of the sampled latency spent before a streamed response starts
+    
+    def __init__(self, latency: LatencyProfile, faults: FaultProfile = None, **kwargs):
+        super().__init__(_LLMHandler, latency, faults or FaultProfile(), **kwargs)
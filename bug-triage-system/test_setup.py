@@ -5,7 +5,157 @@ Test script to validate the bug triage system setup
 
 import sys
 import os
-from typing import List, Tuple
+import re
+import subprocess
+import tempfile
+from typing import Dict, List, Tuple
+
+# Import time `main.py --config-check` may add on top of a bare interpreter start
+CONFIG_CHECK_IMPORT_BUDGET_MS = 150
+
+# Issues triaged by the --profile run against the local stubs
+PROFILE_TEST_ISSUES = 20
+
+# Starts the GitHub and LLM stubs in the child process, then runs main.py with the remaining arguments
+PROFILE_TEST_SCRIPT = """
+import os, sys
+from stub_servers import FaultProfile, GitHubStubServer, LatencyProfile, LLMStubServer, generate_corpus
+github = GitHubStubServer(generate_corpus(int(sys.argv[1]), repo="test/test"), LatencyProfile(0.001), FaultProfile()).start()
+llm = LLMStubServer(LatencyProfile(0.005), FaultProfile()).start()
+os.environ.update(GITHUB_API_URL=github.url, CLAUDE_API_URL=f"{llm.url}/v1/messages")
+import main
+sys.argv = ["main.py"] + sys.argv[2:]
+sys.exit(main.main())
+"""
+
+# Runs three incremental sessions (sync, sync, async) against one GitHub stub that bumps updated_at on every write
+INCREMENTAL_TEST_SCRIPT = """
+import asyncio, os, sys
+from stub_servers import FaultProfile, GitHubStubServer, LatencyProfile, LLMStubServer, generate_corpus
+github = GitHubStubServer(generate_corpus(int(sys.argv[1]), repo="test/test"), LatencyProfile(0.001), FaultProfile()).start()
+llm = LLMStubServer(LatencyProfile(0.001), FaultProfile()).start()
+os.environ.update(GITHUB_API_URL=github.url, CLAUDE_API_URL=f"{llm.url}/v1/messages")
+from triage_orchestrator import TriageOrchestrator
+orchestrator = TriageOrchestrator()
+for run in (orchestrator.run_triage_session, orchestrator.run_triage_session, lambda incremental: asyncio.run(orchestrator.run_triage_session_async(incremental=incremental))):
+    session = run(incremental=True)
+    print(f"Run: {session.issues_processed} processed, {len(session.errors)} errors, {llm.counters.get('requests', 0)} LLM requests")
+"""
+
+# Modules that only a triage run needs; --config-check must not import any of them
+# A streamed Claude tool-use answer, with deltas cut inside keys, numbers and escape sequences
+RECORDED_SSE_STREAM = r"""
+event: message_start
+data: {"type":"message_start","message":{"id":"msg_01","type":"message","role":"assistant","model":"claude-sonnet","usage":{"input_tokens":412,"output_tokens":1}}}
+
+event: content_block_start
+data: {"type":"content_block_start","index":0,"content_block":{"type":"tool_use","id":"toolu_01","name":"record_triage","input":{}}}
+
+event: ping
+data: {"type":"ping"}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"{\"p"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"riority\""}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":": "}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"\"P1\""}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":", \"component\":"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":" \"frontend\", "}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"\"suggested_label"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"s\": [\"bug\","}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":" \"ui\", \"checkout\""}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"], \"sugge"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"sted_assignee\": null"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":", \"co"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"nfidence_score\": 0.85"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":", \"r"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"easoning\": \"Seat select"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"ion freezes on the \\"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"\"Confirm"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"\\\" "}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"step for every user on Safari, blocking checkout.\\"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"nThe console shows a caf\\u00"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"e9-themed CSS bundle fa"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"iling to load, so this "}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"is a frontend regressio"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"n rather than a booking"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":" API fault. No workarou"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"nd exists beyond switch"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"ing browsers, which mos"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"t mobile users cannot d"}}
+
+event: content_block_delta
+data: {"type":"content_block_delta","index":0,"delta":{"type":"input_json_delta","partial_json":"o, so it warrants P1.\"}"}}
+
+event: content_block_stop
+data: {"type":"content_block_stop","index":0}
+
+event: message_delta
+data: {"type":"message_delta","delta":{"stop_reason":"tool_use"},"usage":{"output_tokens":131}}
+
+event: message_stop
+data: {"type":"message_stop"}
+
+"""
+
+NETWORK_MODULES = {
+    "asyncio", "ssl", "requests", "urllib3", "httpx", "httpcore", "openai",
+    "numpy", "fastapi", "uvicorn", "prometheus_client", "triage_orchestrator",
+}
 
 def test_imports() -> Tuple[bool, List[str]]:
     """Test if all required modules can be imported"""
@@ -120,6 +270,366 @@ def test_config_validation() -> Tuple[bool, List[str]]:
         errors.append(f"❌ Unexpected error during configuration validation: {e}")
         return False, errors
 
+def _import_times(args: List[str], env: Dict[str, str]) -> Tuple[subprocess.CompletedProcess, Dict[str, int]]:
+    """Run python -X importtime and return the process and the cumulative microseconds of each module it imported"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        capture_output=True, text=True, env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: self | cumulative | module", with the module indented by nesting depth
+        _, cumulative_us, module = line.split("|")
+        times[module[1:].rstrip()] = int(cumulative_us)
+    return result, times
+
+def test_config_check_cold_start() -> Tuple[bool, List[str]]:
+    """Test that --config-check imports nothing network-related and starts within budget"""
+    errors = []
+    
+    # Dummy values so validation passes without a .env
+    env = dict(os.environ, GITHUB_TOKEN="test", GITHUB_REPO="test/test", AI_ENGINE="openai", OPENAI_API_KEY="test", HEDGE_ENABLED="false")
+    baseline_run, baseline = _import_times(["-c", "pass"], env)
+    config_check_run, config_check = _import_times(["main.py", "--config-check"], env)
+    
+    # A run that crashed early imports less, so its times would pass for a fast start
+    for label, result, times in (("python -c pass", baseline_run, baseline), ("main.py --config-check", config_check_run, config_check)):
+        if result.returncode != 0:
+            errors.append(f"❌ {label} exited with {result.returncode}: {result.stderr.strip().splitlines()[-1:]}")
+        elif not times:
+            errors.append(f"❌ {label} produced no -X importtime output")
+    if errors:
+        return False, errors
+    
+    imported = {module.strip() for module in config_check}
+    unexpected = sorted((imported & NETWORK_MODULES) - {module.strip() for module in baseline})
+    if unexpected:
+        errors.append(f"❌ --config-check imported {', '.join(unexpected)}")
+    
+    # Top-level entries are the only ones whose cumulative times don't overlap
+    added_ms = sum(
+        cumulative for module, cumulative in config_check.items()
+        if not module.startswith(" ") and module not in baseline
+    ) / 1000
+    if added_ms > CONFIG_CHECK_IMPORT_BUDGET_MS:
+        errors.append(f"❌ --config-check spent {added_ms:.0f}ms importing modules (budget {CONFIG_CHECK_IMPORT_BUDGET_MS}ms)")
+    
+    if not errors:
+        print(f"✅ --config-check imports in {added_ms:.0f}ms (budget {CONFIG_CHECK_IMPORT_BUDGET_MS}ms) without network modules")
+    return len(errors) == 0, errors
+
+def test_profile_run() -> Tuple[bool, List[str]]:
+    """Test that --profile triages every issue on its worker threads and writes its report"""
+    errors = []
+    
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = dict(
+            os.environ, GITHUB_TOKEN="test", GITHUB_REPO="test/test", GITHUB_REPOS="", AI_ENGINE="claude", CLAUDE_API_KEY="test",
+            HEDGE_ENABLED="false", CACHE_ENABLED="false", SESSION_STORE_ENABLED="false", DUPLICATE_DETECTION_ENABLED="false",
+            LOCAL_TRIAGE_ENABLED="false", METRICS_TEXTFILE="", STATE_FILE=os.path.join(state_dir, "state.json"),
+            PROFILE_DIR=os.path.join(state_dir, "profiles")
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", PROFILE_TEST_SCRIPT, str(PROFILE_TEST_ISSUES), "--profile", "--workers", "2", "--limit", str(PROFILE_TEST_ISSUES)],
+            capture_output=True, text=True, env=env, timeout=300,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        reports = os.listdir(env["PROFILE_DIR"]) if os.path.isdir(env["PROFILE_DIR"]) else []
+    
+    processed = re.search(r"Issues Processed: (\d+)", result.stdout)
+    if result.returncode != 0:
+        errors.append(f"❌ --profile exited with {result.returncode}: {result.stderr.strip()[-500:]}")
+    if not processed or int(processed.group(1)) != PROFILE_TEST_ISSUES:
+        errors.append(f"❌ --profile processed {processed.group(1) if processed else 'no'} issues, expected {PROFILE_TEST_ISSUES}")
+    if not any(report.endswith(".pstats") for report in reports):
+        errors.append("❌ --profile did not write a pstats file")
+    
+    if not errors:
+        print(f"✅ --profile triaged {PROFILE_TEST_ISSUES} issues and wrote its report")
+    return len(errors) == 0, errors
+
+def test_incremental_rerun() -> Tuple[bool, List[str]]:
+    """Test that an incremental run right after another fetches nothing, despite the bot's own writes bumping updated_at"""
+    errors = []
+    
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = dict(
+            os.environ, GITHUB_TOKEN="test", GITHUB_REPO="test/test", GITHUB_REPOS="", AI_ENGINE="claude", CLAUDE_API_KEY="test",
+            HEDGE_ENABLED="false", CACHE_ENABLED="false", SESSION_STORE_ENABLED="false", DUPLICATE_DETECTION_ENABLED="false",
+            LOCAL_TRIAGE_ENABLED="false", DRY_RUN_MODE="false", STATE_FILE=os.path.join(state_dir, "state.json")
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", INCREMENTAL_TEST_SCRIPT, str(PROFILE_TEST_ISSUES)],
+            capture_output=True, text=True, env=env, timeout=300,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+    
+    runs = [(int(processed), int(failed), int(requests)) for processed, failed, requests in re.findall(r"Run: (\d+) processed, (\d+) errors, (\d+) LLM requests", result.stdout)]
+    if result.returncode != 0 or len(runs) != 3:
+        errors.append(f"❌ Incremental runs exited with {result.returncode}: {result.stderr.strip()[-500:]}")
+    elif runs[0][:2] != (PROFILE_TEST_ISSUES, 0):
+        errors.append(f"❌ First incremental run processed {runs[0][0]} issues with {runs[0][1]} errors, expected {PROFILE_TEST_ISSUES} without errors")
+    elif runs[1][0] or runs[2][0] or runs[2][2] != runs[0][2]:
+        errors.append(f"❌ Incremental reruns processed {runs[1][0]} (sync) and {runs[2][0]} (async) already-triaged issues, expected none")
+    
+    if not errors:
+        print(f"✅ Incremental reruns after triaging {PROFILE_TEST_ISSUES} issues fetched nothing new")
+    return len(errors) == 0, errors
+
+def _fake_response(status_code: int, headers: Dict[str, str] = None, text: str = ""):
+    """Build a requests.Response as if it came off the wire"""
+    import requests
+    
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = text.encode()
+    return response
+
+def test_rate_limiter() -> Tuple[bool, List[str]]:
+    """Test the limiter's retry decisions, backoff delays and header-driven pacing"""
+    errors = []
+    
+    try:
+        import time
+        from rate_limiter import RateLimiter
+        
+        limiter = RateLimiter("test")
+        limiter.max_delay = 30.0
+        limiter.base_delay = 1.0
+        
+        # Throttling is retried even for writes; other 5xx only when repeating is safe
+        retry_cases = [
+            (_fake_response(429), False, True),
+            (_fake_response(529), False, True),
+            (_fake_response(403, {"x-ratelimit-remaining": "0"}), False, True),
+            (_fake_response(403, text="You have exceeded a secondary rate limit"), True, True),
+            (_fake_response(403, text="Resource not accessible by integration"), True, False),
+            (_fake_response(502), True, True),
+            (_fake_response(502), False, False),
+            (_fake_response(500), False, False),
+            (_fake_response(404), True, False),
+        ]
+        for response, idempotent, expected in retry_cases:
+            if limiter._should_retry(response, idempotent) != expected:
+                errors.append(f"❌ HTTP {response.status_code} ({'idempotent' if idempotent else 'non-idempotent'}) should {'' if expected else 'not '}be retried")
+        if limiter.throttled != 4:
+            errors.append(f"❌ Limiter counted {limiter.throttled} throttled responses, expected 4")
+        
+        # retry-after-ms is more precise than Retry-After, so it wins when both are sent
+        delay_cases = [
+            ({"retry-after-ms": "250", "Retry-After": "5"}, 0.25),
+            ({"retry-after-ms": "soon", "Retry-After": "5"}, 5.0),
+            ({"Retry-After": "2"}, 2.0),
+            ({"Retry-After": "600"}, limiter.max_delay),
+            ({"retry-after-ms": "120000"}, limiter.max_delay),
+        ]
+        for headers, expected in delay_cases:
+            delay = limiter._backoff_delay(0, _fake_response(429, headers))
+            if abs(delay - expected) > 0.01:
+                errors.append(f"❌ Backoff for {headers} was {delay:.2f}s, expected {expected:.2f}s")
+        for attempt in range(6):
+            ceiling = min(limiter.max_delay, limiter.base_delay * 2 ** attempt)
+            delay = limiter._backoff_delay(attempt, _fake_response(502))
+            if not ceiling / 2 <= delay <= ceiling:
+                errors.append(f"❌ Backoff for attempt {attempt} was {delay:.2f}s, expected between {ceiling / 2:.2f}s and {ceiling:.2f}s")
+        
+        # Plenty of quota left leaves the pace alone; a nearly spent window spreads what is left over it
+        limiter = RateLimiter("test", burst=1)
+        limiter.update_from_headers(_fake_response(200, {"x-ratelimit-limit": "100", "x-ratelimit-remaining": "50", "x-ratelimit-reset": str(int(time.time()) + 20)}).headers)
+        if limiter.rate != 0:
+            errors.append(f"❌ Limiter paced at {limiter.rate:.2f}/s with half its quota left")
+        limiter.update_from_headers(_fake_response(200, {"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "5", "x-ratelimit-reset-requests": "10s"}).headers)
+        if abs(limiter.rate - 5 / 10 * 0.9) > 0.01:
+            errors.append(f"❌ Limiter paced at {limiter.rate:.2f}/s with 5 requests left for 10s, expected 0.45/s")
+        waits = [limiter._reserve(), limiter._reserve()]
+        if waits[0] != 0 or not 2.0 <= waits[1] <= 2.3:
+            errors.append(f"❌ Paced limiter made requests wait {waits[0]:.2f}s and {waits[1]:.2f}s, expected 0s then about 2.2s")
+        
+        limiter = RateLimiter("test")
+        limiter.update_from_headers(_fake_response(200, {"anthropic-ratelimit-requests-remaining": "0", "anthropic-ratelimit-requests-reset": "30"}).headers)
+        if not 29 <= limiter._reserve() <= 30:
+            errors.append("❌ Exhausted quota did not block the limiter until the window resets")
+        
+        # A non-idempotent request is sent once on a 502, but retried after a 429
+        limiter = RateLimiter("test")
+        limiter.base_delay = 0.0
+        for status_code, idempotent, expected_calls in ((502, False, 1), (502, True, 2), (429, False, 2)):
+            responses = [_fake_response(status_code, {"Retry-After": "0"}), _fake_response(200)]
+            response = limiter.send(lambda: responses.pop(0), idempotent=idempotent)
+            if 2 - len(responses) != expected_calls:
+                errors.append(f"❌ HTTP {status_code} ({'idempotent' if idempotent else 'non-idempotent'}) was sent {2 - len(responses)} times, expected {expected_calls}")
+            elif response.status_code != (200 if expected_calls == 2 else status_code):
+                errors.append(f"❌ Limiter returned HTTP {response.status_code} after HTTP {status_code}")
+                
+    except Exception as e:
+        errors.append(f"❌ Rate limiter test failed: {e}")
+    
+    if not errors:
+        print("✅ Rate limiter retries, backoff and pacing behave as expected")
+    return len(errors) == 0, errors
+
+def test_json_repair() -> Tuple[bool, List[str]]:
+    """Test that malformed model answers are repaired and that the result schema matches TriageResult"""
+    errors = []
+    
+    try:
+        import json
+        import logging
+        from models import Component, Priority, TriageResult
+        from triage_prompts import ORCHESTRATOR_FIELDS, batch_result_schema, load_json_response, repair_json, triage_result_schema
+        
+        # Repairs are logged as warnings; keep the test output readable
+        logging.getLogger("triage_prompts").setLevel(logging.CRITICAL)
+        
+        cases = [
+            ('{"priority": "P1", "reasoning": "fine"}', {"priority": "P1", "reasoning": "fine"}, False),
+            ('```json\n{"priority": "P1", "suggested_labels": ["bug"]}\n```', {"priority": "P1", "suggested_labels": ["bug"]}, False),
+            ('```json\n{"suggested_labels": ["bug", "ui",],}\n```', {"suggested_labels": ["bug", "ui"]}, True),
+            ('[{"issue_index": 1}, {"issue_index": 2},]', [{"issue_index": 1}, {"issue_index": 2}], True),
+            ('Here is the triage: {"suggested_assignee": None, "valid": True} Hope it helps!', {"suggested_assignee": None, "valid": True}, True),
+            ('{"priority": "P2", "reasoning": "The page crashes when', {"priority": "P2", "reasoning": "The page crashes when"}, True),
+            ('[{"issue_index": 1, "priority": "P0"}, {"issue_index": 2, "suggested_labels": ["a",', [{"issue_index": 1, "priority": "P0"}, {"issue_index": 2, "suggested_labels": ["a"]}], True),
+            ('{"reasoning": "Says \\"None, True,]\\" in the log", "x": [1,],}', {"reasoning": 'Says "None, True,]" in the log', "x": [1]}, True),
+        ]
+        for text, expected, expected_repaired in cases:
+            data, repaired = load_json_response(text, "test")
+            if data != expected or repaired != expected_repaired:
+                errors.append(f"❌ load_json_response({text!r}) returned {data!r} (repaired={repaired}), expected {expected!r} (repaired={expected_repaired})")
+        
+        if load_json_response("I could not triage this issue.", "test") != (None, False):
+            errors.append("❌ load_json_response should return (None, False) for an answer with no JSON in it")
+        if repair_json('{"a": 1}\n\nLet me know if you need anything else {"b": 2}') != '{"a": 1}':
+            errors.append("❌ repair_json should stop at the end of the first top-level value")
+        
+        # The schema must list every field the model fills in, and nothing the orchestrator sets
+        schema = triage_result_schema()
+        model_fields = set(TriageResult.model_fields) - ORCHESTRATOR_FIELDS
+        if "duplicate_of" in schema["properties"] or "duplicate_of" in schema["required"]:
+            errors.append("❌ Result schema asks the model for duplicate_of, which the orchestrator sets")
+        if set(schema["properties"]) != model_fields or set(schema["required"]) != model_fields:
+            errors.append(f"❌ Result schema fields {sorted(schema['required'])} do not match TriageResult's {sorted(model_fields)}")
+        if schema.get("additionalProperties") is not False:
+            errors.append("❌ Result schema must set additionalProperties to false for strict structured output")
+        if "$ref" in json.dumps(schema):
+            errors.append("❌ Result schema still contains $ref; enums must be inlined")
+        if schema["properties"]["priority"].get("enum") != [priority.value for priority in Priority] or schema["properties"]["component"].get("enum") != [component.value for component in Component]:
+            errors.append("❌ Result schema enums do not match Priority and Component")
+        
+        item = batch_result_schema()["properties"]["results"]["items"]
+        if item["required"] != ["issue_index"] + schema["required"] or item.get("additionalProperties") is not False:
+            errors.append("❌ Batch schema items must require issue_index plus every result field and allow nothing else")
+            
+    except Exception as e:
+        errors.append(f"❌ JSON repair test failed: {e}")
+    
+    if not errors:
+        print("✅ Malformed JSON answers are repaired and the result schema matches TriageResult")
+    return len(errors) == 0, errors
+
+def test_streaming_json() -> Tuple[bool, List[str]]:
+    """Test incremental parsing of a recorded SSE stream at every chunk boundary, and early termination on the reasoning cap"""
+    errors = []
+    
+    try:
+        import json
+        import logging
+        from streaming_json import IncrementalObjectParser, parse_sse_data
+        from triage_prompts import CHARS_PER_TOKEN, DECISION_FIELDS, TriageStreamCollector
+        
+        logging.getLogger("triage_prompts").setLevel(logging.CRITICAL)
+        
+        lines = RECORDED_SSE_STREAM.strip().splitlines()
+        events = [parse_sse_data(line) for line in lines]
+        if any(event is not None for line, event in zip(lines, events) if not line.startswith("data:")):
+            errors.append("❌ parse_sse_data decoded a line that is not a data: line")
+        if any(parse_sse_data(line) is not None for line in ("data: [DONE]", "data:", ": keep-alive", "")):
+            errors.append("❌ parse_sse_data should ignore [DONE], empty data and comment lines")
+        
+        deltas = [event["delta"]["partial_json"] for event in events if event and event["type"] == "content_block_delta"]
+        text = "".join(deltas)
+        expected = json.loads(text)
+        reasoning = expected["reasoning"]
+        
+        # The recorded deltas: the decision is complete before any of the reasoning arrives
+        parser = IncrementalObjectParser()
+        reasoning_started = None
+        for index, delta in enumerate(deltas):
+            parser.feed(delta)
+            if reasoning_started is None and parser.partial_string("reasoning") is not None:
+                reasoning_started = index
+                if not DECISION_FIELDS <= parser.fields.keys():
+                    errors.append(f"❌ Decision fields {sorted(parser.fields)} were not all complete when the reasoning started streaming")
+        if parser.fields != expected or not parser.done:
+            errors.append(f"❌ Parsing the recorded deltas gave {parser.fields!r}, expected {expected!r}")
+        
+        # Every possible two-chunk split, including inside keys, numbers and escape sequences
+        for split in range(1, len(text)):
+            parser = IncrementalObjectParser()
+            parser.feed(text[:split])
+            partial = parser.partial_string("reasoning")
+            if partial is not None and not reasoning.startswith(partial):
+                errors.append(f"❌ Partial reasoning at offset {split} was {partial[-30:]!r}, not a prefix of the streamed text")
+                break
+            parser.feed(text[split:])
+            if parser.fields != expected:
+                errors.append(f"❌ Splitting the stream at offset {split} ({text[split - 5:split]!r} | {text[split:split + 5]!r}) gave {parser.fields!r}")
+                break
+        
+        parser = IncrementalObjectParser()
+        for char in "```json\n" + text + "\n```\nThis issue should be fixed first.":
+            parser.feed(char)
+        if parser.fields != expected:
+            errors.append("❌ Parsing one character at a time, inside a code fence, did not give the streamed object")
+        
+        # With a reasoning cap the stream is abandoned early, keeping the decision and the reasoning so far
+        cap_tokens = 10
+        collector = TriageStreamCollector("test", reasoning_max_tokens=cap_tokens)
+        stopped = next((index for index, delta in enumerate(deltas) if collector.feed(delta)), None)
+        result = collector.result()
+        if stopped is None or stopped >= len(deltas) - 1 or not collector.truncated:
+            errors.append(f"❌ Reasoning cap of {cap_tokens} tokens did not stop the stream early (stopped at delta {stopped} of {len(deltas)})")
+        elif stopped < reasoning_started:
+            errors.append("❌ Stream was stopped before the decision fields were complete")
+        elif result is None or result.priority.value != "P1" or result.component.value != "frontend" or result.suggested_labels != expected["suggested_labels"]:
+            errors.append(f"❌ Truncated stream gave {result!r}, expected the streamed decision")
+        elif result.reasoning != reasoning[:cap_tokens * CHARS_PER_TOKEN].rstrip() + "...":
+            errors.append(f"❌ Truncated reasoning was {result.reasoning!r}, expected the first {cap_tokens * CHARS_PER_TOKEN} characters")
+        elif collector.decision_latency is None:
+            errors.append("❌ Collector did not record when the decision streamed in")
+        
+        # Without a cap the whole stream is read; cut off by max_tokens, the reasoning is marked as incomplete
+        collector = TriageStreamCollector("test", reasoning_max_tokens=0)
+        if any(collector.feed(delta) for delta in deltas) or collector.truncated:
+            errors.append("❌ Collector without a reasoning cap stopped the stream early")
+        elif getattr(collector.result(), "reasoning", None) != reasoning:
+            errors.append("❌ Collector without a reasoning cap did not keep the full reasoning")
+        
+        collector = TriageStreamCollector("test", reasoning_max_tokens=0)
+        for delta in deltas[:-3]:
+            collector.feed(delta)
+        result = collector.result()
+        if result is None or not result.reasoning.endswith("...") or not reasoning.startswith(result.reasoning[:-3]):
+            errors.append(f"❌ Stream cut off mid-reasoning gave {result!r}, expected the reasoning so far followed by ...")
+        
+        # A stream that ends before the decision is complete falls back to repairing the whole text
+        collector = TriageStreamCollector("test")
+        for delta in deltas[:6]:
+            collector.feed(delta)
+        result = collector.result()
+        if collector.decision is not None or result is None or result.priority.value != "P1" or result.component.value != "frontend" or not collector.repaired:
+            errors.append(f"❌ Stream cut off before the decision gave {result!r}, expected a repaired P1 frontend result")
+            
+    except Exception as e:
+        errors.append(f"❌ Streaming JSON test failed: {e}")
+    
+    if not errors:
+        print(f"✅ Recorded SSE stream parsed at all {len(text) - 1} chunk boundaries; reasoning cap ends the stream early")
+    return len(errors) == 0, errors
+
 def test_model_creation() -> Tuple[bool, List[str]]:
     """Test if models can be created"""
     errors = []
@@ -191,6 +701,42 @@ def main():
         all_passed &= passed
         all_errors.extend(errors)
     
+    # Test CLI cold start
+    print("\n⏱️ Testing --config-check Cold Start...")
+    passed, errors = test_config_check_cold_start()
+    all_passed &= passed
+    all_errors.extend(errors)
+    
+    # Test profiling against the local stubs
+    print("\n📈 Testing --profile Run...")
+    passed, errors = test_profile_run()
+    all_passed &= passed
+    all_errors.extend(errors)
+    
+    # Test incremental reruns against the local stubs
+    print("\n🔁 Testing Incremental Reruns...")
+    passed, errors = test_incremental_rerun()
+    all_passed &= passed
+    all_errors.extend(errors)
+    
+    # Test rate limiter behaviour
+    print("\n🚦 Testing Rate Limiter...")
+    passed, errors = test_rate_limiter()
+    all_passed &= passed
+    all_errors.extend(errors)
+    
+    # Test JSON repair and the structured output schema
+    print("\n🩹 Testing JSON Repair and Result Schema...")
+    passed, errors = test_json_repair()
+    all_passed &= passed
+    all_errors.extend(errors)
+    
+    # Test incremental parsing of streamed answers
+    print("\n📡 Testing Streaming JSON Parsing...")
+    passed, errors = test_streaming_json()
+    all_passed &= passed
+    all_errors.extend(errors)
+    
     # Test model creation
     print("\n🏗️ Testing Model Creation...")
     passed, errors = test_model_creation()
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+from config import Config
+from models import TriageResult
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TriageCache:
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_entries: int = None):
+        self.path = path or Config.CACHE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else Config.CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        
+        # One connection shared by the analysis workers, serialized by the lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS triage_results (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_triage_results_accessed ON triage_results (accessed_at)")
+        self._purge_expired()
+    
+    @staticmethod
+    def make_key(engine_name: str, model: str, prompt: str) -> str:
+        """Content address for a triage request: identical prompts to the same model share a result"""
+        digest = hashlib.sha256()
+        for part in (engine_name, model, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def _purge_expired(self):
+        """Drop entries older than the TTL"""
+        if self.ttl_seconds <= 0:
+            return
+        
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM triage_results WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+    
+    def get(self, key: str) -> Optional[TriageResult]:
+        """Return the cached result for a key, or None if missing or expired"""
+        now = time.time()
+        
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM triage_results WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None or (self.ttl_seconds > 0 and row[1] < now - self.ttl_seconds):
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE triage_results SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        
+        try:
+            return TriageResult.model_validate_json(row[0])
+        except ValueError as e:
+            logger.warning(f"Discarding unreadable cache entry {key[:12]}: {e}")
+            return None
+    
+    def put(self, key: str, result: TriageResult):
+        """Store a result, evicting the least recently used entries beyond max_entries"""
+        now = time.time()
+        
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO triage_results (key, result, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, result.model_dump_json(), now, now)
+            )
+            
+            if self.max_entries > 0:
+                self._conn.execute("""
+                    DELETE FROM triage_results WHERE key IN (
+                        SELECT key FROM triage_results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+    
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,35 +1,127 @@
+import asyncio
+import queue
+import threading
 import uuid
 import logging
+from collections import deque
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from config import Config
+from engine_registry import close_engine, create_engine
 from models import GitHubIssue, TriageResult, TriageAction, TriageSession, Priority
-from github_adapter import GitHubAdapter
-from openai_triage_engine import OpenAITriageEngine
-from claude_triage_engine import ClaudeTriageEngine
+from github_adapter import AsyncGitHubAdapter, GitHubAdapter
+from http_client import close_async_client
+from metrics import record_session, time_stage
+from session_store import SessionStore
+from state_store import TriageStateStore
+from triage_cache import TriageCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cursor used for the first incremental run of a repository
+INITIAL_CURSOR = "1970-01-01T00:00:00Z"
+
+# Sentinel that tells a pipeline stage worker its input is exhausted
+_PIPELINE_DONE = object()
+
+# How often pipeline stages blocked on a queue check whether the run was interrupted
+QUEUE_POLL_SECONDS = 0.1
+
+def _chunked(issues: Iterable[GitHubIssue], size: int) -> Iterator[List[GitHubIssue]]:
+    """Group a stream of issues into lists of at most `size`, yielding each as soon as it fills"""
+    chunk = []
+    for issue in issues:
+        chunk.append(issue)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _interleave(streams: List[Iterator[GitHubIssue]], limit: int) -> Iterator[GitHubIssue]:
+    """Take one issue from each repository's stream in turn, so a large repository cannot starve small ones"""
+    active = deque(streams)
+    taken = 0
+    try:
+        while active and taken < limit:
+            stream = active.popleft()
+            issue = next(stream, None)
+            if issue is None:
+                continue
+            active.append(stream)
+            taken += 1
+            yield issue
+    finally:
+        for stream in active:
+            stream.close()
+
+async def _interleave_async(streams: List[AsyncIterator[GitHubIssue]], limit: int) -> AsyncIterator[GitHubIssue]:
+    """Async counterpart of _interleave"""
+    active = deque(streams)
+    taken = 0
+    try:
+        while active and taken < limit:
+            stream = active.popleft()
+            try:
+                issue = await stream.__anext__()
+            except StopAsyncIteration:
+                continue
+            active.append(stream)
+            taken += 1
+            yield issue
+    finally:
+        for stream in active:
+            await stream.aclose()
+
 class TriageOrchestrator:
     def __init__(self):
         self.github_adapter = GitHubAdapter()
         
-        # Initialize AI engine based on configuration
-        if Config.AI_ENGINE == "claude":
-            self.ai_engine = ClaudeTriageEngine()
-            logger.info("Using Claude AI engine")
-        elif Config.AI_ENGINE == "openai":
-            self.ai_engine = OpenAITriageEngine()
-            logger.info("Using OpenAI engine")
-        else:
-            raise ValueError(f"Unsupported AI engine: {Config.AI_ENGINE}")
+        # Initialize AI engine based on configuration (a single engine or a cascade of them)
+        self.ai_engine = create_engine(Config.AI_ENGINE)
+        logger.info(f"Using {Config.AI_ENGINE} AI engine")
         
         self.dry_run = Config.DRY_RUN_MODE
+        self.max_workers = max(1, Config.ANALYSIS_WORKERS)
+        self.batch_size = max(1, Config.ANALYSIS_BATCH_SIZE)
+        self.state_store = TriageStateStore()
+        self.cache = TriageCache() if Config.CACHE_ENABLED else None
+        self.journal = SessionStore() if Config.SESSION_STORE_ENABLED else None
+        self.duplicate_index = None
+        self.local_engine = None
+        
+        # Both need numpy, so they are only imported when enabled
+        if Config.DUPLICATE_DETECTION_ENABLED:
+            from duplicate_index import DuplicateIndex
+            self.duplicate_index = DuplicateIndex()
+        if Config.LOCAL_TRIAGE_ENABLED:
+            from local_triage_engine import LocalTriageEngine
+            self.local_engine = LocalTriageEngine(self.journal)
+        
+        # Per-session journal state; work already recorded for a resumed session is skipped
+        self._session_id: Optional[str] = None
+        self._resumed_results: Dict[Tuple[str, int], TriageResult] = {}
+        self._resumed_actions: Set[Tuple[str, int, str]] = set()
+    
+    def close(self):
+        """Release the AI engine's worker threads"""
+        close_engine(self.ai_engine)
     
-    def run_triage_session(self, limit: Optional[int] = None) -> TriageSession:
-        """Run a complete triage session"""
-        session_id = str(uuid.uuid4())
+    def _create_async_engine(self):
+        """Create the asyncio counterpart of the configured AI engine"""
+        return create_engine(Config.AI_ENGINE, async_mode=True)
+    
+    def _start_session(self, resume_session_id: Optional[str] = None) -> TriageSession:
+        """Create a new, empty triage session, or reopen a journaled one to finish its remaining work"""
+        self._resumed_results = {}
+        self._resumed_actions = set()
+        
+        if resume_session_id:
+            self._load_resumed_session(resume_session_id)
+            session_id = resume_session_id
+        else:
+            session_id = str(uuid.uuid4())
         timestamp = datetime.now().isoformat()
         
         logger.info(f"Starting triage session {session_id} (dry_run={self.dry_run})")
@@ -43,29 +135,70 @@ class TriageOrchestrator:
             dry_run=self.dry_run
         )
         
+        self._session_id = session_id
+        self.github_adapter.written_at.clear()
+        if self.journal:
+            self.journal.start_session(session, ",".join(Config.github_repo_patterns()))
+        
+        # Long-running modes (--daemon, --serve) keep one orchestrator, so the model must learn from newer sessions
+        if self.local_engine:
+            self.local_engine.retrain_if_due()
+        return session
+    
+    def _load_resumed_session(self, session_id: str):
+        """Load the analyses and applied actions journaled for a session being resumed"""
+        if not self.journal:
+            raise ValueError("Cannot resume a session with the session journal disabled (SESSION_STORE_ENABLED=false)")
+        
+        record = self.journal.get_session(session_id)
+        if record is None:
+            raise ValueError(f"Unknown session to resume: {session_id}")
+        if record["dry_run"] != self.dry_run:
+            logger.warning(f"Session {session_id} was started with dry_run={record['dry_run']}, resuming with dry_run={self.dry_run}")
+        
+        self._resumed_results = self.journal.load_results(session_id)
+        self._resumed_actions = self.journal.load_executed_actions(session_id, self.dry_run)
+        logger.info(f"Resuming session {session_id}: {len(self._resumed_results)} issues already analyzed, {len(self._resumed_actions)} actions already applied")
+    
+    def _finish_session(self, session: TriageSession):
+        """Record the session's final state in the journal and metrics"""
+        record_session(session.issues_processed, len(session.errors))
+        if self.journal:
+            self.journal.finish_session(session)
+    
+    def run_triage_session(self, limit: Optional[int] = None, incremental: bool = False, issues: Optional[List[GitHubIssue]] = None, resume_session_id: Optional[str] = None) -> TriageSession:
+        """Run a complete triage session (over `issues` if given, otherwise over fetched open issues)"""
+        session = self._start_session(resume_session_id)
+        session_id = session.session_id
+        cache_hits_before = self.cache.hits if self.cache else 0
+        duplicates_before = self.duplicate_index.matches if self.duplicate_index else 0
+        local_before = (self.local_engine.hits, self.local_engine.attempts) if self.local_engine else (0, 0)
+        self.ai_engine.usage.pop()  # Discard usage from earlier sessions
+        
         try:
             # Validate configuration
             Config.validate()
             
-            # Fetch open issues
-            issues = self.github_adapter.get_open_issues(limit)
-            if not issues:
+            # Issues delivered by webhooks are already known; only poll when none are given
+            if issues is None:
+                issues = _interleave([
+                    self._skip_own_updates(self.github_adapter.iter_open_issues(limit, since=self._load_cursor(repo), repo=repo), repo)
+                    if incremental else self.github_adapter.iter_open_issues(limit, repo=repo)
+                    for repo in self._resolve_repos()
+                ], limit or Config.MAX_ISSUES_PER_RUN)
+            else:
+                incremental = False
+                issues = [issue if issue.repo else issue.model_copy(update={"repo": self.github_adapter.repo}) for issue in issues]
+            
+            # Fetch, analyze and write run as concurrent stages, so each issue's
+            # actions are applied as soon as its analysis completes
+            outcomes = self._run_pipeline(issues, session)
+            if not outcomes:
                 logger.warning("No open issues found")
                 return session
             
-            # Process each issue
-            for issue in issues:
-                try:
-                    self._process_issue(issue, session)
-                    session.issues_processed += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error processing issue #{issue.number}: {e}"
-                    logger.error(error_msg)
-                    session.errors.append(error_msg)
-            
-            # Execute actions
-            self._execute_actions(session)
+            if incremental:
+                self._save_cursor(outcomes, session, self.github_adapter)
             
             logger.info(f"Triage session {session_id} completed. Processed {session.issues_processed} issues, {len(session.actions_taken)} actions planned")
             
@@ -73,31 +206,557 @@ class TriageOrchestrator:
             error_msg = f"Critical error in triage session: {e}"
             logger.error(error_msg)
             session.errors.append(error_msg)
+            
+        finally:
+            if self.cache:
+                session.cache_hits = self.cache.hits - cache_hits_before
+            if self.duplicate_index:
+                session.duplicates_found = self.duplicate_index.matches - duplicates_before
+                self.duplicate_index.save()
+            if self.local_engine:
+                session.local_hits = self.local_engine.hits - local_before[0]
+                session.local_attempts = self.local_engine.attempts - local_before[1]
+            session.token_usage = self.ai_engine.usage.pop()
+            self._finish_session(session)
         
         return session
     
-    def _process_issue(self, issue: GitHubIssue, session: TriageSession):
-        """Process a single issue and generate triage actions"""
+    async def run_triage_session_async(self, limit: Optional[int] = None, incremental: bool = False, resume_session_id: Optional[str] = None) -> TriageSession:
+        """Run a complete triage session on a single event loop using the async engines"""
+        session = self._start_session(resume_session_id)
+        cache_hits_before = self.cache.hits if self.cache else 0
+        duplicates_before = self.duplicate_index.matches if self.duplicate_index else 0
+        local_before = (self.local_engine.hits, self.local_engine.attempts) if self.local_engine else (0, 0)
+        github_adapter = AsyncGitHubAdapter()
+        ai_engine = self._create_async_engine()
+        
+        try:
+            # Validate configuration
+            Config.validate()
+            
+            # Listing an owner's repositories happens once per run, so it borrows a thread instead of needing an async twin
+            repos = await asyncio.get_running_loop().run_in_executor(None, self._resolve_repos)
+            issues = _interleave_async([
+                self._skip_own_updates_async(github_adapter.iter_open_issues(limit, since=self._load_cursor(repo), repo=repo), repo)
+                if incremental else github_adapter.iter_open_issues(limit, repo=repo)
+                for repo in repos
+            ], limit or Config.MAX_ISSUES_PER_RUN)
+            outcomes = await self._run_pipeline_async(issues, session, ai_engine, github_adapter)
+            if not outcomes:
+                logger.warning("No open issues found")
+                return session
+            
+            if incremental:
+                self._save_cursor(outcomes, session, github_adapter)
+            
+            logger.info(f"Triage session {session.session_id} completed. Processed {session.issues_processed} issues, {len(session.actions_taken)} actions planned")
+            
+        except Exception as e:
+            error_msg = f"Critical error in triage session: {e}"
+            logger.error(error_msg)
+            session.errors.append(error_msg)
+            
+        finally:
+            await close_async_client()
+            close_engine(ai_engine)
+            if self.cache:
+                session.cache_hits = self.cache.hits - cache_hits_before
+            if self.duplicate_index:
+                session.duplicates_found = self.duplicate_index.matches - duplicates_before
+                self.duplicate_index.save()
+            if self.local_engine:
+                session.local_hits = self.local_engine.hits - local_before[0]
+                session.local_attempts = self.local_engine.attempts - local_before[1]
+            session.token_usage = ai_engine.usage.pop()
+            self._finish_session(session)
+        
+        return session
+    
+    def _run_pipeline(self, issues: Iterable[GitHubIssue], session: TriageSession) -> List[Tuple[GitHubIssue, bool]]:
+        """Stream issues through fetch -> analyze -> execute stages joined by bounded queues.
+        
+        Returns (issue, handled) pairs in fetch order.
+        """
+        # Bounded queues apply back-pressure: the fetcher stops paging when
+        # analysis falls behind, and analysis waits when GitHub writes do
+        batches = queue.Queue(maxsize=self.max_workers * 2)
+        writes = queue.Queue(maxsize=self.max_workers * 2)
+        results = {}
+        fetch_errors = []
+        lock = threading.Lock()
+        
+        # Set when the run is abandoned (e.g. Ctrl+C), so every stage stops taking new work
+        stop = threading.Event()
+        
+        def put(target: queue.Queue, item) -> bool:
+            """Queue an item, giving up if the pipeline is stopped while the queue is full"""
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=QUEUE_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def get(source: queue.Queue):
+            """Take the next item, or _PIPELINE_DONE once the pipeline is stopped"""
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=QUEUE_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+            return _PIPELINE_DONE
+        
+        def fetch():
+            try:
+                position = 0
+                for batch in _chunked(issues, self.batch_size):
+                    if not put(batches, (position, batch)):
+                        break
+                    position += len(batch)
+            except Exception as e:
+                fetch_errors.append(e)
+            finally:
+                for _ in range(self.max_workers):
+                    put(batches, _PIPELINE_DONE)
+        
+        def analyze():
+            while True:
+                item = get(batches)
+                if item is _PIPELINE_DONE:
+                    return
+                
+                position, batch = item
+                try:
+                    batch_outcomes = self._process_issues(batch)
+                except Exception as e:
+                    batch_outcomes = [e] * len(batch)
+                
+                for offset, (issue, outcome) in enumerate(zip(batch, batch_outcomes)):
+                    with lock:
+                        handled = self._record_outcome(issue, outcome, session)
+                        results[position + offset] = (issue, handled)
+                    if handled and outcome:
+                        put(writes, (issue, outcome))
+        
+        def write():
+            while True:
+                item = get(writes)
+                if item is _PIPELINE_DONE:
+                    return
+                
+                issue, actions = item
+                self._execute_actions(issue, actions, session)
+        
+        # Daemon threads, so a stage stuck in a slow request cannot keep an interrupted process alive
+        fetcher = threading.Thread(target=fetch, name="triage-fetch", daemon=True)
+        analyzers = [threading.Thread(target=analyze, name=f"triage-analyze-{index}", daemon=True) for index in range(self.max_workers)]
+        writers = [threading.Thread(target=write, name=f"triage-write-{index}", daemon=True) for index in range(self.max_workers)]
+        for thread in [fetcher, *analyzers, *writers]:
+            thread.start()
+        
+        completed = False
+        try:
+            fetcher.join()
+            for thread in analyzers:
+                thread.join()
+            completed = True
+        finally:
+            # On an interrupt or error, queued work is dropped instead of being written to GitHub;
+            # otherwise the writers drain the queue before reaching their sentinels
+            if not completed:
+                stop.set()
+            for _ in writers:
+                put(writes, _PIPELINE_DONE)
+            for thread in writers:
+                thread.join()
+        
+        if fetch_errors:
+            raise fetch_errors[0]
+        
+        return self._ordered_outcomes(results, session)
+    
+    async def _run_pipeline_async(self, issues: AsyncIterator[GitHubIssue], session: TriageSession, ai_engine, github_adapter: AsyncGitHubAdapter) -> List[Tuple[GitHubIssue, bool]]:
+        """Async counterpart of _run_pipeline, with tasks in place of threads"""
+        batches = asyncio.Queue(maxsize=self.max_workers * 2)
+        writes = asyncio.Queue(maxsize=self.max_workers * 2)
+        results = {}
+        fetch_errors = []
+        
+        async def fetch():
+            try:
+                position = 0
+                batch = []
+                async for issue in issues:
+                    batch.append(issue)
+                    if len(batch) >= self.batch_size:
+                        await batches.put((position, batch))
+                        position += len(batch)
+                        batch = []
+                if batch:
+                    await batches.put((position, batch))
+            except Exception as e:
+                fetch_errors.append(e)
+            
+            # Not in a finally: a cancelled fetcher must not block on a queue nobody reads any more
+            for _ in range(self.max_workers):
+                await batches.put(_PIPELINE_DONE)
+        
+        async def analyze():
+            while True:
+                item = await batches.get()
+                if item is _PIPELINE_DONE:
+                    return
+                
+                position, batch = item
+                try:
+                    batch_outcomes = await self._process_issues_async(batch, ai_engine)
+                except Exception as e:
+                    batch_outcomes = [e] * len(batch)
+                
+                for offset, (issue, outcome) in enumerate(zip(batch, batch_outcomes)):
+                    handled = self._record_outcome(issue, outcome, session)
+                    results[position + offset] = (issue, handled)
+                    if handled and outcome:
+                        await writes.put((issue, outcome))
+        
+        async def write():
+            while True:
+                item = await writes.get()
+                if item is _PIPELINE_DONE:
+                    return
+                
+                issue, actions = item
+                await self._execute_actions_async(issue, actions, session, github_adapter)
+        
+        async def close_writes():
+            await asyncio.gather(*analyzers)
+            for _ in writers:
+                await writes.put(_PIPELINE_DONE)
+        
+        fetcher = asyncio.create_task(fetch())
+        analyzers = [asyncio.create_task(analyze()) for _ in range(self.max_workers)]
+        writers = [asyncio.create_task(write()) for _ in range(self.max_workers)]
+        tasks = [fetcher, *analyzers, *writers, asyncio.create_task(close_writes())]
+        
+        completed = False
+        try:
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    # Raise as soon as any task fails; a dead writer would otherwise leave the analyzers blocked on a full queue
+                    task.result()
+            completed = True
+        finally:
+            # On cancellation (Ctrl+C, SIGTERM in the daemon) or an error, queued work is dropped
+            # instead of being written to GitHub
+            if not completed:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if fetch_errors:
+            raise fetch_errors[0]
+        
+        return self._ordered_outcomes(results, session)
+    
+    def _ordered_outcomes(self, results: Dict[int, Tuple[GitHubIssue, bool]], session: TriageSession) -> List[Tuple[GitHubIssue, bool]]:
+        """Put pipeline results and the session's actions back into fetch order"""
+        outcomes = [results[position] for position in sorted(results)]
+        
+        # Workers finish out of order; sorting keeps the session report deterministic
+        fetch_order = {(issue.repo, issue.number): index for index, (issue, _) in enumerate(outcomes)}
+        session.actions_taken.sort(key=lambda action: fetch_order.get((action.repo, action.issue_number), len(fetch_order)))
+        
+        return outcomes
+    
+    def _record_outcome(self, issue: GitHubIssue, outcome: Union[List[TriageAction], None, Exception], session: TriageSession) -> bool:
+        """Fold one issue's processing outcome into the session; returns True if the issue was handled"""
+        if isinstance(outcome, Exception):
+            error_msg = f"Error processing issue #{issue.number}: {outcome}"
+            logger.error(error_msg)
+            session.errors.append(error_msg)
+            return False
+        
+        session.issues_processed += 1
+        session.issues_by_repo[issue.repo] = session.issues_by_repo.get(issue.repo, 0) + 1
+        
+        # None means the AI analysis failed; the issue must be retried on the next run
+        if outcome is None:
+            return False
+        
+        session.actions_taken.extend(outcome)
+        return True
+    
+    def _resolve_repos(self) -> List[str]:
+        """Repositories this run triages: GITHUB_REPOS with owner globs expanded, or GITHUB_REPO"""
+        patterns = Config.github_repo_patterns()
+        repos = self.github_adapter.resolve_repos(patterns)
+        if not repos:
+            raise ValueError(f"No repositories matched {', '.join(patterns)}")
+        
+        if len(repos) > 1:
+            logger.info(f"Triaging {len(repos)} repositories in turn: {', '.join(repos)}")
+        return repos
+    
+    def _load_cursor(self, repo: str) -> str:
+        """Read the incremental high-water mark for a repository"""
+        since = self.state_store.get_cursor(repo)
+        if since:
+            logger.info(f"Incremental mode: fetching {repo} issues updated since {since}")
+            return since
+        
+        # Without a cursor, still walk the backlog in update order from the start
+        logger.info(f"Incremental mode: no cursor saved yet for {repo}, starting from the oldest updated issue")
+        return INITIAL_CURSOR
+    
+    def _skip_own_updates(self, issues: Iterator[GitHubIssue], repo: str) -> Iterator[GitHubIssue]:
+        """Drop fetched issues that have not changed since this bot last handled them"""
+        own_updates = self.state_store.get_own_updates(repo)
+        for issue in issues:
+            if not self._is_own_update(issue, own_updates):
+                yield issue
+    
+    async def _skip_own_updates_async(self, issues: AsyncIterator[GitHubIssue], repo: str) -> AsyncIterator[GitHubIssue]:
+        """Async counterpart of _skip_own_updates"""
+        own_updates = self.state_store.get_own_updates(repo)
+        async for issue in issues:
+            if not self._is_own_update(issue, own_updates):
+                yield issue
+    
+    def _is_own_update(self, issue: GitHubIssue, own_updates: Dict[int, str]) -> bool:
+        """Whether an issue's last update is this bot's own write, or the cursor issue that `since` (inclusive) returns again"""
+        if issue.updated_at > own_updates.get(issue.number, ""):
+            return False
+        
+        logger.info(f"Skipping issue #{issue.number}: unchanged since it was last triaged")
+        return True
+    
+    def _save_cursor(self, outcomes: List[Tuple[GitHubIssue, bool]], session: TriageSession, github_adapter: GitHubAdapter):
+        """Advance the high-water mark over the leading run of fully handled issues"""
+        if self.dry_run:
+            logger.info("Dry-run mode: incremental cursor not saved")
+            return
+        
+        failed_issues = {(action.repo, action.issue_number) for action in session.actions_taken if not action.executed}
+        
+        # Each repository's issues arrive sorted by updated_at ascending, so stop at its first
+        # one that still needs work; everything after it is picked up again next run
+        cursors = {}
+        blocked = set()
+        own_updates = {}
+        for issue, handled in outcomes:
+            if not handled or (issue.repo, issue.number) in failed_issues:
+                blocked.add(issue.repo)
+                continue
+            
+            # Our writes bump updated_at, so remember the issue as of GitHub's time of the last one
+            written_at = github_adapter.written_at.get((issue.repo, issue.number), "")
+            own_updates.setdefault(issue.repo, {})[issue.number] = max(issue.updated_at, written_at)
+            if issue.repo not in blocked:
+                cursors[issue.repo] = issue.updated_at
+        
+        for repo, cursor in cursors.items():
+            self.state_store.set_cursor(repo, cursor)
+        for repo, updates in own_updates.items():
+            self.state_store.add_own_updates(repo, updates)
+    
+    def _needs_triage(self, issue: GitHubIssue) -> bool:
+        """Check whether an issue still needs triage"""
         logger.info(f"Processing issue #{issue.number}: {issue.title}")
         
+        # A resumed issue may carry the priority label this session already applied
+        if (issue.repo, issue.number) in self._resumed_results:
+            return True
+        
         # Skip if already triaged (has priority label)
         priority_labels = [label for label in issue.labels if label.startswith('P')]
         if priority_labels:
             logger.info(f"Issue #{issue.number} already has priority label: {priority_labels}")
+            return False
+        
+        return True
+    
+    def _process_issues(self, issues: List[GitHubIssue]) -> List[Optional[List[TriageAction]]]:
+        """Process a batch of issues and return each one's triage actions (runs on a worker thread)"""
+        needs_triage = [self._needs_triage(issue) for issue in issues]
+        to_analyze = [issue for issue, needed in zip(issues, needs_triage) if needed]
+        triage_results = self._analyze_issues(self.ai_engine, to_analyze)
+        triage_results = iter(triage_results)
+        
+        return [
+            self._actions_for_result(issue, next(triage_results)) if needed else []
+            for issue, needed in zip(issues, needs_triage)
+        ]
+    
+    async def _process_issues_async(self, issues: List[GitHubIssue], ai_engine) -> List[Optional[List[TriageAction]]]:
+        """Process a batch of issues with an async engine and return each one's triage actions"""
+        needs_triage = [self._needs_triage(issue) for issue in issues]
+        to_analyze = [issue for issue, needed in zip(issues, needs_triage) if needed]
+        triage_results = await self._analyze_issues_async(ai_engine, to_analyze)
+        triage_results = iter(triage_results)
+        
+        return [
+            self._actions_for_result(issue, next(triage_results)) if needed else []
+            for issue, needed in zip(issues, needs_triage)
+        ]
+    
+    def _analyze_issues(self, ai_engine, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Analyze issues, reusing cached results and batching the rest into as few AI calls as possible"""
+        triage_results = [self._get_earlier_result(ai_engine, issue) for issue in issues]
+        misses = [index for index, result in enumerate(triage_results) if result is None]
+        
+        engine_names = [ai_engine.engine_name] * len(issues)
+        
+        misses = self._resolve_duplicates(issues, triage_results, misses)
+        misses = self._resolve_locally(issues, triage_results, misses, engine_names)
+        
+        if misses and self._within_token_budget(ai_engine):
+            # Analyze with AI
+            fresh_results = ai_engine.analyze_issues([issues[index] for index in misses])
+            answered_by = getattr(fresh_results, "engine", ai_engine)
+            for index, triage_result in zip(misses, fresh_results):
+                triage_results[index] = triage_result
+                self._store_cached_result(self._cache_key(answered_by, issues[index]), triage_result)
+                self._index_result(issues[index], triage_result)
+        
+        self._journal_analyses(issues, triage_results, engine_names)
+        return triage_results
+    
+    async def _analyze_issues_async(self, ai_engine, issues: List[GitHubIssue]) -> List[Optional[TriageResult]]:
+        """Async counterpart of _analyze_issues"""
+        triage_results = [self._get_earlier_result(ai_engine, issue) for issue in issues]
+        misses = [index for index, result in enumerate(triage_results) if result is None]
+        
+        engine_names = [ai_engine.engine_name] * len(issues)
+        
+        misses = self._resolve_duplicates(issues, triage_results, misses)
+        misses = self._resolve_locally(issues, triage_results, misses, engine_names)
+        
+        if misses and self._within_token_budget(ai_engine):
+            # Analyze with AI
+            fresh_results = await ai_engine.analyze_issues([issues[index] for index in misses])
+            answered_by = getattr(fresh_results, "engine", ai_engine)
+            for index, triage_result in zip(misses, fresh_results):
+                triage_results[index] = triage_result
+                self._store_cached_result(self._cache_key(answered_by, issues[index]), triage_result)
+                self._index_result(issues[index], triage_result)
+        
+        self._journal_analyses(issues, triage_results, engine_names)
+        return triage_results
+    
+    def _within_token_budget(self, ai_engine) -> bool:
+        """Check RUN_TOKEN_BUDGET, which every repository and worker of the session draws from.
+        
+        It is checked before each AI request, so requests already in flight can
+        overshoot it slightly. Issues left unanalyzed are retried on the next run.
+        """
+        if not Config.RUN_TOKEN_BUDGET:
+            return True
+        
+        used = ai_engine.usage.total_tokens()
+        if used < Config.RUN_TOKEN_BUDGET:
+            return True
+        
+        logger.warning(f"Run token budget spent ({used}/{Config.RUN_TOKEN_BUDGET} tokens), leaving the remaining issues for the next run")
+        return False
+    
+    def _resolve_duplicates(self, issues: List[GitHubIssue], triage_results: List[Optional[TriageResult]], misses: List[int]) -> List[int]:
+        """Reuse the result of an already-triaged near-duplicate; returns the misses still needing the AI"""
+        if not self.duplicate_index:
+            return misses
+        
+        remaining = []
+        for index in misses:
+            issue = issues[index]
+            match = self.duplicate_index.find_duplicate(issue.repo, issue)
+            if match is None:
+                remaining.append(index)
+                continue
+            
+            logger.info(f"Issue #{issue.number} looks like a duplicate of #{match.issue_number} (similarity {match.score:.2f}), reusing its triage result")
+            triage_results[index] = match.result.model_copy(update={"duplicate_of": match.issue_number})
+        
+        return remaining
+    
+    def _resolve_locally(self, issues: List[GitHubIssue], triage_results: List[Optional[TriageResult]], misses: List[int], engine_names: List[str]) -> List[int]:
+        """Let the local classifier answer obvious issues; returns the misses it was unsure about"""
+        if not self.local_engine:
+            return misses
+        
+        remaining = []
+        for index, triage_result in zip(misses, self.local_engine.analyze_issues([issues[index] for index in misses])):
+            if triage_result is None:
+                remaining.append(index)
+                continue
+            
+            # Local results are journaled under their own engine so they are never used as training data
+            triage_results[index] = triage_result
+            engine_names[index] = self.local_engine.engine_name
+        
+        return remaining
+    
+    def _index_result(self, issue: GitHubIssue, triage_result: Optional[TriageResult]):
+        """Add a freshly analyzed issue to the duplicate index"""
+        if self.duplicate_index and triage_result:
+            self.duplicate_index.add(issue.repo, issue, triage_result)
+    
+    def _get_earlier_result(self, ai_engine, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Reuse the resumed session's result for an issue, falling back to the result cache"""
+        if (issue.repo, issue.number) in self._resumed_results:
+            logger.info(f"Using journaled triage result for issue #{issue.number}")
+            return self._resumed_results[(issue.repo, issue.number)]
+        return self._get_cached_result(ai_engine, issue)
+    
+    def _journal_analyses(self, issues: List[GitHubIssue], triage_results: List[Optional[TriageResult]], engine_names: List[str]):
+        """Journal each analysis as soon as it completes so a crashed run can be resumed"""
+        if not self.journal:
             return
         
-        # Analyze with AI
-        triage_result = self.ai_engine.analyze_issue(issue)
+        for issue, triage_result, engine_name in zip(issues, triage_results, engine_names):
+            # Results reused from a resumed session are already journaled under their original engine
+            if (issue.repo, issue.number) in self._resumed_results:
+                continue
+            self.journal.record_analysis(self._session_id, issue.repo, issue, engine_name, triage_result)
+    
+    def _cache_key(self, ai_engine, issue: GitHubIssue) -> Optional[str]:
+        """Cache key for an issue: the engine, model and the exact prompt it would be sent"""
+        if not self.cache:
+            return None
+        return TriageCache.make_key(ai_engine.engine_name, ai_engine.model, ai_engine._build_triage_prompt(issue))
+    
+    def _get_cached_result(self, ai_engine, issue: GitHubIssue) -> Optional[TriageResult]:
+        """Look up a cached triage result from any engine that may answer for `ai_engine` (e.g. a hedge)"""
+        if not self.cache:
+            return None
+        
+        for engine in getattr(ai_engine, "answering_engines", [ai_engine]):
+            triage_result = self.cache.get(self._cache_key(engine, issue))
+            if triage_result:
+                logger.info(f"Using cached triage result for issue #{issue.number}")
+                return triage_result
+        return None
+    
+    def _store_cached_result(self, cache_key: Optional[str], triage_result: Optional[TriageResult]):
+        """Cache a fresh triage result (failed analyses are never cached)"""
+        if cache_key and triage_result:
+            self.cache.put(cache_key, triage_result)
+    
+    def _actions_for_result(self, issue: GitHubIssue, triage_result: Optional[TriageResult]) -> Optional[List[TriageAction]]:
+        """Turn an analysis result into triage actions (None if the analysis failed)"""
         if not triage_result:
             logger.warning(f"Failed to analyze issue #{issue.number}")
-            return
+            return None
         
         # Generate actions based on triage result
-        actions = self._generate_actions(issue, triage_result)
-        session.actions_taken.extend(actions)
+        with time_stage("action_generation"):
+            actions = self._generate_actions(issue, triage_result)
         
         # Log triage result
         logger.info(f"Issue #{issue.number} triaged: {triage_result.priority.value}, {triage_result.component.value}, confidence: {triage_result.confidence_score:.2f}")
+        
+        return actions
     
     def _generate_actions(self, issue: GitHubIssue, triage_result: TriageResult) -> List[TriageAction]:
         """Generate actions based on triage result"""
@@ -113,6 +772,10 @@ class TriageOrchestrator:
         if triage_result.component.value != "unknown":
             new_labels.append(triage_result.component.value)
         
+        # Mark duplicates so maintainers can close them against the original
+        if triage_result.duplicate_of:
+            new_labels.append("duplicate")
+        
         # Add suggested labels
         for label in triage_result.suggested_labels:
             if label not in issue.labels and label not in new_labels:
@@ -122,6 +785,7 @@ class TriageOrchestrator:
         if new_labels and Config.AUTO_LABEL_ENABLED:
             actions.append(TriageAction(
                 issue_number=issue.number,
+                repo=issue.repo,
                 action_type="label",
                 action_data={"labels": new_labels},
                 dry_run=self.dry_run
@@ -134,6 +798,7 @@ class TriageOrchestrator:
             
             actions.append(TriageAction(
                 issue_number=issue.number,
+                repo=issue.repo,
                 action_type="assign",
                 action_data={"assignee": triage_result.suggested_assignee},
                 dry_run=self.dry_run
@@ -143,6 +808,7 @@ class TriageOrchestrator:
         comment = self._generate_triage_comment(triage_result)
         actions.append(TriageAction(
             issue_number=issue.number,
+            repo=issue.repo,
             action_type="comment",
             action_data={"comment": comment},
             dry_run=self.dry_run
@@ -152,12 +818,16 @@ class TriageOrchestrator:
     
     def _generate_triage_comment(self, triage_result: TriageResult) -> str:
         """Generate a triage comment explaining the AI analysis"""
+        duplicate_note = ""
+        if triage_result.duplicate_of:
+            duplicate_note = f"\n**Possible duplicate of:** #{triage_result.duplicate_of} (triage copied from that issue)\n"
+        
         comment = f"""🤖 **Automated Triage Analysis**
 
 **Priority:** {triage_result.priority.value}
 **Component:** {triage_result.component.value}
 **Confidence:** {triage_result.confidence_score:.1%}
-
+{duplicate_note}
 **Analysis:** {triage_result.reasoning}
 
 ---
@@ -165,32 +835,101 @@ class TriageOrchestrator:
 """
         return comment
     
-    def _execute_actions(self, session: TriageSession):
-        """Execute all planned actions"""
-        logger.info(f"Executing {len(session.actions_taken)} actions")
+    def _coalesce_actions(self, issue: GitHubIssue, actions: List[TriageAction]) -> List[Tuple[TriageAction, List[TriageAction]]]:
+        """Merge an issue's label + assign actions into one PATCH.
         
-        for action in session.actions_taken:
+        Each write is paired with the planned actions it carries out, so results
+        can be reported against the original actions.
+        """
+        label_action = next((action for action in actions if action.action_type == "label"), None)
+        assign_action = next((action for action in actions if action.action_type == "assign"), None)
+        writes = []
+        
+        # The adapter merges the new labels into a fresh read of the issue's labels, since PATCH
+        # replaces the list; a lone label action keeps using the additive labels endpoint
+        if label_action and assign_action:
+            writes.append((TriageAction(
+                issue_number=issue.number,
+                repo=issue.repo,
+                action_type="update",
+                action_data={
+                    "labels": label_action.action_data["labels"],
+                    "assignees": [assign_action.action_data["assignee"]]
+                },
+                dry_run=label_action.dry_run
+            ), [label_action, assign_action]))
+            actions = [action for action in actions if action is not label_action and action is not assign_action]
+        
+        writes.extend((action, [action]) for action in actions)
+        return writes
+    
+    def _execute_actions(self, issue: GitHubIssue, actions: List[TriageAction], session: TriageSession):
+        """Execute one issue's actions, in order so labels land before the comment"""
+        writes = self._coalesce_actions(issue, self._skip_applied_actions(actions, session))
+        logger.info(f"Executing {len(actions)} actions for issue #{issue.number} as {len(writes)} GitHub writes")
+        
+        for write, planned_actions in writes:
             try:
-                success = self.github_adapter.execute_action(action)
-                action.executed = success
+                success = self.github_adapter.execute_action(write)
+                self._record_action_result(write, success, session, planned_actions)
                 
-                if success:
-                    action.execution_result = "Success"
-                else:
-                    action.execution_result = "Failed"
-                    session.errors.append(f"Failed to execute {action.action_type} action for issue #{action.issue_number}")
-                    
             except Exception as e:
-                error_msg = f"Error executing action for issue #{action.issue_number}: {e}"
-                logger.error(error_msg)
-                action.executed = False
-                action.execution_result = str(e)
-                session.errors.append(error_msg)
+                self._record_action_error(write, e, session, planned_actions)
+    
+    async def _execute_actions_async(self, issue: GitHubIssue, actions: List[TriageAction], session: TriageSession, github_adapter: AsyncGitHubAdapter):
+        """Async counterpart of _execute_actions"""
+        writes = self._coalesce_actions(issue, self._skip_applied_actions(actions, session))
+        logger.info(f"Executing {len(actions)} actions for issue #{issue.number} as {len(writes)} GitHub writes")
+        
+        for write, planned_actions in writes:
+            try:
+                success = await github_adapter.execute_action(write)
+                self._record_action_result(write, success, session, planned_actions)
+                
+            except Exception as e:
+                self._record_action_error(write, e, session, planned_actions)
+    
+    def _skip_applied_actions(self, actions: List[TriageAction], session: TriageSession) -> List[TriageAction]:
+        """Mark actions a resumed session already applied as done and return the rest"""
+        remaining = []
+        for action in actions:
+            if (action.repo, action.issue_number, action.action_type) in self._resumed_actions:
+                action.executed = True
+                action.execution_result = "Success (before resume)"
+            else:
+                remaining.append(action)
+        return remaining
+    
+    def _record_action_result(self, action: TriageAction, success: bool, session: TriageSession, planned_actions: List[TriageAction]):
+        """Store the outcome of an executed write on the planned actions and session"""
+        for planned_action in planned_actions:
+            planned_action.executed = success
+            planned_action.execution_result = "Success" if success else "Failed"
+            self._journal_action(planned_action)
+        
+        if not success:
+            session.errors.append(f"Failed to execute {action.action_type} action for issue #{action.issue_number}")
+    
+    def _record_action_error(self, action: TriageAction, error: Exception, session: TriageSession, planned_actions: List[TriageAction]):
+        """Store an exception raised while executing a write"""
+        error_msg = f"Error executing action for issue #{action.issue_number}: {error}"
+        logger.error(error_msg)
+        for planned_action in planned_actions:
+            planned_action.executed = False
+            planned_action.execution_result = str(error)
+            self._journal_action(planned_action)
+        session.errors.append(error_msg)
+    
+    def _journal_action(self, action: TriageAction):
+        """Journal an action's outcome as soon as it is known"""
+        if self.journal:
+            self.journal.record_action(self._session_id, action.repo, action)
     
     def get_session_summary(self, session: TriageSession) -> str:
         """Generate a summary of the triage session"""
         successful_actions = sum(1 for action in session.actions_taken if action.executed)
         failed_actions = len(session.actions_taken) - successful_actions
+        local_hit_rate = session.local_hits / session.local_attempts if session.local_attempts else 0.0
         
         summary = f"""
 Triage Session Summary
@@ -200,6 +939,9 @@ Timestamp: {session.timestamp}
 Dry Run Mode: {session.dry_run}
 
 Issues Processed: {session.issues_processed}
+Cached Results Reused: {session.cache_hits}
+Duplicates Linked: {session.duplicates_found}
+Local Classifier Hits: {session.local_hits}/{session.local_attempts} ({local_hit_rate:.1%})
 Actions Planned: {len(session.actions_taken)}
 Actions Successful: {successful_actions}
 Actions Failed: {failed_actions}
@@ -215,6 +957,34 @@ Action Breakdown:
         for action_type, count in action_types.items():
             summary += f"- {action_type}: {count}\n"
         
+        if len(session.issues_by_repo) > 1:
+            summary += f"\nIssues by Repository:\n"
+            for repo, count in sorted(session.issues_by_repo.items()):
+                summary += f"- {repo}: {count}\n"
+        
+        usage = session.token_usage
+        if usage.requests:
+            cached_share = usage.cached_input_tokens / usage.input_tokens if usage.input_tokens else 0.0
+            summary += f"\nToken Usage:\n"
+            summary += f"- LLM requests: {usage.requests}\n"
+            summary += f"- Input tokens: {usage.input_tokens} ({usage.cached_input_tokens} from prompt cache, {cached_share:.1%})\n"
+            summary += f"- Output tokens: {usage.output_tokens}\n"
+            summary += f"- Prompt cache hits: {usage.cache_hit_requests}/{usage.requests} requests\n"
+            if usage.cache_write_tokens:
+                summary += f"- Prompt cache writes: {usage.cache_write_tokens} tokens\n"
+            summary += f"- Estimated input tokens before sending: {usage.estimated_input_tokens}\n"
+            if usage.bodies_compacted:
+                summary += f"- Issue bodies compacted: {usage.bodies_compacted} (~{usage.body_tokens_trimmed} tokens trimmed)\n"
+        
+        engines = sorted(set(usage.results_parsed) | set(usage.parse_failures))
+        if engines:
+            summary += f"\nResponse Parsing:\n"
+            for engine in engines:
+                parsed = usage.results_parsed.get(engine, 0)
+                failed = usage.parse_failures.get(engine, 0)
+                failure_rate = failed / (parsed + failed) if parsed + failed else 0.0
+                summary += f"- {engine}: {parsed} parsed ({usage.results_repaired.get(engine, 0)} repaired), {failed} failed ({failure_rate:.1%})\n"
+        
         if session.errors:
             summary += f"\nErrors:\n"
             for error in session.errors[:5]:  # Show first 5 errors
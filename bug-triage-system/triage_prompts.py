@@ -0,0 +1,381 @@
+import json
+import logging
+import re
+import time
+from typing import Any, List, Optional, Tuple
+from config import Config
+from models import GitHubIssue, TriageResult, Priority, Component
+from prompt_compactor import CHARS_PER_TOKEN, CompactedText, compact_text, estimate_tokens
+from streaming_json import IncrementalObjectParser
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fields that decide the triage actions; once all are in, only the reasoning is left to stream
+DECISION_FIELDS = {"priority", "component", "suggested_labels", "suggested_assignee", "confidence_score"}
+
+# TriageResult fields filled in by the orchestrator, never by the model
+ORCHESTRATOR_FIELDS = {"duplicate_of"}
+
+# Name of the Claude tool whose input is the triage result
+TRIAGE_TOOL_NAME = "record_triage"
+
+# Output tokens reserved for each issue's result in a response
+OUTPUT_TOKENS_PER_ISSUE = 500
+
+# (context window, max output tokens) by model name prefix; the longest matching prefix wins
+MODEL_TOKEN_LIMITS = {
+    "claude-3-5": (200000, 8192),
+    "claude-3-7": (200000, 8192),
+    "claude-3": (200000, 4096),
+    "claude": (200000, 8192),
+    "gpt-4o": (128000, 16384),
+    "gpt-4-turbo": (128000, 4096),
+    "gpt-4-32k": (32768, 4096),
+    "gpt-4": (8192, 4096),
+    "gpt-3.5-turbo": (16385, 4096),
+}
+DEFAULT_TOKEN_LIMITS = (8192, 4096)
+
+# JSON strings, Python literals and trailing commas, for repair_json
+REPAIR_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"|\bTrue\b|\bFalse\b|\bNone\b|,(?=\s*[}\]])')
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null", ",": ""}
+
+TRIAGE_CRITERIA = """TRIAGE CRITERIA:
+Priority Levels:
+- P0 (Critical): Production down, security vulnerabilities, data loss
+- P1 (High): Major features broken, significant user impact
+- P2 (Medium): Minor feature issues, moderate user impact
+- P3 (Low): Enhancements, documentation, nice-to-have features
+
+Component Categories:
+- frontend: UI/UX issues, client-side bugs, styling problems
+- backend: API issues, server-side logic, database problems
+- infra: DevOps, deployment, infrastructure, CI/CD
+- docs: Documentation issues
+- testing: Test-related issues
+- unknown: Cannot determine from available information"""
+
+RESULT_FIELDS = """    "priority": "P0|P1|P2|P3",
+    "component": "frontend|backend|infra|docs|testing|unknown",
+    "suggested_labels": ["label1", "label2"],
+    "suggested_assignee": "username or null",
+    "confidence_score": 0.0-1.0,
+    "reasoning": "Brief explanation of your analysis\""""
+
+GUIDELINES = """IMPORTANT GUIDELINES:
+1. Be conservative with P0/P1 assignments - only for truly critical issues
+2. Suggest assignee only if you can clearly match the issue to a team member's expertise
+3. Include relevant labels like "bug", "enhancement", "security", "performance", etc.
+4. Confidence score should reflect how certain you are about the classification
+5. Keep reasoning concise but informative"""
+
+
+def compact_issue_body(issue: GitHubIssue) -> CompactedText:
+    """The issue body as sent to the AI, trimmed to ISSUE_TOKEN_BUDGET"""
+    return compact_text(issue.body or "", Config.ISSUE_TOKEN_BUDGET)
+
+
+def build_issue_details(issue: GitHubIssue) -> str:
+    """Render the per-issue fields of the prompt"""
+    return f"""Title: {issue.title}
+Body: {compact_issue_body(issue).text or "No description provided"}
+Current Labels: {', '.join(issue.labels) if issue.labels else "None"}
+Current Assignee: {issue.assignee or "Unassigned"}"""
+
+
+def build_team_information() -> str:
+    """Render the configured team rosters"""
+    team_info = {
+        "frontend": Config.FRONTEND_TEAM,
+        "backend": Config.BACKEND_TEAM,
+        "infra": Config.INFRA_TEAM,
+        "all_members": Config.TEAM_MEMBERS
+    }
+    
+    return f"""TEAM INFORMATION:
+Frontend Team: {', '.join(team_info['frontend']) if team_info['frontend'] else "Not configured"}
+Backend Team: {', '.join(team_info['backend']) if team_info['backend'] else "Not configured"}
+Infrastructure Team: {', '.join(team_info['infra']) if team_info['infra'] else "Not configured"}
+All Team Members: {', '.join(team_info['all_members']) if team_info['all_members'] else "Not configured"}"""
+
+
+def build_system_prompt() -> str:
+    """Build the static prefix shared by every triage request in a run.
+    
+    Everything here is identical across issues, so it is sent first and marked
+    cacheable; the per-issue part of the prompt follows it.
+    """
+    return f"""You are an expert software engineering triage assistant. Analyze GitHub issues and provide a structured triage recommendation for each one. Always respond with valid JSON only.
+
+{build_team_information()}
+
+{TRIAGE_CRITERIA}
+
+RESPONSE FORMAT:
+Provide your analysis of each issue as a valid JSON object with the following structure:
+{{
+{RESULT_FIELDS}
+}}
+
+{GUIDELINES}"""
+
+
+def build_issue_prompt(issue: GitHubIssue) -> str:
+    """Build the small per-issue suffix that follows the system prompt"""
+    return f"""ISSUE DETAILS:
+{build_issue_details(issue)}
+
+Analyze the issue and respond with only the JSON object:"""
+
+
+def build_batch_issue_prompt(issues: List[GitHubIssue]) -> str:
+    """Build the per-request suffix that asks for several issues at once"""
+    issue_sections = "\n\n".join(
+        f"ISSUE {index}:\n{build_issue_details(issue)}"
+        for index, issue in enumerate(issues, start=1)
+    )
+    
+    return f"""Analyze each of the following {len(issues)} GitHub issues independently.
+
+{issue_sections}
+
+Respond with only a valid JSON array containing exactly one object per issue. Each object must have the structure described above plus an "issue_index" field holding the issue's number from this list (1 to {len(issues)})."""
+
+
+def model_token_limits(model: str) -> Tuple[int, int]:
+    """Context window and max output tokens of a model (MAX_OUTPUT_TOKENS overrides the output limit)"""
+    prefixes = [prefix for prefix in MODEL_TOKEN_LIMITS if model.startswith(prefix)]
+    context_window, max_output = MODEL_TOKEN_LIMITS[max(prefixes, key=len)] if prefixes else DEFAULT_TOKEN_LIMITS
+    return context_window, Config.MAX_OUTPUT_TOKENS or max_output
+
+
+def output_token_budget(model: str, issue_count: int) -> int:
+    """max_tokens for a request triaging issue_count issues, capped at the model's output limit"""
+    return min(OUTPUT_TOKENS_PER_ISSUE * issue_count, model_token_limits(model)[1])
+
+
+def split_batch(issues: List[GitHubIssue], model: str) -> List[List[GitHubIssue]]:
+    """Split a batch so each request's output fits the model's output limit and its prompt plus output fits the context window"""
+    context_window, max_output = model_token_limits(model)
+    system_tokens = estimate_tokens(build_system_prompt())
+    
+    batches = []
+    batch: List[GitHubIssue] = []
+    prompt_tokens = system_tokens
+    for issue in issues:
+        issue_tokens = estimate_tokens(build_issue_details(issue))
+        output_tokens = OUTPUT_TOKENS_PER_ISSUE * (len(batch) + 1)
+        if batch and (output_tokens > max_output or prompt_tokens + issue_tokens + output_tokens > context_window):
+            batches.append(batch)
+            batch = []
+            prompt_tokens = system_tokens
+        batch.append(issue)
+        prompt_tokens += issue_tokens
+    
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def build_triage_prompt(issue: GitHubIssue) -> str:
+    """Build the full prompt text for a single issue (system prefix followed by the issue)"""
+    return f"{build_system_prompt()}\n\n{build_issue_prompt(issue)}"
+
+
+def strip_code_fences(response_text: str) -> str:
+    """Remove the markdown code fence models sometimes wrap JSON in"""
+    response_text = response_text.strip()
+    
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+    
+    return response_text.strip()
+
+
+def triage_result_schema() -> dict:
+    """JSON schema of the fields the model fills in, generated from TriageResult"""
+    schema = TriageResult.model_json_schema()
+    definitions = schema.get("$defs", {})
+    
+    properties = {}
+    for name, field_schema in schema["properties"].items():
+        if name in ORCHESTRATOR_FIELDS:
+            continue
+        # Inline the enum definitions; not every provider resolves $ref
+        if "$ref" in field_schema:
+            field_schema = definitions[field_schema["$ref"].split("/")[-1]]
+        properties[name] = {key: value for key, value in field_schema.items() if key not in ("title", "default")}
+    
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+
+def batch_result_schema() -> dict:
+    """JSON schema of a batch answer: one triage result per issue, tagged with its issue_index"""
+    item = triage_result_schema()
+    item["properties"] = {"issue_index": {"type": "integer"}, **item["properties"]}
+    item["required"] = list(item["properties"])
+    
+    return {
+        "type": "object",
+        "properties": {"results": {"type": "array", "items": item}},
+        "required": ["results"],
+        "additionalProperties": False
+    }
+
+
+def repair_json(response_text: str) -> str:
+    """Best-effort fix of common model JSON mistakes: surrounding prose, Python literals, trailing commas and truncation"""
+    starts = [index for index in (response_text.find("{"), response_text.find("[")) if index != -1]
+    if not starts:
+        return response_text
+    text = response_text[min(starts):]
+    
+    # Find where the top-level value ends, or what is left open if it was cut off
+    closers = []
+    in_string = escaped = False
+    end = None
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+            if not closers:
+                end = index + 1
+                break
+    
+    if end is not None:
+        text = text[:end]
+    else:
+        if in_string:
+            text += '"'
+        text = text.rstrip().rstrip(",") + "".join(reversed(closers))
+    
+    return REPAIR_PATTERN.sub(lambda match: PYTHON_LITERALS.get(match.group(0), match.group(0)), text)
+
+
+def load_json_response(response_text: str, label: str) -> Tuple[Optional[Any], bool]:
+    """Decode a model's JSON answer, repairing it if needed; returns (data, repaired)"""
+    response_text = strip_code_fences(response_text)
+    try:
+        return json.loads(response_text), False
+    except json.JSONDecodeError:
+        pass
+    
+    try:
+        data = json.loads(repair_json(response_text))
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON response for {label}: {e}")
+        logger.error(f"Raw response: {response_text}")
+        return None, False
+    
+    logger.warning(f"Repaired malformed JSON response for {label}")
+    return data, True
+
+
+def parse_triage_data(triage_data: dict) -> TriageResult:
+    """Validate one decoded triage object and create a TriageResult"""
+    return TriageResult(
+        priority=Priority(triage_data["priority"]),
+        component=Component(triage_data["component"]),
+        suggested_labels=triage_data.get("suggested_labels", []),
+        suggested_assignee=triage_data.get("suggested_assignee"),
+        confidence_score=float(triage_data.get("confidence_score", 0.5)),
+        reasoning=triage_data.get("reasoning", "No reasoning provided")
+    )
+
+
+def parse_batch_response(response_text: str, issue_count: int) -> Tuple[List[Optional[TriageResult]], bool]:
+    """Parse a batch response; malformed or missing items come back as None. Also returns whether the JSON was repaired"""
+    results: List[Optional[TriageResult]] = [None] * issue_count
+    
+    items, repaired = load_json_response(response_text, f"batch of {issue_count} issues")
+    if items is None:
+        return results, False
+    
+    # Structured output wraps the array in an object
+    if isinstance(items, dict) and "results" in items:
+        items = items["results"]
+    if not isinstance(items, list):
+        logger.error(f"Batch response is not a JSON array: {type(items).__name__}")
+        return results, repaired
+    
+    for position, item in enumerate(items):
+        try:
+            # Fall back to the item's position if the model dropped issue_index
+            index = int(item.get("issue_index", position + 1)) - 1
+            if 0 <= index < issue_count and results[index] is None:
+                results[index] = parse_triage_data(item)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping malformed batch item {position + 1}: {e}")
+    
+    return results, repaired
+
+
+class TriageStreamCollector:
+    """Accumulate a streamed single-issue response, publishing the decision fields as they complete"""
+    
+    def __init__(self, label: str, reasoning_max_tokens: int = None):
+        self.label = label
+        max_tokens = Config.REASONING_MAX_TOKENS if reasoning_max_tokens is None else reasoning_max_tokens
+        self.reasoning_max_chars = max_tokens * CHARS_PER_TOKEN
+        self.parser = IncrementalObjectParser()
+        self.text: List[str] = []
+        self.truncated = False
+        self.repaired = False
+        self.decision_latency: Optional[float] = None
+        self._started = time.monotonic()
+    
+    @property
+    def decision(self) -> Optional[dict]:
+        """The decision fields, once all of them have streamed in"""
+        if DECISION_FIELDS <= self.parser.fields.keys():
+            return {field: self.parser.fields[field] for field in DECISION_FIELDS}
+        return None
+    
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk of generated text; returns True once the reasoning budget is used up"""
+        self.text.append(chunk)
+        if self.parser.feed(chunk) and self.decision_latency is None and self.decision:
+            self.decision_latency = time.monotonic() - self._started
+            logger.debug(f"Triage decision for {self.label} streamed in after {self.decision_latency:.2f}s")
+        
+        # Stop generating once the decision is known and the reasoning has used its budget
+        if self.reasoning_max_chars and self.decision:
+            reasoning = self.parser.partial_string("reasoning")
+            if reasoning is not None and len(reasoning) >= self.reasoning_max_chars:
+                self.truncated = True
+                return True
+        return False
+    
+    def result(self) -> Optional[TriageResult]:
+        """Build the TriageResult from the fields streamed so far"""
+        fields = dict(self.parser.fields)
+        if not self.decision:
+            # Not a well-formed object; fall back to repairing the whole text
+            fields, self.repaired = load_json_response("".join(self.text), self.label)
+            if fields is None:
+                return None
+        elif not self.parser.done:
+            reasoning = self.parser.partial_string("reasoning")
+            if reasoning is not None:
+                # Cut off by the reasoning budget or by max_tokens
+                limit = self.reasoning_max_chars or len(reasoning)
+                fields["reasoning"] = reasoning[:limit].rstrip() + "..."
+        
+        try:
+            return parse_triage_data(fields)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid triage data in streamed response for {self.label}: {e}")
+            return None
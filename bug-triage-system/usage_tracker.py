@@ -0,0 +1,55 @@
+import logging
+import threading
+import metrics
+from models import TokenUsage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class UsageTracker:
+    def __init__(self, engine_name: str = "", model: str = ""):
+        self.engine_name = engine_name
+        self.model = model
+        self._usage = TokenUsage()
+        self._lock = threading.Lock()
+    
+    def record(self, label: str, input_tokens: int, output_tokens: int, cached_input_tokens: int = 0, cache_write_tokens: int = 0):
+        """Accumulate the token usage reported for one LLM request"""
+        with self._lock:
+            self._usage.requests += 1
+            self._usage.input_tokens += input_tokens
+            self._usage.output_tokens += output_tokens
+            self._usage.cached_input_tokens += cached_input_tokens
+            self._usage.cache_write_tokens += cache_write_tokens
+            if cached_input_tokens:
+                self._usage.cache_hit_requests += 1
+        metrics.record_tokens(self.engine_name, self.model, input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
+        
+        hit_rate = cached_input_tokens / input_tokens if input_tokens else 0.0
+        logger.debug(f"Token usage for {label}: {input_tokens} in ({hit_rate:.0%} cached), {output_tokens} out")
+    
+    def record_prompt(self, estimated_tokens: int, bodies_compacted: int = 0, tokens_trimmed: int = 0):
+        """Accumulate the estimated size of a prompt about to be sent"""
+        with self._lock:
+            self._usage.estimated_input_tokens += estimated_tokens
+            self._usage.bodies_compacted += bodies_compacted
+            self._usage.body_tokens_trimmed += tokens_trimmed
+    
+    def record_parse(self, engine_name: str, parsed: int = 0, repaired: int = 0, failed: int = 0):
+        """Count decoded, repaired and undecodable issue results for an engine"""
+        with self._lock:
+            for counts, value in ((self._usage.results_parsed, parsed), (self._usage.results_repaired, repaired), (self._usage.parse_failures, failed)):
+                if value:
+                    counts[engine_name] = counts.get(engine_name, 0) + value
+        metrics.record_parse(self.engine_name, self.model, parsed=parsed, repaired=repaired, failed=failed)
+    
+    def total_tokens(self) -> int:
+        """Input plus output tokens accumulated since the last pop"""
+        with self._lock:
+            return self._usage.input_tokens + self._usage.output_tokens
+    
+    def pop(self) -> TokenUsage:
+        """Return the usage accumulated so far and start counting from zero"""
+        with self._lock:
+            usage, self._usage = self._usage, TokenUsage()
+        return usage
@@ -0,0 +1,166 @@
+import hashlib
+import hmac
+import logging
+import queue
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from config import Config
+import metrics
+from github_adapter import matches_repo
+from models import GitHubIssue
+from triage_orchestrator import TriageOrchestrator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Issue event actions that warrant a (re)triage
+TRIAGE_ACTIONS = {"opened", "reopened", "edited"}
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check GitHub's X-Hub-Signature-256 header against the raw request body"""
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+class TriageWorker:
+    def __init__(self, orchestrator: TriageOrchestrator, max_queue_size: int = None):
+        self.orchestrator = orchestrator
+        self.queue = queue.Queue(maxsize=max_queue_size or Config.WEBHOOK_QUEUE_SIZE)
+        self.sessions_run = 0
+        self._pending: Dict[Tuple[str, int], GitHubIssue] = {}  # Latest payload per queued (repo, issue number)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start the background thread that drains the queue"""
+        self._thread = threading.Thread(target=self._run, name="triage-webhook-worker", daemon=True)
+        self._thread.start()
+        logger.info("Webhook triage worker started")
+    
+    def stop(self):
+        """Finish the queued work and stop the background thread"""
+        if self._thread:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+            logger.info("Webhook triage worker stopped")
+    
+    def submit(self, issue: GitHubIssue) -> bool:
+        """Queue an issue for triage; returns False if the queue is full"""
+        with self._lock:
+            # A burst of edits to one issue only needs a single triage, of the latest content
+            key = (issue.repo, issue.number)
+            if key in self._pending:
+                self._pending[key] = issue
+                logger.info(f"Issue {issue.repo}#{issue.number} is already queued for triage")
+                return True
+            
+            try:
+                self.queue.put_nowait(key)
+            except queue.Full:
+                return False
+            
+            self._pending[key] = issue
+            return True
+    
+    def _take_batch(self, first: Tuple[str, int]) -> List[GitHubIssue]:
+        """Collect whatever else is already queued, so a burst of events becomes one session"""
+        keys = [first]
+        while len(keys) < Config.MAX_ISSUES_PER_RUN:
+            try:
+                key = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if key is None:
+                # Put the stop sentinel back so _run exits after this batch
+                self.queue.put(None)
+                break
+            keys.append(key)
+        
+        with self._lock:
+            return [self._pending.pop(key) for key in keys]
+    
+    def _run(self):
+        """Triage queued issues until stopped"""
+        while True:
+            key = self.queue.get()
+            if key is None:
+                return
+            
+            batch = self._take_batch(key)
+            try:
+                session = self.orchestrator.run_triage_session(issues=batch)
+                self.sessions_run += 1
+                logger.info(f"Webhook session {session.session_id} triaged {session.issues_processed} issues, {len(session.actions_taken)} actions, {len(session.errors)} errors")
+            except Exception as e:
+                logger.error(f"Error triaging webhook issues {[issue.number for issue in batch]}: {e}")
+
+def create_app(orchestrator: TriageOrchestrator = None, secret: str = None) -> FastAPI:
+    """Build the FastAPI app that receives GitHub issue webhooks"""
+    secret = secret or Config.GITHUB_WEBHOOK_SECRET
+    if not secret:
+        raise ValueError("GITHUB_WEBHOOK_SECRET must be set to serve webhooks")
+    
+    worker = TriageWorker(orchestrator or TriageOrchestrator())
+    
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        worker.start()
+        yield
+        worker.stop()
+    
+    app = FastAPI(title="AI Bug Triage Webhooks", lifespan=lifespan)
+    app.state.worker = worker
+    
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok", "queued": worker.queue.qsize(), "sessions_run": worker.sessions_run}
+    
+    @app.get("/metrics")
+    async def prometheus_metrics():
+        return Response(content=metrics.render(), headers={"Content-Type": metrics.CONTENT_TYPE_LATEST})
+    
+    @app.post("/webhook")
+    async def webhook(request: Request):
+        body = await request.body()
+        if not verify_signature(secret, body, request.headers.get("X-Hub-Signature-256")):
+            logger.warning("Rejected webhook with a missing or invalid signature")
+            raise HTTPException(status_code=401, detail="Invalid signature")
+        
+        event = request.headers.get("X-GitHub-Event", "")
+        if event == "ping":
+            return {"status": "pong"}
+        if event != "issues":
+            return JSONResponse(status_code=202, content={"status": "ignored", "reason": f"event '{event}'"})
+        
+        payload = await request.json()
+        action = payload.get("action")
+        repo = payload.get("repository", {}).get("full_name")
+        
+        if action not in TRIAGE_ACTIONS:
+            return JSONResponse(status_code=202, content={"status": "ignored", "reason": f"action '{action}'"})
+        if not repo or not matches_repo(repo, Config.github_repo_patterns()):
+            logger.warning(f"Ignoring webhook for unconfigured repository {repo}")
+            return JSONResponse(status_code=202, content={"status": "ignored", "reason": f"repository '{repo}'"})
+        
+        try:
+            issues = worker.orchestrator.github_adapter._parse_issues([payload["issue"]], repo)
+        except (KeyError, TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Malformed issue payload: {e}")
+        if not issues:
+            return JSONResponse(status_code=202, content={"status": "ignored", "reason": "pull request"})
+        
+        issue = issues[0]
+        if not worker.submit(issue):
+            logger.error(f"Triage queue is full, rejecting issue #{issue.number}")
+            raise HTTPException(status_code=503, detail="Triage queue is full")
+        
+        logger.info(f"Queued issue #{issue.number} for triage ({action})")
+        return JSONResponse(status_code=202, content={"status": "queued", "issue": issue.number})
+    
+    return app